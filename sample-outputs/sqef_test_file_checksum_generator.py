@@ -3,22 +3,84 @@
 SQEF Test Files Checksum Generator
 Generates SHA256 checksums for all .bin files in directory tree
 Outputs to console, CSV, JSON, and Markdown formats
+Archived .bin.gz / .bin.xz / .bin.zst files are included; with --logical
+their decompressed content is hashed instead of the stored bytes
+Entries are streamed to a JSON-lines manifest as they are hashed, so memory
+stays flat on very large trees and interrupted runs can be resumed
 """
 
 import os
+import re
 import sys
 import json
 import csv
+import gzip
+import lzma
+import zlib
+import heapq
 import hashlib
+import tempfile
+import itertools
 from pathlib import Path
-from datetime import datetime
+from datetime import datetime, timezone
 import argparse
 
-def calculate_sha256(filepath):
-    """Calculate SHA256 hash of a file"""
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+COMPRESSED_SUFFIXES = ('.gz', '.xz', '.zst')
+BIN_SUFFIXES = ('.bin',) + tuple('.bin' + suffix for suffix in COMPRESSED_SUFFIXES)
+PARTIAL_PATTERN = 'sqef_checksums.shard-*-of-*.jsonl'
+
+# Entries held in memory per sorted run when ordering the Markdown table
+SORT_CHUNK_ENTRIES = 100000
+SCAN_BACK_BYTES = 64 * 1024
+
+def generation_time():
+    """Timestamp for generated files; honours SOURCE_DATE_EPOCH for reproducible output"""
+    epoch = os.environ.get('SOURCE_DATE_EPOCH')
+    if epoch:
+        return datetime.fromtimestamp(int(epoch), timezone.utc).replace(tzinfo=None)
+    return datetime.now()
+
+def parse_shard(spec):
+    """'i/N' (1 <= i <= N) -> (i, N)"""
+    try:
+        index, count = (int(part) for part in spec.split('/'))
+    except ValueError:
+        raise ValueError(f"shard must look like i/N, got {spec!r}")
+    if not 1 <= index <= count:
+        raise ValueError(f"shard index must be between 1 and {count}, got {index}")
+    return index, count
+
+def in_shard(relative_path, shard):
+    """Whether a path belongs to shard (i, N); stable across machines and runs"""
+    if shard is None:
+        return True
+    index, count = shard
+    key = str(relative_path).replace('\\', '/').encode('utf-8')
+    return zlib.crc32(key) % count == index - 1
+
+def open_stream(filepath):
+    """Open a file for binary reading, decompressing .gz/.xz/.zst transparently"""
+    suffix = Path(filepath).suffix.lower()
+    if suffix == '.gz':
+        return gzip.open(filepath, 'rb')
+    if suffix == '.xz':
+        return lzma.open(filepath, 'rb')
+    if suffix == '.zst':
+        if zstandard is None:
+            raise ImportError("reading .zst files requires the zstandard package (pip install zstandard)")
+        return zstandard.ZstdDecompressor().stream_reader(open(filepath, 'rb'), closefd=True)
+    return open(filepath, 'rb')
+
+def calculate_sha256(filepath, logical=False):
+    """Calculate SHA256 hash of a file (of its decompressed content if logical)"""
     sha256_hash = hashlib.sha256()
     try:
-        with open(filepath, "rb") as f:
+        with (open_stream(filepath) if logical else open(filepath, "rb")) as f:
             # Read in chunks for large files
             for chunk in iter(lambda: f.read(4096), b""):
                 sha256_hash.update(chunk)
@@ -35,27 +97,179 @@ def format_bytes(bytes_size):
         bytes_size /= 1024.0
     return f"{bytes_size:.2f} PB"
 
+def iter_bin_files(root_path):
+    """Yield every .bin file, plain or compressed, in path order
+
+    Directories are listed one at a time and visited in name order, so the
+    order is fixed between runs and machines without holding the whole
+    file list in memory.
+    """
+    try:
+        entries = sorted(os.scandir(root_path), key=lambda e: e.name)
+    except OSError as e:
+        print(f"Warning: Cannot list {root_path}: {e}")
+        return
+    for entry in entries:
+        if entry.is_dir():
+            yield from iter_bin_files(entry.path)
+        elif entry.is_file() and entry.name.lower().endswith(BIN_SUFFIXES):
+            yield Path(entry.path)
+
 def scan_for_bin_files(root_path):
-    """Recursively find all .bin files"""
-    bin_files = []
-    root = Path(root_path)
+    """Recursively find all .bin files, plain or compressed, in path order"""
+    print(f"Scanning for .bin files in: {Path(root_path)}")
+    return list(iter_bin_files(root_path))
+
+def path_key(relative_path):
+    """Sort key giving the scan order of a relative path"""
+    return tuple(relative_path.split('/'))
+
+def read_manifest(manifest_path):
+    """Yield the entries of a JSON-lines manifest, ignoring a torn last line"""
+    with open(manifest_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.endswith('\n'):
+                yield json.loads(line)
+
+def repair_manifest(manifest_path):
+    """Cut a JSON-lines manifest back to its last complete line"""
+    with open(manifest_path, 'rb+') as f:
+        data_end = f.seek(0, os.SEEK_END)
+        position = data_end
+        while position > 0:
+            step = min(SCAN_BACK_BYTES, position)
+            f.seek(position - step)
+            newline = f.read(step).rfind(b'\n')
+            if newline >= 0:
+                position = position - step + newline + 1
+                break
+            position -= step
+        if position != data_end:
+            f.truncate(position)
+
+def external_sort(entries, key, chunk_size=SORT_CHUNK_ENTRIES):
+    """Yield entries ordered by key, holding at most chunk_size of them in memory
+
+    Sorted runs of chunk_size entries are spilled to temporary JSON-lines
+    files and merged back with a heap.
+    """
+    runs = []
+    try:
+        while True:
+            chunk = sorted(itertools.islice(entries, chunk_size), key=key)
+            if not chunk:
+                break
+            if not runs and len(chunk) < chunk_size:
+                # Everything fitted in memory
+                yield from chunk
+                return
+            run = tempfile.TemporaryFile('w+', encoding='utf-8')
+            for entry in chunk:
+                run.write(json.dumps(entry) + '\n')
+            run.seek(0)
+            runs.append(run)
+        yield from heapq.merge(*((json.loads(line) for line in run) for run in runs), key=key)
+    finally:
+        for run in runs:
+            run.close()
+
+class ManifestWriter:
+    """Appends entries to a JSON-lines manifest and optionally a CSV file, flushing each one"""
     
-    print(f"Scanning for .bin files in: {root}")
+    def __init__(self, manifest_path, csv_path=None):
+        self.count = 0
+        self.total_size = 0
+        self._manifest = open(manifest_path, 'w', encoding='utf-8')
+        self._csv = open(csv_path, 'w', newline='', encoding='utf-8') if csv_path else None
+        self._writer = None
     
-    for file_path in root.rglob("*.bin"):
-        if file_path.is_file():
-            bin_files.append(file_path)
+    def write(self, entry):
+        self._manifest.write(json.dumps(entry) + '\n')
+        self._manifest.flush()
+        if self._csv:
+            if self._writer is None:
+                self._writer = csv.DictWriter(self._csv, fieldnames=entry.keys())
+                self._writer.writeheader()
+            self._writer.writerow(entry)
+            self._csv.flush()
+        self.count += 1
+        self.total_size += entry['size_bytes']
     
-    return bin_files
+    def close(self):
+        self._manifest.close()
+        if self._csv:
+            self._csv.close()
 
-def generate_checksums(root_path, output_format="both"):
-    """Main function to generate checksums"""
+def file_entry(file_path, relative_path, sha256, stat, logical, compressed):
+    """Manifest entry of one hashed file, from a single stat result"""
+    entry = {
+        'filename': file_path.name,
+        'relative_path': relative_path,
+        'full_path': str(file_path),
+        'size_bytes': stat.st_size,
+        'size_mb': round(stat.st_size / (1024 * 1024), 3),
+        'size_human': format_bytes(stat.st_size),
+        'sha256': sha256,
+        'last_modified': datetime.fromtimestamp(stat.st_mtime).strftime('%Y-%m-%d %H:%M:%S')
+    }
+    if logical:
+        entry['sha256_of'] = 'content' if compressed else 'file'
+    return entry
+
+def incomplete_manifest(root_path):
+    """.part path of the newest unfinished sqef_checksums_*.jsonl in root_path, or None"""
+    parts = sorted({p.with_suffix('.part') for pattern in ('*.jsonl.part', '*.jsonl.prev')
+                    for p in Path(root_path).glob('sqef_checksums_' + pattern)})
+    return parts[-1] if parts else None
+
+def previous_manifest(manifest_part):
+    """x.jsonl.prev next to x.jsonl.part"""
+    return manifest_part.with_name(manifest_part.name[:-len('.part')] + '.prev')
+
+def completed_entries(manifest_part):
+    """Entries already hashed by an interrupted run, in scan order
+
+    A run that was itself resumed leaves the entries it copied or hashed in
+    the .part file and the ones it had not reached yet in the .prev file;
+    both are in scan order, so they are merged into a new .prev.
+    """
+    previous = previous_manifest(manifest_part)
+    sources = [p for p in (previous, manifest_part) if p.exists()]
+    for source in sources:
+        repair_manifest(source)
+    
+    merged = previous.with_name(previous.name + '.tmp')
+    with open(merged, 'w', encoding='utf-8') as f:
+        last = None
+        for entry in heapq.merge(*(read_manifest(p) for p in sources),
+                                 key=lambda e: path_key(e['relative_path'])):
+            if entry['relative_path'] != last:
+                f.write(json.dumps(entry) + '\n')
+                last = entry['relative_path']
+    os.replace(merged, previous)
+    if manifest_part.exists():
+        manifest_part.unlink()
+    return previous
+
+def generate_checksums(root_path, output_format="both", logical=False, shard=None, partial_dir=None,
+                       resume=False):
+    """Main function to generate checksums
+
+    Entries are streamed to a JSON-lines manifest (and the CSV) as each file
+    is hashed, so memory stays flat and an interrupted run can be resumed;
+    the JSON and Markdown outputs are produced from the manifest at the end.
+
+    With shard=(i, N) only that shard's files are hashed, and their entries go
+    to a partial manifest in partial_dir (default: root_path) for a later merge.
+    """
     
     print("=" * 60)
     print("SQEF Test Files Checksum Generator")
     print("=" * 60)
     print(f"Root Path: {root_path}")
     print(f"Hash Algorithm: SHA256")
+    if logical:
+        print("Compressed files: hashing decompressed content")
     print()
     
     # Check if path exists
@@ -63,110 +277,205 @@ def generate_checksums(root_path, output_format="both"):
         print(f"Error: Path does not exist: {root_path}")
         return 1
     
-    # Find all .bin files
+    root = Path(root_path)
+    if shard:
+        if partial_dir:
+            Path(partial_dir).mkdir(parents=True, exist_ok=True)
+        manifest_path = Path(partial_dir or root_path) / f"sqef_checksums.shard-{shard[0]}-of-{shard[1]}.jsonl"
+        csv_path = None
+        manifest_part = manifest_path.with_name(manifest_path.name + '.part')
+        print(f"Shard {shard[0]}/{shard[1]}: partial manifest {manifest_path}\n")
+    else:
+        manifest_part = incomplete_manifest(root_path) if resume else None
+        if manifest_part:
+            timestamp = manifest_part.name[len('sqef_checksums_'):-len('.jsonl.part')]
+        else:
+            timestamp = generation_time().strftime("%Y%m%d_%H%M%S")
+        manifest_path = root / f"sqef_checksums_{timestamp}.jsonl"
+        manifest_part = manifest_path.with_name(manifest_path.name + '.part')
+        csv_path = root / f"sqef_checksums_{timestamp}.csv" if output_format in ["csv", "both"] else None
+    
+    # Entries of an interrupted run are copied instead of hashed again
+    done = iter(())
+    previous = None
+    if resume and (manifest_part.exists() or previous_manifest(manifest_part).exists()):
+        previous = completed_entries(manifest_part)
+        done = read_manifest(previous)
+        print(f"Resuming {manifest_path.name}\n")
+    next_done = next(done, None)
+    
     print("Scanning for .bin files...")
-    bin_files = scan_for_bin_files(root_path)
+    writer = ManifestWriter(manifest_part, csv_path and csv_path.with_name(csv_path.name + '.part'))
+    found = copied = 0
+    try:
+        prefix = os.path.join(str(root), '')
+        for file_path in iter_bin_files(root):
+            relative_path = str(file_path)[len(prefix):].replace('\\', '/')
+            if shard and not in_shard(relative_path, shard):
+                continue
+            found += 1
+            
+            key = path_key(relative_path)
+            while next_done is not None and path_key(next_done['relative_path']) < key:
+                next_done = next(done, None)
+            if next_done is not None and next_done['relative_path'] == relative_path:
+                writer.write(next_done)
+                next_done = next(done, None)
+                copied += 1
+                continue
+            
+            print(f"Processing [{found}]: {file_path.name}")
+            
+            # Calculate hash
+            compressed = file_path.suffix.lower() in COMPRESSED_SUFFIXES
+            sha256 = calculate_sha256(file_path, logical and compressed)
+            if not sha256:
+                continue
+            
+            # Get file info (one stat per file)
+            entry = file_entry(file_path, relative_path, sha256, file_path.stat(), logical, compressed)
+            writer.write(entry)
+            
+            # Console output
+            print(f"  ✓ SHA256: {sha256}")
+            print(f"    Size: {entry['size_human']}")
+            print()
+    finally:
+        writer.close()
     
-    if not bin_files:
+    if not found and shard:
+        # An empty partial still marks the shard as done for --merge
+        print("No .bin files in this shard")
+    elif not found:
         print("No .bin files found!")
+        for path in (manifest_part, csv_path and csv_path.with_name(csv_path.name + '.part')):
+            if path:
+                path.unlink()
         return 0
+    if copied:
+        print(f"Reused {copied} entries from the interrupted run")
     
-    print(f"Found {len(bin_files)} binary files\n")
+    # Only a finished manifest loses its .part suffix
+    os.replace(manifest_part, manifest_path)
+    if csv_path:
+        os.replace(csv_path.with_name(csv_path.name + '.part'), csv_path)
+        print(f"✓ CSV output saved to: {csv_path}")
+    if previous:
+        previous.unlink()
     
-    # Process each file
-    results = []
-    total_size = 0
+    if shard:
+        print(f"✓ Partial manifest saved to: {manifest_path} ({writer.count} files)")
+        return 0
+    print(f"✓ JSON-lines manifest saved to: {manifest_path}")
+    return write_outputs(root_path, manifest_path, timestamp, output_format)
+
+def merge_partial_manifests(root_path, output_format="both", partial_dir=None):
+    """Combine every shard's partial manifest into the CSV/JSON/Markdown outputs
+
+    Each partial is in scan order, so they are merged as streams; with the
+    same SOURCE_DATE_EPOCH the outputs are byte-identical to a single-node run.
+    """
+    partial_files = sorted(Path(partial_dir or root_path).glob(PARTIAL_PATTERN))
+    if not partial_files:
+        print(f"Error: No partial manifests ({PARTIAL_PATTERN}) found")
+        return 1
+    
+    shards = set()
+    counts = set()
+    for partial_file in partial_files:
+        index, count = (int(n) for n in re.findall(r'\d+', partial_file.name)[-2:])
+        shards.add(index)
+        counts.add(count)
+        print(f"Merging {partial_file.name}")
+    
+    if len(counts) != 1:
+        print(f"Error: Partial manifests come from different shard counts: {sorted(counts)}")
+        return 1
+    missing = sorted(set(range(1, counts.pop() + 1)) - shards)
+    if missing:
+        print(f"Error: Missing shards: {', '.join(str(i) for i in missing)}")
+        return 1
+    
+    timestamp = generation_time().strftime("%Y%m%d_%H%M%S")
     root = Path(root_path)
+    manifest_path = root / f"sqef_checksums_{timestamp}.jsonl"
+    csv_path = root / f"sqef_checksums_{timestamp}.csv" if output_format in ["csv", "both"] else None
     
-    for i, file_path in enumerate(bin_files, 1):
-        print(f"Processing [{i}/{len(bin_files)}]: {file_path.name}")
-        
-        # Calculate hash
-        sha256 = calculate_sha256(file_path)
-        if not sha256:
-            continue
-        
-        # Get file info
-        file_size = file_path.stat().st_size
-        total_size += file_size
-        
-        # Get relative path
-        try:
-            relative_path = file_path.relative_to(root)
-        except ValueError:
-            relative_path = file_path
-        
-        # Create result entry
-        result = {
-            'filename': file_path.name,
-            'relative_path': str(relative_path).replace('\\', '/'),
-            'full_path': str(file_path),
-            'size_bytes': file_size,
-            'size_mb': round(file_size / (1024 * 1024), 3),
-            'size_human': format_bytes(file_size),
-            'sha256': sha256,
-            'last_modified': datetime.fromtimestamp(file_path.stat().st_mtime).strftime('%Y-%m-%d %H:%M:%S')
-        }
-        
-        results.append(result)
-        
-        # Console output
-        print(f"  ✓ SHA256: {sha256}")
-        print(f"    Size: {result['size_human']}")
-        print()
+    writer = ManifestWriter(manifest_path, csv_path)
+    last = None
+    try:
+        for entry in heapq.merge(*(read_manifest(p) for p in partial_files),
+                                 key=lambda e: path_key(e['relative_path'])):
+            if entry['relative_path'] == last:
+                print(f"Error: {last} appears in more than one shard")
+                return 1
+            last = entry['relative_path']
+            writer.write(entry)
+    finally:
+        writer.close()
+    
+    print()
+    if csv_path:
+        print(f"✓ CSV output saved to: {csv_path}")
+    print(f"✓ JSON-lines manifest saved to: {manifest_path}")
+    return write_outputs(root_path, manifest_path, timestamp, output_format)
+
+def write_json_manifest(json_path, header, manifest_path):
+    """Write header plus a 'files' list read from the JSON-lines manifest
+
+    Produces the same bytes as json.dump(..., indent=2) of the whole document
+    without holding the file list in memory.
+    """
+    text = json.dumps({**header, 'files': []}, indent=2)
+    with open(json_path, 'w', encoding='utf-8') as f:
+        first = True
+        for entry in read_manifest(manifest_path):
+            if first:
+                f.write(text[:-len('[]\n}')] + '[\n')
+                first = False
+            else:
+                f.write(',\n')
+            f.write('\n'.join('    ' + line for line in json.dumps(entry, indent=2).split('\n')))
+        f.write(text if first else '\n  ]\n}')
+
+def write_outputs(root_path, manifest_path, timestamp, output_format="both"):
+    """Print the summary and write the JSON and Markdown outputs from the manifest"""
+    # One streaming pass for the totals
+    total_files = 0
+    total_size = 0
+    dir_groups = {}
+    for entry in read_manifest(manifest_path):
+        total_files += 1
+        total_size += entry['size_bytes']
+        dir_name = os.path.dirname(entry['relative_path']) or "root"
+        dir_groups[dir_name] = dir_groups.get(dir_name, 0) + 1
     
     # Summary
     print("=" * 60)
     print("Summary")
     print("=" * 60)
-    print(f"Total Files: {len(results)}")
+    print(f"Total Files: {total_files}")
     print(f"Total Size: {format_bytes(total_size)}")
     print()
     
-    # Group by directory
-    dir_groups = {}
-    for result in results:
-        dir_name = os.path.dirname(result['relative_path']) or "root"
-        if dir_name not in dir_groups:
-            dir_groups[dir_name] = 0
-        dir_groups[dir_name] += 1
-    
     print("Files by Directory:")
     for dir_name in sorted(dir_groups.keys()):
         print(f"  {dir_name}: {dir_groups[dir_name]} files")
     print()
     
-    # Generate timestamp for output files
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    
-    # Export to CSV
-    if output_format in ["csv", "both"]:
-        csv_path = os.path.join(root_path, f"sqef_checksums_{timestamp}.csv")
-        try:
-            with open(csv_path, 'w', newline='', encoding='utf-8') as f:
-                if results:
-                    writer = csv.DictWriter(f, fieldnames=results[0].keys())
-                    writer.writeheader()
-                    writer.writerows(results)
-            print(f"✓ CSV output saved to: {csv_path}")
-        except Exception as e:
-            print(f"Warning: Failed to save CSV: {e}")
+    generated = datetime.strptime(timestamp, "%Y%m%d_%H%M%S")
     
     # Export to JSON
     if output_format in ["json", "both"]:
         json_path = os.path.join(root_path, f"sqef_checksums_{timestamp}.json")
         try:
-            json_data = {
-                'generated': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            write_json_manifest(json_path, {
+                'generated': generated.strftime('%Y-%m-%d %H:%M:%S'),
                 'algorithm': 'SHA256',
                 'root_path': str(root_path),
-                'total_files': len(results),
-                'total_size_gb': round(total_size / (1024**3), 3),
-                'files': results
-            }
-            
-            with open(json_path, 'w', encoding='utf-8') as f:
-                json.dump(json_data, f, indent=2)
+                'total_files': total_files,
+                'total_size_gb': round(total_size / (1024**3), 3)
+            }, manifest_path)
             print(f"✓ JSON output saved to: {json_path}")
         except Exception as e:
             print(f"Warning: Failed to save JSON: {e}")
@@ -176,16 +485,16 @@ def generate_checksums(root_path, output_format="both"):
     try:
         with open(md_path, 'w', encoding='utf-8') as f:
             f.write("# SQEF Test Files Checksums\n\n")
-            f.write(f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
+            f.write(f"Generated: {generated.strftime('%Y-%m-%d %H:%M:%S')}\n")
             f.write(f"Algorithm: SHA256\n")
-            f.write(f"Total Files: {len(results)}\n")
+            f.write(f"Total Files: {total_files}\n")
             f.write(f"Total Size: {format_bytes(total_size)}\n\n")
             
             f.write("## File Checksums\n\n")
             f.write("| File | Size | SHA256 |\n")
             f.write("|------|------|--------|\n")
             
-            for result in sorted(results, key=lambda x: x['relative_path']):
+            for result in external_sort(read_manifest(manifest_path), key=lambda x: x['relative_path']):
                 f.write(f"| `{result['relative_path']}` | {result['size_human']} | `{result['sha256']}` |\n")
             
             f.write("\n## Verification\n\n")
@@ -214,6 +523,97 @@ def generate_checksums(root_path, output_format="both"):
     
     return 0
 
+def use_verification_tools():
+    """Make the ../verification-tools modules importable"""
+    tools = str(Path(__file__).resolve().parent.parent / 'verification-tools')
+    if tools not in sys.path:
+        sys.path.insert(0, tools)
+
+def profile_hashing(args):
+    """Instrument scanning, hashing and output writing (needs ../verification-tools)"""
+    use_verification_tools()
+    from sqef_profile import Profiler
+    
+    def count_hashed(profiler, call_args, result):
+        if result:
+            profiler.count('files_hashed')
+            profiler.count('bytes_hashed', os.path.getsize(call_args[0]))
+    
+    module = sys.modules[__name__]
+    profiler = Profiler('sqef_test_file_checksum_generator', args.profile_capture)
+    profiler.instrument_iterator(module, 'iter_bin_files', 'scan',
+                                 lambda profiler, call_args, path: profiler.count('files_scanned'))
+    profiler.instrument(module, 'calculate_sha256', 'hash', count_hashed, capture=True)
+    profiler.instrument(module, 'write_outputs', 'write_outputs')
+    return profiler
+
+def sample_checksums(root_path, seed=None, max_fraction=None):
+    """Spot-hash and sample every plain .bin file instead of hashing it (needs ../verification-tools)
+
+    Each file is read at stratified random offsets (a few percent of it) for a
+    bias/entropy estimate with confidence intervals and a spot-hash fingerprint;
+    the results go to sqef_spot_checksums_<timestamp>.json. Compressed files
+    cannot be read at random offsets and are skipped.
+    """
+    use_verification_tools()
+    from sqef_sampling import DEFAULT_MAX_FRACTION, sample_file, print_sample
+    
+    print("=" * 60)
+    print("SQEF Test Files Spot Checksums (sampled)")
+    print("=" * 60)
+    print(f"Root Path: {root_path}")
+    print()
+    
+    if not os.path.exists(root_path):
+        print(f"Error: Path does not exist: {root_path}")
+        return 1
+    
+    root = Path(root_path)
+    prefix = os.path.join(str(root), '')
+    entries = []
+    skipped = 0
+    for file_path in iter_bin_files(root):
+        if file_path.suffix.lower() in COMPRESSED_SUFFIXES:
+            skipped += 1
+            continue
+        try:
+            result = sample_file(file_path, max_fraction=max_fraction or DEFAULT_MAX_FRACTION, seed=seed)
+        except ValueError as e:
+            print(f"Skipping: {e}")
+            continue
+        result['relative_path'] = str(file_path)[len(prefix):].replace('\\', '/')
+        print_sample(result)
+        entries.append(result)
+    
+    if skipped:
+        print(f"Skipped {skipped} compressed files")
+    if not entries:
+        print("No .bin files found!")
+        return 0
+    
+    total_size = sum(e['size'] for e in entries)
+    total_read = sum(e['bytes_read'] for e in entries)
+    failed = [e['relative_path'] for e in entries if e['verdict'] != 'GO']
+    print(f"\nRead {format_bytes(total_read)} of {format_bytes(total_size)}, "
+          f"{len(entries) - len(failed)} GO / {len(failed)} NO-GO")
+    
+    timestamp = generation_time().strftime("%Y%m%d_%H%M%S")
+    json_path = root / f"sqef_spot_checksums_{timestamp}.json"
+    with open(json_path, 'w', encoding='utf-8') as f:
+        json.dump({
+            'generated': generation_time().strftime('%Y-%m-%d %H:%M:%S'),
+            'root_path': str(root_path),
+            'mode': 'sampled',
+            'seed': seed,
+            'total_files': len(entries),
+            'total_size_bytes': total_size,
+            'bytes_read': total_read,
+            'no_go_files': failed,
+            'files': entries
+        }, f, indent=2)
+    print(f"✓ Spot checksums saved to: {json_path}")
+    return 1 if failed else 0
+
 def main():
     """Main entry point"""
     parser = argparse.ArgumentParser(
@@ -226,6 +626,14 @@ Examples:
   %(prog)s --format json            # Output JSON only
   %(prog)s --format csv             # Output CSV only
   %(prog)s . --recursive            # Process recursively (default)
+  %(prog)s archive --logical        # Hash the content of .bin.gz/.xz/.zst files
+  %(prog)s --profile hash.prom      # Also write hashing throughput for Prometheus
+  %(prog)s /archive --shard 2/4     # Hash shard 2 of 4 into a partial manifest
+  %(prog)s /archive --merge         # Merge the partial manifests into the outputs
+  %(prog)s /archive --resume        # Continue an interrupted run from its .jsonl.part manifest
+  %(prog)s /archive --sample        # Pre-merge check: spot-hash and sample a few percent of each file
+
+Set SOURCE_DATE_EPOCH to make the 'generated' timestamps and file names reproducible.
         """
     )
     
@@ -235,14 +643,52 @@ Examples:
                        default='both', help='Output format (default: both)')
     parser.add_argument('--no-recursive', action='store_true',
                        help='Do not scan subdirectories')
+    parser.add_argument('--logical', action='store_true',
+                       help='Hash the decompressed content of compressed files (matches the original .bin)')
+    parser.add_argument('--resume', action='store_true',
+                       help='Continue the newest interrupted run instead of starting over')
+    parser.add_argument('--shard', metavar='i/N',
+                       help='Hash only shard i of N and write a partial manifest')
+    parser.add_argument('--merge', action='store_true',
+                       help='Merge the partial manifests into the CSV/JSON/Markdown outputs')
+    parser.add_argument('--partial-dir', help='Directory of partial manifests (default: root path)')
+    parser.add_argument('--sample', action='store_true',
+                       help='Sample each file at stratified offsets instead of hashing it completely')
+    parser.add_argument('--sample-fraction', type=float,
+                       help='Largest share of each file read with --sample (default: 0.05)')
+    parser.add_argument('--seed', type=int, help='Random seed of the --sample offsets')
+    use_verification_tools()
+    from sqef_profile import add_profile_arguments
+    add_profile_arguments(parser)
     
     args = parser.parse_args()
     
+    shard = None
+    if args.shard:
+        try:
+            shard = parse_shard(args.shard)
+        except ValueError as e:
+            parser.error(str(e))
+    if args.sample and (args.shard or args.merge or args.resume):
+        parser.error('--sample cannot be combined with --shard, --merge or --resume')
+    
     # Convert path to absolute
     root_path = os.path.abspath(args.path)
     
+    profiler = profile_hashing(args) if args.profile else None
+    
     # Run checksum generation
-    return generate_checksums(root_path, args.format)
+    if args.sample:
+        status = sample_checksums(root_path, args.seed, args.sample_fraction)
+    elif args.merge:
+        status = merge_partial_manifests(root_path, args.format, args.partial_dir)
+    else:
+        status = generate_checksums(root_path, args.format, args.logical, shard, args.partial_dir,
+                                    args.resume)
+    
+    if profiler:
+        profiler.finish(args.profile, args.profile_format)
+    return status
 
 if __name__ == '__main__':
     sys.exit(main())
\ No newline at end of file
@@ -6,14 +6,21 @@ Parses NIST SP 800-22 and SP 800-90B output files into structured formats
 
 import os
 import sys
-import re
 import json
 import csv
 import argparse
 from pathlib import Path
-from typing import Dict, List, Tuple, Optional, Any
+from typing import Dict, List, Tuple, Optional, Any, Iterable
 from datetime import datetime
 
+from sqef_report_io import (
+    NUMBER_RE, map_report, iter_entropy_sections, parse_entropy_section,
+    iter_report_lines, logical_name
+)
+from sqef_result_table import ResultTable, PASS_RATE_THRESHOLD
+from sqef_freq_analysis import analyze_freq_file
+from sqef_profile import add_profile_arguments, profiler_from_args, count_rows
+
 class NISTOutputParser:
     """Parse NIST test output files"""
     
@@ -31,73 +38,32 @@ class NISTOutputParser:
         }
         
         try:
-            with open(filepath, 'r', encoding='utf-8', errors='ignore') as f:
-                content = f.read()
+            table = ResultTable.from_report(filepath)
         except Exception as e:
             print(f"Error reading {filepath}: {e}")
             return results
-            
-        # Parse header information
-        lines = content.split('\n')
         
-        # Find test results section
-        in_results = False
-        test_count = 0
-        passed_count = 0
+        # Every row, including the repeated NonOverlappingTemplate,
+        # CumulativeSums and RandomExcursions instances
+        results['rows'] = table.to_records()
         
-        for line in lines:
-            # Skip empty lines and separators
-            if not line.strip() or line.startswith('-'):
-                continue
-                
-            # Look for test result lines (contain pass/total ratio)
-            if '/' in line and not line.startswith('RESULTS'):
-                parts = line.split()
-                if len(parts) >= 3:
-                    # Extract test name (last column)
-                    test_name = parts[-1]
-                    
-                    # Find the proportion (e.g., "96/100")
-                    for i, part in enumerate(parts):
-                        if '/' in part:
-                            try:
-                                passed, total = map(int, part.split('/'))
-                                
-                                # Find p-value (usually before proportion)
-                                p_value = None
-                                if i > 0:
-                                    try:
-                                        p_value = float(parts[i-1])
-                                    except:
-                                        pass
-                                
-                                # Check for uniformity warning (*)
-                                has_warning = '*' in line
-                                
-                                # Calculate pass rate
-                                pass_rate = passed / total
-                                
-                                # Store result
-                                results['tests'][test_name] = {
-                                    'passed': passed,
-                                    'total': total,
-                                    'pass_rate': pass_rate,
-                                    'percentage': f"{pass_rate*100:.2f}%",
-                                    'p_value': p_value,
-                                    'uniformity_warning': has_warning,
-                                    'meets_requirement': pass_rate >= 0.96 and not has_warning
-                                }
-                                
-                                test_count += 1
-                                if pass_rate >= 0.96:
-                                    passed_count += 1
-                                    
-                                break
-                            except:
-                                continue
+        # Legacy per-test-name view (last row of each name)
+        for row in results['rows']:
+            has_warning = row['uniformity_flag'] or row['proportion_flag']
+            results['tests'][row['test_name']] = {
+                'passed': row['passed'],
+                'total': row['total'],
+                'pass_rate': row['pass_rate'],
+                'percentage': row['percentage'],
+                'p_value': row['p_value'],
+                'uniformity_warning': has_warning,
+                'meets_requirement': row['meets_requirement']
+            }
         
         # Calculate summary statistics
+        test_count = len(table)
         if test_count > 0:
+            passed_count = int((table.pass_rate >= PASS_RATE_THRESHOLD).sum())
             overall_pass_rate = passed_count / test_count
             results['summary'] = {
                 'total_tests': test_count,
@@ -105,7 +71,7 @@ class NISTOutputParser:
                 'failed_tests': test_count - passed_count,
                 'overall_pass_rate': overall_pass_rate,
                 'percentage': f"{overall_pass_rate*100:.2f}%",
-                'meets_nist_requirement': overall_pass_rate >= 0.96
+                'meets_nist_requirement': overall_pass_rate >= PASS_RATE_THRESHOLD
             }
             
         return results
@@ -119,176 +85,165 @@ class NISTOutputParser:
         }
         
         try:
-            with open(filepath, 'r', encoding='utf-8', errors='ignore') as f:
-                content = f.read()
-        except Exception as e:
-            print(f"Error reading {filepath}: {e}")
-            return results
-            
-        # Split into sections by filename
-        sections = re.split(r'^(.*\.bin\s+\d+)$', content, flags=re.MULTILINE)
-        
-        for i in range(1, len(sections), 2):
-            if i + 1 < len(sections):
-                header = sections[i].strip()
-                section_content = sections[i + 1]
-                
-                # Parse filename and bits per symbol
-                match = re.match(r'(.+\.bin)\s+(\d+)', header)
-                if not match:
-                    continue
+            with map_report(filepath) as buf:
+                for filename, bits_per_symbol, start, end in iter_entropy_sections(buf):
+                    assessment = {
+                        'filename': filename,
+                        'bits_per_symbol': bits_per_symbol,
+                        'results': {}
+                    }
                     
-                filename = match.group(1)
-                bits_per_symbol = int(match.group(2))
-                
-                assessment = {
-                    'filename': filename,
-                    'bits_per_symbol': bits_per_symbol,
-                    'results': {}
-                }
-                
-                # Extract entropy values
-                h_orig = re.search(r'H_original:\s*(\d+\.?\d*)', section_content)
-                if h_orig:
-                    assessment['results']['h_original'] = float(h_orig.group(1))
+                    # Extract entropy values and test results
+                    values, verdicts = parse_entropy_section(buf, start, end)
+                    for key in ('h_original', 'h_bitstring'):
+                        if key in values:
+                            assessment['results'][key] = values[key]
+                    if 'min_entropy' in values:
+                        assessment['results']['min_entropy'] = values['min_entropy']
+                        assessment['results']['min_entropy_per_byte'] = values['min_entropy']
+                        assessment['results']['entropy_percentage'] = \
+                            (values['min_entropy'] / 8.0) * 100
                     
-                h_bit = re.search(r'H_bitstring:\s*(\d+\.?\d*)', section_content)
-                if h_bit:
-                    assessment['results']['h_bitstring'] = float(h_bit.group(1))
+                    for test_name, verdict in verdicts.items():
+                        assessment['results'][f'{test_name}_test'] = verdict
                     
-                min_h = re.search(r'min\([^)]+\):\s*(\d+\.?\d*)', section_content)
-                if min_h:
-                    assessment['results']['min_entropy'] = float(min_h.group(1))
-                    assessment['results']['min_entropy_per_byte'] = float(min_h.group(1))
-                    assessment['results']['entropy_percentage'] = \
-                        (float(min_h.group(1)) / 8.0) * 100
+                    # Determine overall status
+                    test_results = list(verdicts.values())
+                    if all(r == 'PASSED' for r in test_results):
+                        assessment['results']['overall_status'] = 'PASSED'
+                    elif any(r == 'FAILED' for r in test_results):
+                        assessment['results']['overall_status'] = 'FAILED'
+                    else:
+                        assessment['results']['overall_status'] = 'UNKNOWN'
                     
-                # Check test results
-                tests = {
-                    'chi_square': 'chi square tests',
-                    'iid_permutation': 'IID permutation tests',
-                    'lrs': 'length of longest repeated substring test'
-                }
-                
-                for test_name, pattern in tests.items():
-                    if f'Passed {pattern}' in section_content:
-                        assessment['results'][f'{test_name}_test'] = 'PASSED'
-                    elif f'Failed {pattern}' in section_content:
-                        assessment['results'][f'{test_name}_test'] = 'FAILED'
-                        
-                # Determine overall status
-                test_results = [v for k, v in assessment['results'].items() 
-                              if k.endswith('_test')]
-                if all(r == 'PASSED' for r in test_results):
-                    assessment['results']['overall_status'] = 'PASSED'
-                elif any(r == 'FAILED' for r in test_results):
-                    assessment['results']['overall_status'] = 'FAILED'
-                else:
-                    assessment['results']['overall_status'] = 'UNKNOWN'
-                    
-                results['assessments'].append(assessment)
+                    results['assessments'].append(assessment)
+        except Exception as e:
+            print(f"Error reading {filepath}: {e}")
+            return results
                 
         return results
     
     def parse_individual_test(self, filepath: Path) -> Dict[str, Any]:
         """Parse individual NIST test output file (e.g., frequency.txt)"""
+        stem = Path(logical_name(filepath)).stem
         result = {
             'file': str(filepath),
-            'test_name': filepath.stem,
+            'test_name': stem,
             'data': []
         }
         
+        # Parse based on test type
+        test_name = stem.lower()
+        
+        # freq.txt holds BITSREAD records rather than p-values
+        if test_name == 'freq':
+            return self._parse_bitsread_test(filepath, result)
+        
         try:
-            with open(filepath, 'r', encoding='utf-8', errors='ignore') as f:
-                lines = f.readlines()
+            with map_report(filepath) as buf:
+                lines = iter_report_lines(buf)
+                if 'frequency' in test_name:
+                    result['data'] = self._parse_frequency_test(lines)
+                elif 'runs' in test_name:
+                    result['data'] = self._parse_runs_test(lines)
+                elif 'template' in test_name:
+                    result['data'] = self._parse_template_test(lines)
+                else:
+                    result['data'] = self._parse_generic_test(lines)
         except Exception as e:
             print(f"Error reading {filepath}: {e}")
             return result
             
-        # Parse based on test type
-        test_name = filepath.stem.lower()
+        return result
+    
+    def _parse_bitsread_test(self, filepath: Path, result: Dict[str, Any]) -> Dict[str, Any]:
+        """Parse freq.txt BITSREAD records with per-sequence z-scores"""
+        try:
+            records, stats = analyze_freq_file(filepath)
+        except Exception as e:
+            print(f"Error reading {filepath}: {e}")
+            return result
         
-        if 'frequency' in test_name:
-            result['data'] = self._parse_frequency_test(lines)
-        elif 'runs' in test_name:
-            result['data'] = self._parse_runs_test(lines)
-        elif 'template' in test_name:
-            result['data'] = self._parse_template_test(lines)
-        else:
-            result['data'] = self._parse_generic_test(lines)
-            
+        z_scores = stats.pop('z_scores').tolist()
+        result['data'] = [
+            {'sequence': sequence, 'bits_read': bits_read, 'zeros': zeros,
+             'ones': ones, 'z_score': z_score}
+            for (sequence, bits_read, zeros, ones), z_score in zip(records.tolist(), z_scores)
+        ]
+        result['statistics'] = stats
         return result
     
-    def _parse_frequency_test(self, lines: List[str]) -> List[Dict]:
+    def _parse_frequency_test(self, lines: Iterable[bytes]) -> List[Dict]:
         """Parse frequency test output"""
         data = []
         for line in lines:
-            if line.strip() and not line.startswith('#'):
-                parts = line.split()
-                if len(parts) >= 3:
-                    try:
-                        data.append({
-                            'sample': int(parts[0]),
-                            'p_value': float(parts[1]),
-                            'result': parts[2] if len(parts) > 2 else 'UNKNOWN'
-                        })
-                    except:
-                        continue
+            parts = line.split()
+            if len(parts) >= 3:
+                try:
+                    data.append({
+                        'sample': int(parts[0]),
+                        'p_value': float(parts[1]),
+                        'result': parts[2].decode('utf-8', 'ignore')
+                    })
+                except ValueError:
+                    continue
         return data
     
-    def _parse_runs_test(self, lines: List[str]) -> List[Dict]:
+    def _parse_runs_test(self, lines: Iterable[bytes]) -> List[Dict]:
         """Parse runs test output"""
         return self._parse_frequency_test(lines)  # Similar format
     
-    def _parse_template_test(self, lines: List[str]) -> List[Dict]:
+    def _parse_template_test(self, lines: Iterable[bytes]) -> List[Dict]:
         """Parse template test output"""
         data = []
         for line in lines:
-            if line.strip() and not line.startswith('#'):
-                # Template tests may have multiple p-values per line
-                parts = line.split()
-                if len(parts) >= 2:
+            # Template tests may have multiple p-values per line
+            parts = line.split()
+            if len(parts) >= 2:
+                try:
+                    sample_data = {'sample': int(parts[0]), 'p_values': []}
+                except ValueError:
+                    continue
+                for part in parts[1:]:
                     try:
-                        sample_data = {'sample': int(parts[0]), 'p_values': []}
-                        for i in range(1, len(parts)):
-                            try:
-                                sample_data['p_values'].append(float(parts[i]))
-                            except:
-                                break
-                        if sample_data['p_values']:
-                            data.append(sample_data)
-                    except:
-                        continue
+                        sample_data['p_values'].append(float(part))
+                    except ValueError:
+                        break
+                if sample_data['p_values']:
+                    data.append(sample_data)
         return data
     
-    def _parse_generic_test(self, lines: List[str]) -> List[Dict]:
+    def _parse_generic_test(self, lines: Iterable[bytes]) -> List[Dict]:
         """Generic parser for test output"""
         data = []
         for line in lines:
-            if line.strip() and not line.startswith('#'):
-                # Try to extract numeric values
-                numbers = re.findall(r'\d+\.?\d*', line)
-                if numbers:
-                    data.append({'values': [float(n) for n in numbers]})
+            # Try to extract numeric values
+            numbers = NUMBER_RE.findall(line)
+            if numbers:
+                data.append({'values': [float(n) for n in numbers]})
         return data
     
     def export_to_csv(self, data: Dict, output_file: Path):
         """Export parsed data to CSV format"""
-        if 'tests' in data:  # SP 800-22 format
+        if 'rows' in data:  # SP 800-22 format, one line per report row
             with open(output_file, 'w', newline='') as f:
                 writer = csv.writer(f)
-                writer.writerow(['Test Name', 'Passed', 'Total', 'Pass Rate', 
-                               'P-Value', 'Meets Requirement'])
+                writer.writerow(['Test Name', 'Ordinal'] +
+                                [f'C{i}' for i in range(1, 11)] +
+                                ['P-Value', 'Passed', 'Total', 'Pass Rate',
+                                 'Uniformity Flag', 'Proportion Flag', 'Meets Requirement'])
                 
-                for test_name, result in data['tests'].items():
-                    writer.writerow([
-                        test_name,
-                        result['passed'],
-                        result['total'],
-                        result['pass_rate'],
-                        result.get('p_value', 'N/A'),
-                        'YES' if result['meets_requirement'] else 'NO'
-                    ])
+                for row in data['rows']:
+                    writer.writerow(
+                        [row['test_name'], row['ordinal']] + row['counts'] +
+                        [row['p_value'] if row['p_value'] is not None else 'N/A',
+                         row['passed'],
+                         row['total'],
+                         row['pass_rate'],
+                         'YES' if row['uniformity_flag'] else 'NO',
+                         'YES' if row['proportion_flag'] else 'NO',
+                         'YES' if row['meets_requirement'] else 'NO']
+                    )
                     
         elif 'assessments' in data:  # SP 800-90B format
             with open(output_file, 'w', newline='') as f:
@@ -307,6 +262,21 @@ class NISTOutputParser:
                         results.get('overall_status', 'N/A')
                     ])
 
+def profile_parsing(profiler):
+    """Instrument the parser methods, report reads and output writing"""
+    import sqef_freq_analysis
+    import sqef_result_table
+    
+    profiler.count_reads(sys.modules[__name__], sqef_result_table, sqef_freq_analysis)
+    profiler.instrument(NISTOutputParser, 'parse_sp800_22_report', 'parse_sp800_22',
+                        count_rows('rows'), capture=True)
+    profiler.instrument(NISTOutputParser, 'parse_sp800_90b_output', 'parse_sp800_90b',
+                        count_rows('assessments'), capture=True)
+    profiler.instrument(NISTOutputParser, 'parse_individual_test', 'parse_individual',
+                        count_rows('data'), capture=True)
+    profiler.instrument(NISTOutputParser, 'export_to_csv', 'write')
+    profiler.instrument(json, 'dumps', 'serialize')
+
 def main():
     """Main function"""
     parser = argparse.ArgumentParser(
@@ -322,6 +292,7 @@ Examples:
   %(prog)s finalAnalysisReport.txt
   %(prog)s --csv entropy-assessment-standard.txt
   %(prog)s --pretty sp800-22-results/*/finalAnalysisReport.txt
+  %(prog)s "sp800-22-results/*/*/finalAnalysisReport.txt" -o all.json --profile parse.prom
         """
     )
     
@@ -331,9 +302,14 @@ Examples:
                        default='json', help='Output format')
     parser.add_argument('--merge', action='store_true', 
                        help='Merge multiple files into single output')
+    add_profile_arguments(parser)
     
     args = parser.parse_args()
     
+    profiler = profiler_from_args(args, 'parse_nist_output')
+    if profiler:
+        profile_parsing(profiler)
+    
     nist_parser = NISTOutputParser()
     all_results = []
     
@@ -404,12 +380,12 @@ Examples:
                 print(f"  Pass Rate: {summary.get('percentage', 'N/A')}")
                 print(f"  Meets NIST: {'✅ YES' if summary.get('meets_nist_requirement') else '❌ NO'}")
                 
-            if 'tests' in result:
+            if 'rows' in result:
                 print(f"\nIndividual Tests:")
-                for test_name, test_result in result['tests'].items():
-                    status = '✅' if test_result['meets_requirement'] else '❌'
-                    print(f"  {status} {test_name}: {test_result['percentage']} "
-                          f"({test_result['passed']}/{test_result['total']})")
+                for row in result['rows']:
+                    status = '✅' if row['meets_requirement'] else '❌'
+                    print(f"  {status} {row['test_name']} #{row['ordinal']}: {row['percentage']} "
+                          f"({row['passed']}/{row['total']})")
                           
             if 'assessments' in result:
                 print(f"\nEntropy Assessments:")
@@ -421,6 +397,9 @@ Examples:
                     if 'overall_status' in results:
                         status = '✅' if results['overall_status'] == 'PASSED' else '❌'
                         print(f"    Status: {status} {results['overall_status']}")
+    
+    if profiler:
+        profiler.finish(args.profile, args.profile_format)
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+SQEF Autocorrelation Scan
+Bit and byte autocorrelation of master files for thousands of lags at once
+
+For lags k = 1..L the scan computes sum x[i] * x[i + k] over the whole file,
+with bits mapped to +/-1 and bytes centred on 127.5, by FFT correlation of
+chunks read through a memory map. Each chunk is extended by L values of the
+data that follows it, so pairs straddling a chunk boundary are counted exactly
+once; spans of chunks are processed in parallel and their sums added. Under
+independence each lag's normalised sum is a standard normal z-score, so the
+result is one lag -> z-score array per series, with lags beyond a Bonferroni
+bound flagged as outliers and a chi-square over all lags.
+"""
+
+import os
+import sys
+import json
+import argparse
+from pathlib import Path
+from statistics import NormalDist
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from sqef_key_files import scan_key_files
+from sqef_slice_provenance import is_master_file
+from sqef_test_summary_generator import get_configuration_from_path
+from sqef_uniformity_verifier import igamc
+
+DEFAULT_BIT_LAGS = 4096
+DEFAULT_BYTE_LAGS = 4096
+MIN_FFT_SIZE = 1 << 20
+SPAN_BYTES = 16 * 1024 * 1024
+MAX_REPORTED_OUTLIERS = 10
+
+# Variance of a uniform byte centred on 127.5: (256^2 - 1) / 12
+BYTE_VARIANCE = (256 * 256 - 1) / 12.0
+
+def fft_size_for(max_lag):
+    """FFT length for a scan up to max_lag: a power of two, at least 4 * max_lag"""
+    return max(MIN_FFT_SIZE, 1 << (4 * max_lag - 1).bit_length())
+
+def lag_sums(values, span, max_lag, fft_size):
+    """sum values[i] * values[i + k] over i < span, for k = 0..max_lag
+
+    values holds the span followed by up to max_lag more values. Products are
+    exact integers, so the FFT result is rounded back to int64.
+    """
+    head = np.fft.rfft(values[:span], fft_size)
+    extended = np.fft.rfft(values, fft_size)
+    sums = np.fft.irfft(head.conj() * extended, fft_size)[:max_lag + 1]
+    return np.rint(sums).astype(np.int64)
+
+def scan_span(filepath, start, stop, size, bit_lags, byte_lags):
+    """Bit and byte lag sums of the pairs starting in data[start:stop] within the
+    first size bytes; runs in a worker process
+    """
+    data = np.memmap(filepath, dtype=np.uint8, mode='r')[:size]
+    bit_sums = np.zeros(bit_lags + 1, dtype=np.int64)
+    byte_sums = np.zeros(byte_lags + 1, dtype=np.int64)
+    
+    if bit_lags:
+        fft_size = fft_size_for(bit_lags)
+        chunk_bytes = (fft_size - bit_lags) // 8
+        overlap_bytes = -(-bit_lags // 8)
+        for offset in range(start, stop, chunk_bytes):
+            end = min(offset + chunk_bytes, stop)
+            bits = np.unpackbits(np.asarray(data[offset:min(end + overlap_bytes, size)]))
+            span = (end - offset) * 8
+            values = bits[:span + bit_lags].astype(np.float64) * 2 - 1
+            bit_sums += lag_sums(values, span, bit_lags, fft_size)
+    
+    if byte_lags:
+        # 2 * byte - 255 keeps the centred values integral; sums are 4x the centred ones
+        fft_size = fft_size_for(byte_lags)
+        chunk_bytes = fft_size - byte_lags
+        for offset in range(start, stop, chunk_bytes):
+            end = min(offset + chunk_bytes, stop)
+            values = np.asarray(data[offset:min(end + byte_lags, size)]).astype(np.float64) * 2 - 255
+            byte_sums += lag_sums(values, end - offset, byte_lags, fft_size)
+    
+    return bit_sums, byte_sums
+
+def lag_statistics(z_scores, alpha):
+    """Chi-square over all lags and the lags beyond the Bonferroni-corrected bound"""
+    lags = len(z_scores)
+    z_critical = NormalDist().inv_cdf(1 - alpha / (2 * lags))
+    chi2 = float((z_scores ** 2).sum())
+    outliers = np.flatnonzero(np.abs(z_scores) > z_critical)
+    peak = int(np.argmax(np.abs(z_scores)))
+    return {
+        'max_lag': lags,
+        'max_abs_z': float(abs(z_scores[peak])),
+        'max_abs_z_lag': peak + 1,
+        'chi2': chi2,
+        'p_value': float(igamc(lags / 2.0, chi2 / 2.0)),
+        'z_critical': z_critical,
+        'outliers': [{'lag': int(i) + 1, 'z': float(z_scores[i])} for i in outliers]
+    }
+
+def scan_file(filepath, bit_lags=DEFAULT_BIT_LAGS, byte_lags=DEFAULT_BYTE_LAGS,
+              max_bytes=None, alpha=0.01, workers=None, pool=None):
+    """Autocorrelation z-scores of one file for bit lags 1..bit_lags and byte lags 1..byte_lags"""
+    filepath = Path(filepath)
+    size = filepath.stat().st_size
+    if max_bytes:
+        size = min(size, max_bytes)
+    bit_lags = min(bit_lags, size * 8 - 1)
+    byte_lags = min(byte_lags, size - 1)
+    if size < 2:
+        raise ValueError(f"{filepath} is too short for an autocorrelation scan")
+    
+    own_pool = pool is None
+    pool = pool or ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1)
+    try:
+        futures = [pool.submit(scan_span, str(filepath), start, min(start + SPAN_BYTES, size),
+                               size, bit_lags, byte_lags)
+                   for start in range(0, size, SPAN_BYTES)]
+        bit_sums = np.zeros(bit_lags + 1, dtype=np.int64)
+        byte_sums = np.zeros(byte_lags + 1, dtype=np.int64)
+        for future in futures:
+            bits, values = future.result()
+            bit_sums += bits
+            byte_sums += values
+    finally:
+        if own_pool:
+            pool.shutdown()
+    
+    result = {
+        'file': str(filepath),
+        'security_level': get_configuration_from_path(filepath)['security_level'],
+        'bytes_scanned': size
+    }
+    if bit_lags > 0:
+        pairs = size * 8 - np.arange(1, bit_lags + 1)
+        z_scores = bit_sums[1:] / np.sqrt(pairs)
+        result['bit'] = {**lag_statistics(z_scores, alpha), 'z_scores': z_scores}
+    if byte_lags > 0:
+        pairs = size - np.arange(1, byte_lags + 1)
+        z_scores = byte_sums[1:] / 4.0 / (BYTE_VARIANCE * np.sqrt(pairs))
+        result['byte'] = {**lag_statistics(z_scores, alpha), 'z_scores': z_scores}
+    return result
+
+def print_scan(result, alpha=0.01):
+    """Print one line per series and its flagged lags"""
+    print(f"\n📄 {Path(result['file']).name}: {result['bytes_scanned'] / (1024 * 1024):.0f}MB scanned")
+    for series in ('bit', 'byte'):
+        if series not in result:
+            continue
+        stats = result[series]
+        status = '⚠️ ' if stats['outliers'] or stats['p_value'] < alpha else '✅'
+        print(f"  {status} {series:<4} lags 1-{stats['max_lag']}: max |z| {stats['max_abs_z']:.2f} "
+              f"at lag {stats['max_abs_z_lag']} (bound {stats['z_critical']:.2f}), "
+              f"chi2 p={stats['p_value']:.4f}, {len(stats['outliers'])} outliers")
+        for outlier in stats['outliers'][:MAX_REPORTED_OUTLIERS]:
+            print(f"       lag {outlier['lag']}: z={outlier['z']:+.2f}")
+
+def failed(result, alpha=0.01):
+    """True when either series has outlier lags or fails the chi-square"""
+    return any(result[s]['outliers'] or result[s]['p_value'] < alpha
+               for s in ('bit', 'byte') if s in result)
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(
+        description='Scan master files for bit and byte autocorrelation over many lags',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  %(prog)s ../sample-outputs
+  %(prog)s --file sqef_master_512mb_STANDARD_for_slicing.bin --bit-lags 65536 --workers 16
+  %(prog)s ../sample-outputs --max-mb 64 --output autocorrelation.json
+        """
+    )
+    parser.add_argument('path', nargs='?', default=os.getcwd(),
+                        help='Root directory containing master .bin files (default: current directory)')
+    parser.add_argument('--file', action='append', help='Scan this file (repeatable)')
+    parser.add_argument('--bit-lags', type=int, default=DEFAULT_BIT_LAGS,
+                        help=f'Highest bit lag, 0 to skip (default: {DEFAULT_BIT_LAGS})')
+    parser.add_argument('--byte-lags', type=int, default=DEFAULT_BYTE_LAGS,
+                        help=f'Highest byte lag, 0 to skip (default: {DEFAULT_BYTE_LAGS})')
+    parser.add_argument('--max-mb', type=int, help='Only scan the first MB of each file')
+    parser.add_argument('--workers', type=int, help='Worker processes (default: all cores)')
+    parser.add_argument('--alpha', type=float, default=0.01,
+                        help='Significance level, Bonferroni-corrected across lags (default: 0.01)')
+    parser.add_argument('--output', '-o', help='Write lag -> z-score arrays as JSON')
+    
+    args = parser.parse_args()
+    
+    files = [Path(f) for f in args.file] if args.file else \
+        [p for p in scan_key_files(args.path) if is_master_file(p)]
+    if not files:
+        print("❌ No master files found!")
+        return 1
+    
+    max_bytes = args.max_mb * 1024 * 1024 if args.max_mb else None
+    results = []
+    with ProcessPoolExecutor(max_workers=args.workers or os.cpu_count() or 1) as pool:
+        for filepath in files:
+            try:
+                result = scan_file(filepath, args.bit_lags, args.byte_lags, max_bytes,
+                                   args.alpha, pool=pool)
+            except ValueError as e:
+                print(f"⚠️  Skipping {filepath.name}: {e}")
+                continue
+            print_scan(result, args.alpha)
+            results.append(result)
+    
+    if args.output:
+        for result in results:
+            for series in ('bit', 'byte'):
+                if series in result:
+                    result[series]['z_scores'] = np.round(result[series]['z_scores'], 4).tolist()
+        with open(args.output, 'w') as f:
+            json.dump({
+                'generated': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                'alpha': args.alpha,
+                'files': results
+            }, f, indent=2)
+        print(f"\n✅ Results saved to: {args.output}")
+    
+    return 1 if any(failed(r, args.alpha) for r in results) else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
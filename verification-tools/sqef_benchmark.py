@@ -0,0 +1,362 @@
+#!/usr/bin/env python3
+"""
+SQEF Benchmark
+Generates synthetic result trees shaped like the published results and times
+report parsing, summary generation and checksum hashing against them
+
+Each batch of 33 configurations mirrors sp800-22-results (3 security levels x
+11 sizes): a 188-row finalAnalysisReport.txt and a freq.txt per configuration,
+consolidated entropy-assessment files, and optionally sample .bin files.
+Timings are written as JSON and can be compared with an earlier baseline.
+"""
+
+import io
+import os
+import sys
+import json
+import time
+import shutil
+import platform
+import argparse
+import tempfile
+from pathlib import Path
+from datetime import datetime
+from contextlib import redirect_stdout
+
+import numpy as np
+
+from parse_nist_output import NISTOutputParser
+from sqef_freq_analysis import load_freq_records
+from sqef_report_io import glob_reports
+from sqef_test_summary_generator import process_all_directories
+from sqef_uniformity_verifier import uniformity_p_values
+
+# (results directory, file name token, keys per file) for each key size
+SIZE_DIRECTORIES = [
+    ('256-bit', '256bit', 500000),
+    ('512-bit', '512bit', 250000),
+    ('1024-bit', '1024bit', 125000),
+    ('2048-bit', '2048bit', 62500),
+    ('4096-bit', '4096bit', 31250),
+    ('1KB-blocks', '1kb', 16384),
+    ('4KB-blocks', '4kb', 4096),
+    ('1MB-blocks', '1mb', 16),
+    ('16MB-blocks', '16mb', 1),
+    ('256MB-blocks', '256mb', 1),
+    ('512MB-master', '512MB', 1)
+]
+
+LEVELS = [('STANDARD', 512), ('ENHANCED', 128), ('MAXIMUM', 32)]
+
+CONFIGURATIONS_PER_BATCH = len(SIZE_DIRECTORIES) * len(LEVELS)
+
+# The 188 rows of an assess report, in report order
+REPORT_TESTS = (
+    ['Frequency', 'BlockFrequency', 'CumulativeSums', 'CumulativeSums', 'Runs', 'LongestRun',
+     'Rank', 'FFT'] + ['NonOverlappingTemplate'] * 148 +
+    ['OverlappingTemplate', 'Universal', 'ApproximateEntropy'] +
+    ['RandomExcursions'] * 8 + ['RandomExcursionsVariant'] * 18 +
+    ['Serial', 'Serial', 'LinearComplexity']
+)
+
+SAMPLE_SIZE = 125
+EXCURSION_SAMPLE_SIZE = 69
+SEQUENCE_LENGTH = 1000000
+
+DEFAULT_CONFIGURATIONS = [33, 330]
+DEFAULT_TOLERANCE = 0.25
+
+REPORT_HEADER = """------------------------------------------------------------------------------
+RESULTS FOR THE UNIFORMITY OF P-VALUES AND THE PROPORTION OF PASSING SEQUENCES
+------------------------------------------------------------------------------
+   generator is <{generator}>
+------------------------------------------------------------------------------
+ C1  C2  C3  C4  C5  C6  C7  C8  C9 C10  P-VALUE  PROPORTION  STATISTICAL TEST
+------------------------------------------------------------------------------
+"""
+
+REPORT_FOOTER = """
+
+- - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
+The minimum pass rate for each statistical test with the exception of the
+random excursion (variant) test is approximately = 120 for a
+sample size = 125 binary sequences.
+
+The minimum pass rate for the random excursion (variant) test
+is approximately = 65 for a sample size = 69 binary sequences.
+
+For further guidelines construct a probability table using the MAPLE program
+provided in the addendum section of the documentation.
+- - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
+"""
+
+ENTROPY_SECTION = """{filename} 8
+Calculating baseline statistics...
+H_original: {h_original:.6f}
+H_bitstring: {h_bitstring:.6f}
+min(H_original, 8 X H_bitstring): {min_entropy:.6f}
+** Passed chi square tests
+
+** Passed length of longest repeated substring test
+
+** Passed IID permutation tests
+
+"""
+
+def key_file_name(token, keys, level):
+    return f"sqef_sliced_{token}_{keys}keys_from_{level}_master.bin"
+
+def synthetic_report(rng, generator):
+    """finalAnalysisReport.txt text with random but well-formed rows"""
+    totals = np.array([EXCURSION_SAMPLE_SIZE if name.startswith('RandomExcursions') else SAMPLE_SIZE
+                       for name in REPORT_TESTS])
+    counts = np.stack([rng.multinomial(n, [0.1] * 10) for n in totals])
+    p_values = uniformity_p_values(counts)
+    passed = rng.binomial(totals, 0.99)
+    lines = [REPORT_HEADER.format(generator=generator)]
+    for name, row, p_value, ok, total in zip(REPORT_TESTS, counts.tolist(), p_values.tolist(),
+                                             passed.tolist(), totals.tolist()):
+        flag = ' *' if p_value < 0.0001 else '  '
+        lines.append(''.join(f"{c:3d} " for c in row) +
+                     f" {p_value:.6f}{flag}{ok:5d}/{total:<5d}   {name}\n")
+    lines.append(REPORT_FOOTER)
+    return ''.join(lines)
+
+def synthetic_freq(rng, generator, sequences=SAMPLE_SIZE):
+    """freq.txt text with one BITSREAD record per sequence"""
+    ones = rng.binomial(SEQUENCE_LENGTH, 0.5, sequences)
+    rule = '_' * 80
+    return (f"{rule}\n\n\t\tFILE = {generator}\t\tALPHA = 0.0100\n{rule}\n\n" +
+            ''.join(f"\t\tBITSREAD = {SEQUENCE_LENGTH} 0s = {SEQUENCE_LENGTH - o} 1s = {o}\n"
+                    for o in ones.tolist()))
+
+def write_random_file(path, size, rng, chunk=16 * 1024 * 1024):
+    with open(path, 'wb') as f:
+        for start in range(0, size, chunk):
+            f.write(rng.bytes(min(chunk, size - start)))
+
+def generate_tree(root_path, configurations, bins=0, bin_bytes=0, seed=0):
+    """Write a synthetic result tree; returns its totals
+
+    Configurations beyond the first 33 go into batch-NNNN/ subdirectories,
+    which keeps every directory name parseable by get_configuration_from_path.
+    """
+    root_path = Path(root_path)
+    rng = np.random.default_rng(seed)
+    totals = {'configurations': 0, 'report_bytes': 0, 'freq_bytes': 0, 'bin_files': 0, 'bin_bytes': 0}
+    
+    for i in range(configurations):
+        batch, position = divmod(i, CONFIGURATIONS_PER_BATCH)
+        (level, ratio), (size_dir, token, keys) = \
+            LEVELS[position // len(SIZE_DIRECTORIES)], SIZE_DIRECTORIES[position % len(SIZE_DIRECTORIES)]
+        results_root = root_path / 'sp800-22-results'
+        if batch:
+            results_root = results_root / f"batch-{batch:04d}"
+        directory = results_root / f"test-results-{level}-{ratio}" / size_dir
+        directory.mkdir(parents=True, exist_ok=True)
+        
+        generator = f"C:\\NIST_SP_800-22\\{key_file_name(token, keys, level)}"
+        report = synthetic_report(rng, generator).encode()
+        freq = synthetic_freq(rng, generator).encode()
+        (directory / 'finalAnalysisReport.txt').write_bytes(report)
+        (directory / 'freq.txt').write_bytes(freq)
+        totals['configurations'] += 1
+        totals['report_bytes'] += len(report)
+        totals['freq_bytes'] += len(freq)
+    
+    entropy_dir = root_path / 'sp800-90b-results'
+    entropy_dir.mkdir(parents=True, exist_ok=True)
+    for level, _ in LEVELS:
+        h = rng.uniform(7.965, 7.975, len(SIZE_DIRECTORIES))
+        (entropy_dir / f"entropy-assessment-{level.lower()}.txt").write_text(''.join(
+            ENTROPY_SECTION.format(filename=key_file_name(token, keys, level.lower()), h_original=value,
+                                   h_bitstring=value / 8 + 0.0003, min_entropy=value)
+            for (_, token, keys), value in zip(SIZE_DIRECTORIES, h)))
+    
+    sample_dir = root_path / 'sample-outputs'
+    for i in range(bins):
+        level = LEVELS[i % len(LEVELS)][0]
+        _, token, keys = SIZE_DIRECTORIES[i // len(LEVELS) % len(SIZE_DIRECTORIES)]
+        directory = sample_dir / level / f"{i:04d}"
+        directory.mkdir(parents=True, exist_ok=True)
+        write_random_file(directory / key_file_name(token, keys, level), bin_bytes, rng)
+        totals['bin_files'] += 1
+        totals['bin_bytes'] += bin_bytes
+    
+    return totals
+
+def _best_time(function, repeat):
+    """Fastest of `repeat` runs of function(), with its output suppressed"""
+    best = None
+    for _ in range(repeat):
+        with redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            function()
+            elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def _checksum_generator():
+    """generate_checksums() from sample-outputs/sqef_test_file_checksum_generator.py"""
+    sample_outputs = str(Path(__file__).resolve().parent.parent / 'sample-outputs')
+    if sample_outputs not in sys.path:
+        sys.path.insert(0, sample_outputs)
+    from sqef_test_file_checksum_generator import generate_checksums
+    return generate_checksums
+
+def _clean_checksum_outputs(sample_dir):
+    for path in Path(sample_dir).glob('sqef_checksums_*'):
+        path.unlink()
+
+def run_benchmarks(root_path, totals, repeat=3):
+    """Time parsing, summary generation and hashing on a generated tree"""
+    root_path = Path(root_path)
+    reports = glob_reports(root_path / 'sp800-22-results', 'finalAnalysisReport.txt', recursive=True)
+    freq_files = glob_reports(root_path / 'sp800-22-results', 'freq.txt', recursive=True)
+    parser = NISTOutputParser()
+    mb = 1024 * 1024
+    results = {}
+    
+    seconds = _best_time(lambda: [parser.parse_sp800_22_report(f) for f in reports], repeat)
+    results['parse_reports'] = {
+        'seconds': seconds,
+        'files_per_second': len(reports) / seconds,
+        'mb_per_second': totals['report_bytes'] / mb / seconds
+    }
+    
+    seconds = _best_time(lambda: [load_freq_records(f) for f in freq_files], repeat)
+    results['parse_freq'] = {
+        'seconds': seconds,
+        'files_per_second': len(freq_files) / seconds,
+        'mb_per_second': totals['freq_bytes'] / mb / seconds
+    }
+    
+    seconds = _best_time(lambda: process_all_directories(root_path), repeat)
+    results['summary_generation'] = {
+        'seconds': seconds,
+        'configurations_per_second': totals['configurations'] / seconds
+    }
+    
+    if totals['bin_files']:
+        generate_checksums = _checksum_generator()
+        sample_dir = root_path / 'sample-outputs'
+        seconds = _best_time(lambda: generate_checksums(str(sample_dir), 'json'), repeat)
+        _clean_checksum_outputs(sample_dir)
+        results['checksum_hashing'] = {
+            'seconds': seconds,
+            'files_per_second': totals['bin_files'] / seconds,
+            'mb_per_second': totals['bin_bytes'] / mb / seconds
+        }
+    
+    return results
+
+# The throughput figure compared against a baseline for each benchmark
+RATE_KEYS = {
+    'parse_reports': 'files_per_second',
+    'parse_freq': 'files_per_second',
+    'summary_generation': 'configurations_per_second',
+    'checksum_hashing': 'mb_per_second'
+}
+
+def compare_with_baseline(results, baseline, tolerance=DEFAULT_TOLERANCE):
+    """(size, benchmark, baseline rate, rate, ratio) for every benchmark slower than tolerance allows"""
+    regressions = []
+    for size, benchmarks in results['runs'].items():
+        for name, values in benchmarks.items():
+            reference = baseline.get('runs', {}).get(size, {}).get(name)
+            if not reference or name not in RATE_KEYS:
+                continue
+            key = RATE_KEYS[name]
+            ratio = values[key] / reference[key]
+            if ratio < 1 - tolerance:
+                regressions.append((size, name, reference[key], values[key], ratio))
+    return regressions
+
+def environment():
+    return {
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'processor': platform.processor() or platform.machine(),
+        'cpu_count': os.cpu_count()
+    }
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(
+        description='Benchmark parsing, summary generation and hashing on synthetic SQEF result trees',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  %(prog)s
+  %(prog)s --configurations 33 1000 10000 --output benchmark.json
+  %(prog)s --bins 12 --bin-mb 64 --baseline benchmark.json
+  %(prog)s --configurations 330 --work-dir /tmp/sqef-bench --keep
+        """
+    )
+    parser.add_argument('--configurations', type=int, nargs='+', default=DEFAULT_CONFIGURATIONS,
+                        help=f'Tree sizes to benchmark (default: {" ".join(map(str, DEFAULT_CONFIGURATIONS))})')
+    parser.add_argument('--bins', type=int, default=0, help='Sample .bin files to hash per tree (default: 0)')
+    parser.add_argument('--bin-mb', type=float, default=16, help='Size of each sample .bin file in MB')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per benchmark; the fastest is kept')
+    parser.add_argument('--seed', type=int, default=0, help='Seed of the synthetic data')
+    parser.add_argument('--work-dir', help='Directory for the generated trees (default: a temporary directory)')
+    parser.add_argument('--keep', action='store_true', help='Keep the generated trees')
+    parser.add_argument('--output', '-o', help='Write results as JSON (usable as a baseline)')
+    parser.add_argument('--baseline', help='Compare against an earlier --output file')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help=f'Allowed throughput drop against the baseline (default: {DEFAULT_TOLERANCE})')
+    
+    args = parser.parse_args()
+    
+    work_dir = Path(args.work_dir or tempfile.mkdtemp(prefix='sqef-bench-'))
+    results = {
+        'generated': datetime.now().isoformat(),
+        'environment': environment(),
+        'parameters': {'bins': args.bins, 'bin_mb': args.bin_mb, 'repeat': args.repeat, 'seed': args.seed},
+        'runs': {}
+    }
+    
+    try:
+        for configurations in args.configurations:
+            tree = work_dir / f"tree-{configurations}"
+            if tree.exists():
+                shutil.rmtree(tree)
+            print(f"\n📂 Generating {configurations} configurations in {tree}")
+            start = time.perf_counter()
+            totals = generate_tree(tree, configurations, args.bins, int(args.bin_mb * 1024 * 1024), args.seed)
+            print(f"  Generated in {time.perf_counter() - start:.1f} s")
+            
+            runs = run_benchmarks(tree, totals, args.repeat)
+            runs['tree'] = totals
+            results['runs'][str(configurations)] = runs
+            for name, key in RATE_KEYS.items():
+                if name in runs:
+                    print(f"  📊 {name:<20} {runs[name]['seconds']:>8.3f} s  {runs[name][key]:>10.1f} {key.replace('_', ' ')}")
+            
+            if not args.keep:
+                shutil.rmtree(tree)
+    finally:
+        if not args.keep and not args.work_dir:
+            shutil.rmtree(work_dir, ignore_errors=True)
+    
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"\n✅ Results saved to: {args.output}")
+    
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare_with_baseline(results, baseline, args.tolerance)
+        if regressions:
+            print(f"\n❌ {len(regressions)} benchmarks slower than the baseline:")
+            for size, name, reference, value, ratio in regressions:
+                print(f"  {size} configurations, {name}: {reference:.1f} -> {value:.1f} ({ratio:.0%})")
+            return 1
+        print(f"\n✅ No regression beyond {args.tolerance:.0%} against {args.baseline}")
+    
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+"""
+SQEF Test Campaign
+Runs NIST SP 800-22 assess and SP 800-90B ea_iid for every (security level,
+key size) configuration on a bounded pool of subprocesses
+
+Each job gets its own working directory (assess writes to a fixed
+experiments/AlgorithmTesting tree relative to its working directory). As soon
+as both runs of a configuration finish, the reports are copied into
+sp800-22-results, its entropy section is written into the consolidated
+sp800-90b-results file, and its summary.json is regenerated.
+
+Tool locations come from --sts-path / --ea-path, or the NIST_STS_PATH and
+EA_PATH environment variables; either may point to a directory or directly to
+an executable, so a stand-in script can be used for testing.
+"""
+
+import os
+import sys
+import json
+import shutil
+import argparse
+import subprocess
+from pathlib import Path
+from datetime import datetime
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from sqef_report_io import ENTROPY_HEADER_RE
+from sqef_key_files import scan_key_files
+from sqef_test_summary_generator import (get_configuration_from_path, generate_summary,
+                                         master_summary_entry, write_master_summary)
+
+SEQUENCE_LENGTH = 1000000
+MAX_BITSTREAMS = 1000
+BITS_PER_SYMBOL = 8
+
+# Output directories assess expects under experiments/AlgorithmTesting
+STS_TEST_DIRECTORIES = [
+    'Frequency', 'BlockFrequency', 'CumulativeSums', 'Runs', 'LongestRun', 'Rank',
+    'FFT', 'NonOverlappingTemplate', 'OverlappingTemplate', 'Universal',
+    'ApproximateEntropy', 'RandomExcursions', 'RandomExcursionsVariant', 'Serial',
+    'LinearComplexity'
+]
+
+def resolve_tool(path, name):
+    """Executable for `name` given a directory or an executable path"""
+    # Absolute, since each run starts in its own working directory
+    if not path:
+        found = shutil.which(name)
+        return str(Path(found).resolve()) if found else None
+    path = Path(path)
+    if path.is_dir():
+        path = path / name
+    return str(path.resolve()) if path.exists() else None
+
+def plan_jobs(root_path, sample_root, levels=None, key_sizes=None, streams=None,
+              sequence_length=SEQUENCE_LENGTH):
+    """One job per .bin file below sample_root, with its results directory
+
+    Jobs are named <level>/<directory>/<file stem>. Files sharing a directory
+    get a results subdirectory per file stem, so their reports stay apart.
+    """
+    root_path = Path(root_path)
+    jobs = []
+    for bin_file in scan_key_files(sample_root):
+        config = get_configuration_from_path(bin_file)
+        if config['security_level'] == 'UNKNOWN':
+            continue
+        if levels and config['security_level'] not in levels:
+            continue
+        if key_sizes and config['key_size'] not in key_sizes:
+            continue
+        
+        ratio = config['expansion_ratio'].split(':')[-1]
+        level_dir = f"test-results-{config['security_level']}-{ratio}"
+        file_bits = bin_file.stat().st_size * 8
+        jobs.append({
+            'name': f"{config['security_level']}/{bin_file.parent.name}/{bin_file.stem}",
+            'bin_file': bin_file,
+            'results_dir': root_path / 'sp800-22-results' / level_dir / bin_file.parent.name,
+            'entropy_file': (root_path / 'sp800-90b-results' /
+                             f"entropy-assessment-{config['security_level'].lower()}.txt"),
+            'security_level': config['security_level'],
+            'key_size': config['key_size'],
+            'sequence_length': sequence_length,
+            'bitstreams': streams or min(MAX_BITSTREAMS, file_bits // sequence_length)
+        })
+    
+    shared = Counter(job['results_dir'] for job in jobs)
+    for job in jobs:
+        if shared[job['results_dir']] > 1:
+            job['results_dir'] = job['results_dir'] / job['bin_file'].stem
+    return jobs
+
+def prepare_sts_workdir(workdir, sts_executable):
+    """Create the directory layout assess writes into, with its templates"""
+    experiments = workdir / 'experiments' / 'AlgorithmTesting'
+    for test_dir in STS_TEST_DIRECTORIES:
+        (experiments / test_dir).mkdir(parents=True, exist_ok=True)
+    templates = Path(sts_executable).resolve().parent / 'templates'
+    link = workdir / 'templates'
+    if templates.is_dir() and not link.exists():
+        try:
+            link.symlink_to(templates, target_is_directory=True)
+        except OSError:
+            shutil.copytree(templates, link)
+    return experiments
+
+def run_assess(job, sts_executable, workdir, timeout=None):
+    """Run assess on one file; returns (returncode, finalAnalysisReport path, freq path)"""
+    experiments = prepare_sts_workdir(workdir, sts_executable)
+    # Input file (0), all tests (1), default parameters (0), bitstreams, binary format (1)
+    answers = f"0\n{job['bin_file'].resolve()}\n1\n0\n{job['bitstreams']}\n1\n"
+    with open(workdir / 'assess.log', 'w', encoding='utf-8') as log:
+        completed = subprocess.run([sts_executable, str(job['sequence_length'])],
+                                   input=answers, cwd=workdir, stdout=log,
+                                   stderr=subprocess.STDOUT, text=True, timeout=timeout)
+    return (completed.returncode, experiments / 'finalAnalysisReport.txt',
+            experiments / 'freq.txt')
+
+def run_ea_iid(job, ea_executable, workdir, bits_per_symbol=BITS_PER_SYMBOL, timeout=None):
+    """Run ea_iid on one file; returns (returncode, stdout text)"""
+    completed = subprocess.run([ea_executable, str(job['bin_file'].resolve()), str(bits_per_symbol)],
+                               cwd=workdir, capture_output=True, text=True, timeout=timeout)
+    with open(workdir / 'ea_iid.log', 'w', encoding='utf-8') as log:
+        log.write(completed.stdout)
+        log.write(completed.stderr)
+    return completed.returncode, completed.stdout
+
+def replace_entropy_section(entropy_file, filename, bits_per_symbol, output):
+    """Write one file's ea_iid output into a consolidated entropy file
+
+    An existing section for the same file is replaced in place, otherwise
+    the section is appended.
+    """
+    entropy_file = Path(entropy_file)
+    entropy_file.parent.mkdir(parents=True, exist_ok=True)
+    content = entropy_file.read_bytes() if entropy_file.exists() else b''
+    section = f"{filename} {bits_per_symbol}\n{output.rstrip()}\n\n".encode('utf-8')
+    
+    headers = list(ENTROPY_HEADER_RE.finditer(content))
+    for i, m in enumerate(headers):
+        if m.group(1).strip().decode('utf-8', 'ignore').lower() == filename.lower():
+            end = headers[i + 1].start() if i + 1 < len(headers) else len(content)
+            content = content[:m.start()] + section + content[end:]
+            break
+    else:
+        if content and not content.endswith(b'\n'):
+            content += b'\n'
+        content += section
+    
+    entropy_file.write_bytes(content)
+
+def collect_master_entries(root_path):
+    """MASTER_SUMMARY.json entries for every summary.json below sp800-22-results"""
+    root_path = Path(root_path)
+    entries = {}
+    for summary_file in sorted((root_path / 'sp800-22-results').rglob('summary.json')):
+        with open(summary_file, 'r', encoding='utf-8') as f:
+            entries[str(summary_file.parent.relative_to(root_path))] = master_summary_entry(json.load(f))
+    return entries
+
+def run_campaign(root_path, jobs, sts_executable=None, ea_executable=None, work_root=None,
+                 workers=None, bits_per_symbol=BITS_PER_SYMBOL, timeout=None):
+    """Run every job on a bounded pool, summarising each configuration as it completes"""
+    root_path = Path(root_path)
+    work_root = Path(work_root or root_path / 'campaign-work')
+    workers = workers or os.cpu_count() or 1
+    
+    pending = {job['name']: set() for job in jobs}
+    outcome = {job['name']: {'assess': None, 'ea_iid': None} for job in jobs}
+    by_name = {job['name']: job for job in jobs}
+    
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {}
+        for job in jobs:
+            workdir = work_root / job['name']
+            if sts_executable:
+                assess_dir = workdir / 'assess'
+                assess_dir.mkdir(parents=True, exist_ok=True)
+                futures[pool.submit(run_assess, job, sts_executable, assess_dir, timeout)] = \
+                    (job['name'], 'assess')
+                pending[job['name']].add('assess')
+            if ea_executable:
+                ea_dir = workdir / 'ea_iid'
+                ea_dir.mkdir(parents=True, exist_ok=True)
+                futures[pool.submit(run_ea_iid, job, ea_executable, ea_dir, bits_per_symbol,
+                                    timeout)] = (job['name'], 'ea_iid')
+                pending[job['name']].add('ea_iid')
+        
+        print(f"🚀 {len(futures)} runs for {len(jobs)} configurations on {workers} workers")
+        
+        for future in as_completed(futures):
+            name, tool = futures[future]
+            job = by_name[name]
+            try:
+                result = future.result()
+            except Exception as e:
+                print(f"  ❌ {name} {tool}: {e}")
+                result = None
+            
+            if tool == 'assess' and result:
+                returncode, report, freq = result
+                if returncode == 0 and report.exists():
+                    job['results_dir'].mkdir(parents=True, exist_ok=True)
+                    shutil.copyfile(report, job['results_dir'] / 'finalAnalysisReport.txt')
+                    if freq.exists():
+                        shutil.copyfile(freq, job['results_dir'] / 'freq.txt')
+                    outcome[name]['assess'] = 'OK'
+                else:
+                    print(f"  ❌ {name} assess exited with {returncode}")
+                    outcome[name]['assess'] = 'FAILED'
+            elif tool == 'ea_iid' and result:
+                returncode, output = result
+                if returncode == 0 and output.strip():
+                    replace_entropy_section(job['entropy_file'], job['bin_file'].name,
+                                            bits_per_symbol, output)
+                    outcome[name]['ea_iid'] = 'OK'
+                else:
+                    print(f"  ❌ {name} ea_iid exited with {returncode}")
+                    outcome[name]['ea_iid'] = 'FAILED'
+            else:
+                outcome[name][tool] = 'FAILED'
+            
+            pending[name].discard(tool)
+            if not pending[name]:
+                states = [outcome[name][t] for t in ('assess', 'ea_iid') if outcome[name][t]]
+                if 'FAILED' not in states:
+                    status, verb = '✅', 'finished'
+                elif 'OK' in states:
+                    status, verb = '⚠️ ', 'finished with failures'
+                else:
+                    status, verb = '❌', 'failed'
+                print(f"  {status} {name} {verb} (assess: {outcome[name]['assess']}, "
+                      f"ea_iid: {outcome[name]['ea_iid']})")
+                if (job['results_dir'] / 'finalAnalysisReport.txt').exists():
+                    summary = generate_summary(job['results_dir'], root_path)
+                    outcome[name]['summary'] = 'OK' if summary else 'FAILED'
+    
+    entries = collect_master_entries(root_path)
+    if entries:
+        write_master_summary(root_path, entries)
+    return outcome
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(
+        description='Run NIST assess and ea_iid across all SQEF configurations in parallel',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  NIST_STS_PATH=~/sts-2.1.2 EA_PATH=~/SP800-90B_EntropyAssessment/cpp %(prog)s ..
+  %(prog)s .. --level ENHANCED --key-size 256-bit --workers 4
+  %(prog)s .. --sts-path ~/sts-2.1.2/assess --no-entropy --dry-run
+        """
+    )
+    parser.add_argument('root', help='Repository root (contains sample-outputs and sp800-22-results)')
+    parser.add_argument('--samples', help='Directory of .bin files (default: <root>/sample-outputs)')
+    parser.add_argument('--sts-path', default=os.environ.get('NIST_STS_PATH'),
+                        help='assess executable or its directory (default: $NIST_STS_PATH)')
+    parser.add_argument('--ea-path', default=os.environ.get('EA_PATH'),
+                        help='ea_iid executable or its directory (default: $EA_PATH)')
+    parser.add_argument('--level', action='append', help='Only this security level (repeatable)')
+    parser.add_argument('--key-size', action='append', help='Only this key size (repeatable)')
+    parser.add_argument('--streams', type=int, help='Bitstreams per assess run (default: file size, max 1000)')
+    parser.add_argument('--sequence-length', type=int, default=SEQUENCE_LENGTH,
+                        help=f'Bits per sequence (default: {SEQUENCE_LENGTH})')
+    parser.add_argument('--bits-per-symbol', type=int, default=BITS_PER_SYMBOL,
+                        help=f'ea_iid bits per symbol (default: {BITS_PER_SYMBOL})')
+    parser.add_argument('--workers', type=int, help='Concurrent runs (default: all cores)')
+    parser.add_argument('--work-dir', help='Per-job working directories (default: <root>/campaign-work)')
+    parser.add_argument('--timeout', type=float, help='Per-run timeout in seconds')
+    parser.add_argument('--no-assess', action='store_true', help='Skip SP 800-22 assess runs')
+    parser.add_argument('--no-entropy', action='store_true', help='Skip SP 800-90B ea_iid runs')
+    parser.add_argument('--dry-run', action='store_true', help='List the planned jobs and exit')
+    
+    args = parser.parse_args()
+    
+    root_path = Path(args.root).resolve()
+    sample_root = Path(args.samples) if args.samples else root_path / 'sample-outputs'
+    levels = {l.upper() for l in args.level} if args.level else None
+    jobs = plan_jobs(root_path, sample_root, levels, set(args.key_size or []) or None,
+                     args.streams, args.sequence_length)
+    if not jobs:
+        print(f"❌ No .bin files found in {sample_root}")
+        return 1
+    
+    sts_executable = None if args.no_assess else resolve_tool(args.sts_path, 'assess')
+    ea_executable = None if args.no_entropy else resolve_tool(args.ea_path, 'ea_iid')
+    if not args.no_assess and not sts_executable:
+        print("❌ assess not found (set NIST_STS_PATH or --sts-path, or pass --no-assess)")
+        return 1
+    if not args.no_entropy and not ea_executable:
+        print("❌ ea_iid not found (set EA_PATH or --ea-path, or pass --no-entropy)")
+        return 1
+    
+    if args.dry_run:
+        width = max(len(job['name']) for job in jobs)
+        for job in jobs:
+            print(f"{job['name']:<{width}} {job['bitstreams']:>5} x {job['sequence_length']} bits  "
+                  f"{job['bin_file']} -> {job['results_dir']}")
+        return 0
+    
+    started = datetime.now()
+    outcome = run_campaign(root_path, jobs, sts_executable, ea_executable, args.work_dir,
+                           args.workers, args.bits_per_symbol, args.timeout)
+    failed = [name for name, o in outcome.items()
+              if 'FAILED' in (o['assess'], o['ea_iid'], o.get('summary'))]
+    
+    print(f"\n📊 {len(outcome) - len(failed)}/{len(outcome)} configurations completed "
+          f"in {(datetime.now() - started).total_seconds():.1f}s")
+    for name in failed:
+        print(f"  ❌ {name}")
+    return 1 if failed else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
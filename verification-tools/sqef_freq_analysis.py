@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+SQEF freq.txt Analyzer
+Streams the BITSREAD records of NIST freq.txt files into NumPy arrays
+Computes per-sequence z-scores and aggregate bias, per file or across a whole results tree
+"""
+
+import sys
+import json
+import argparse
+from pathlib import Path
+
+import numpy as np
+
+from sqef_report_io import map_report, iter_bitsread_records, glob_reports
+from sqef_test_summary_generator import get_configuration_from_path
+
+# One typed record per BITSREAD line
+FREQ_RECORD_DTYPE = np.dtype([
+    ('sequence', np.int32),
+    ('bits_read', np.int64),
+    ('zeros', np.int64),
+    ('ones', np.int64)
+])
+
+# Two-sided critical value of the frequency test at ALPHA = 0.01
+FREQ_Z_CRITICAL = 2.5758293035489
+
+def iter_freq_records(buf):
+    """Yield (sequence, bits_read, zeros, ones) for each BITSREAD line"""
+    for sequence, (bits_read, zeros, ones) in enumerate(iter_bitsread_records(buf), 1):
+        yield sequence, bits_read, zeros, ones
+
+def load_freq_records(filepath):
+    """Load every complete BITSREAD record of a freq.txt file into a structured array
+
+    No count is passed to fromiter: a truncated last line counts as a BITSREAD
+    token but yields no record.
+    """
+    with map_report(filepath) as buf:
+        return np.fromiter(iter_freq_records(buf), dtype=FREQ_RECORD_DTYPE)
+
+def freq_statistics(records):
+    """Vectorized bias statistics for an array of FREQ_RECORD_DTYPE records"""
+    bits = records['bits_read'].astype(np.float64)
+    excess = (records['ones'] - records['zeros']).astype(np.float64)
+    z_scores = excess / np.sqrt(bits)
+    
+    total_bits = int(records['bits_read'].sum())
+    total_ones = int(records['ones'].sum())
+    sequences = len(records)
+    
+    stats = {
+        'sequences': sequences,
+        'total_bits': total_bits,
+        'total_ones': total_ones,
+        'total_zeros': int(records['zeros'].sum()),
+        'z_scores': z_scores
+    }
+    if sequences and total_bits:
+        stats.update({
+            'ones_fraction': total_ones / total_bits,
+            'aggregate_bias': total_ones / total_bits - 0.5,
+            'aggregate_z_score': float(excess.sum() / np.sqrt(total_bits)),
+            'mean_z_score': float(z_scores.mean()),
+            'z_score_variance': float(z_scores.var()),
+            'max_abs_z_score': float(np.abs(z_scores).max()),
+            'sequences_beyond_alpha': int((np.abs(z_scores) > FREQ_Z_CRITICAL).sum())
+        })
+    return stats
+
+def analyze_freq_file(filepath):
+    """Parse one freq.txt and return its records and statistics"""
+    records = load_freq_records(filepath)
+    return records, freq_statistics(records)
+
+def aggregate_freq_tree(root_path):
+    """Aggregate every freq.txt below root_path in one pass
+
+    All records are concatenated into a single array; per-configuration
+    sums are then taken with one bincount per column.
+    """
+    root_path = Path(root_path)
+    freq_files = glob_reports(root_path, 'freq.txt', recursive=True)
+    
+    arrays = []
+    for freq_file in freq_files:
+        arrays.append(load_freq_records(freq_file))
+    
+    if not arrays:
+        return {}
+    
+    records = np.concatenate(arrays)
+    config_index = np.repeat(np.arange(len(arrays)), [len(a) for a in arrays])
+    n_configs = len(arrays)
+    
+    bits = np.bincount(config_index, weights=records['bits_read'], minlength=n_configs)
+    ones = np.bincount(config_index, weights=records['ones'], minlength=n_configs)
+    excess = np.bincount(config_index, weights=records['ones'] - records['zeros'],
+                         minlength=n_configs)
+    sequences = np.bincount(config_index, minlength=n_configs)
+    
+    z_scores = (records['ones'] - records['zeros']) / np.sqrt(records['bits_read'])
+    beyond = np.bincount(config_index, weights=np.abs(z_scores) > FREQ_Z_CRITICAL,
+                         minlength=n_configs)
+    max_abs_z = np.zeros(n_configs)
+    np.maximum.at(max_abs_z, config_index, np.abs(z_scores))
+    
+    with np.errstate(divide='ignore', invalid='ignore'):
+        bias = ones / bits - 0.5
+        aggregate_z = excess / np.sqrt(bits)
+    
+    results = {}
+    for i, freq_file in enumerate(freq_files):
+        directory = freq_file.parent
+        results[str(directory.relative_to(root_path))] = {
+            'configuration': get_configuration_from_path(directory),
+            'sequences': int(sequences[i]),
+            'total_bits': int(bits[i]),
+            'aggregate_bias': float(bias[i]),
+            'aggregate_z_score': float(aggregate_z[i]),
+            'max_abs_z_score': float(max_abs_z[i]),
+            'sequences_beyond_alpha': int(beyond[i])
+        }
+    
+    total_bits = int(records['bits_read'].sum())
+    results['ALL'] = {
+        'configurations': n_configs,
+        'sequences': len(records),
+        'total_bits': total_bits,
+        'aggregate_bias': float(records['ones'].sum() / total_bits - 0.5),
+        'aggregate_z_score': float((records['ones'] - records['zeros']).sum() / np.sqrt(total_bits)),
+        'max_abs_z_score': float(np.abs(z_scores).max()),
+        'sequences_beyond_alpha': int((np.abs(z_scores) > FREQ_Z_CRITICAL).sum())
+    }
+    return results
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(
+        description='Analyze NIST freq.txt BITSREAD records',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  %(prog)s ../sp800-22-results/test-results-STANDARD-512/256MB-blocks/freq.txt
+  %(prog)s --tree ..
+  %(prog)s --tree .. --output freq_bias.json
+        """
+    )
+    
+    parser.add_argument('paths', nargs='+', help='freq.txt files, or root directories with --tree')
+    parser.add_argument('--tree', action='store_true',
+                        help='Aggregate every freq.txt below the given root directories')
+    parser.add_argument('--output', '-o', help='Write JSON results to this file')
+    
+    args = parser.parse_args()
+    
+    all_results = {}
+    for path in args.paths:
+        path = Path(path)
+        if not path.exists():
+            print(f"Warning: File not found: {path}", file=sys.stderr)
+            continue
+        
+        if args.tree:
+            results = aggregate_freq_tree(path)
+            for name, stats in results.items():
+                print(f"  {name}: {stats['sequences']} sequences, "
+                      f"bias={stats['aggregate_bias']:+.3e}, "
+                      f"z={stats['aggregate_z_score']:+.3f}, "
+                      f"beyond alpha={stats['sequences_beyond_alpha']}")
+            all_results[str(path)] = results
+        else:
+            records, stats = analyze_freq_file(path)
+            print(f"📄 {path}: {stats['sequences']} sequences")
+            if stats['sequences']:
+                print(f"  Aggregate bias: {stats['aggregate_bias']:+.3e} "
+                      f"(z={stats['aggregate_z_score']:+.3f})")
+                print(f"  Max |z|: {stats['max_abs_z_score']:.3f}, "
+                      f"beyond alpha: {stats['sequences_beyond_alpha']}")
+            stats['z_scores'] = stats['z_scores'].tolist()
+            all_results[str(path)] = stats
+    
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(all_results, f, indent=2)
+        print(f"✅ Results saved to: {args.output}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+"""
+SQEF Streaming Health Tests
+SP 800-90B continuous health tests over a live byte stream (stdin, FIFO or file)
+
+Runs the Repetition Count Test (4.4.1) and Adaptive Proportion Test (4.4.2) on
+8-bit samples, read in large buffers and evaluated with vectorized window
+operations. Alarms are reported as they occur, together with periodic
+throughput, bit bias and byte-histogram metrics.
+"""
+
+import sys
+import json
+import math
+import time
+import argparse
+
+import numpy as np
+
+# False-positive probability per test (SP 800-90B recommends 2^-20 to 2^-40)
+DEFAULT_ALPHA = 2.0 ** -20
+DEFAULT_MIN_ENTROPY = 7.9
+APT_WINDOW = 512
+BUFFER_SIZE = 16 * 1024 * 1024
+MAX_REPORTED_ALARMS = 100
+
+# Bytes per buffer that go into the (comparatively slow) byte histogram
+HISTOGRAM_SAMPLE = 1024 * 1024
+
+def rct_cutoff(min_entropy, alpha=DEFAULT_ALPHA):
+    """Repetition Count Test cutoff C = 1 + ceil(-log2(alpha) / H)"""
+    return 1 + math.ceil(-math.log2(alpha) / min_entropy)
+
+def apt_cutoff(min_entropy, window=APT_WINDOW, alpha=DEFAULT_ALPHA):
+    """Adaptive Proportion Test cutoff: 1 + CRITBINOM(W, 2^-H, 1 - alpha)"""
+    p = 2.0 ** -min_entropy
+    cumulative = 0.0
+    for k in range(window + 1):
+        cumulative += math.exp(math.lgamma(window + 1) - math.lgamma(k + 1)
+                               - math.lgamma(window - k + 1)
+                               + k * math.log(p) + (window - k) * math.log1p(-p))
+        if cumulative >= 1.0 - alpha:
+            return 1 + k
+    return window
+
+class HealthMonitor:
+    """Incremental RCT/APT state over consecutive buffers of 8-bit samples"""
+    
+    def __init__(self, min_entropy=DEFAULT_MIN_ENTROPY, alpha=DEFAULT_ALPHA, window=APT_WINDOW):
+        self.rct_cutoff = rct_cutoff(min_entropy, alpha)
+        self.apt_cutoff = apt_cutoff(min_entropy, window, alpha)
+        self.min_entropy = min_entropy
+        self.alpha = alpha
+        self.window = window
+        self.position = 0
+        self.last_value = None
+        self.last_run = 0
+        self.apt_pending = np.empty(0, dtype=np.uint8)
+        self.max_run = 0
+        self.max_apt_count = 0
+        self.rct_alarms = []
+        self.apt_alarms = []
+        self.rct_alarm_count = 0
+        self.apt_alarm_count = 0
+    
+    def update(self, samples):
+        """Run both tests on the next buffer; returns (new RCT alarms, new APT alarms)"""
+        if not len(samples):
+            return [], []
+        rct = self._repetition_count(samples)
+        apt = self._adaptive_proportion(samples)
+        self.position += len(samples)
+        return rct, apt
+    
+    def _repetition_count(self, samples):
+        # Positions j whose sample equals the one before it (across the buffer boundary too)
+        repeats = np.flatnonzero(samples[1:] == samples[:-1]) + 1
+        if self.last_value is not None and samples[0] == self.last_value:
+            repeats = np.concatenate(([0], repeats))
+        
+        alarms = []
+        if len(repeats):
+            # Group consecutive repeat positions into runs [starts, ends]
+            breaks = np.flatnonzero(np.diff(repeats) != 1)
+            starts = repeats[np.concatenate(([0], breaks + 1))]
+            ends = repeats[np.concatenate((breaks, [len(repeats) - 1]))]
+            lengths = ends - starts + 2
+            carried = 0
+            if starts[0] == 0:
+                carried = self.last_run - 1
+                lengths[0] += carried
+            self.max_run = max(self.max_run, int(lengths.max()))
+            
+            # Position at which each long run reaches the cutoff
+            for start, length in zip(starts[lengths >= self.rct_cutoff],
+                                     lengths[lengths >= self.rct_cutoff]):
+                if start == 0 and carried + 1 >= self.rct_cutoff:
+                    continue  # already reported in the previous buffer
+                offset = self.rct_cutoff - 2 - (carried if start == 0 else 0)
+                alarms.append((self.position + int(start) + max(offset, 0), int(length)))
+            self.last_run = int(lengths[-1]) if ends[-1] == len(samples) - 1 else 1
+        else:
+            self.last_run = 1
+        self.last_value = samples[-1]
+        self._record(alarms, self.rct_alarms)
+        self.rct_alarm_count += len(alarms)
+        return alarms
+    
+    def _adaptive_proportion(self, samples):
+        # Non-overlapping windows; a partial window is carried to the next buffer
+        base = self.position - len(self.apt_pending)
+        if len(self.apt_pending):
+            samples = np.concatenate((self.apt_pending, samples))
+        complete = len(samples) // self.window * self.window
+        self.apt_pending = samples[complete:].copy()
+        if not complete:
+            return []
+        
+        windows = samples[:complete].reshape(-1, self.window)
+        matches = windows == windows[:, :1]
+        if self.window % 8 == 0 and self.window // 8 <= 255:
+            # Sum the 0/1 bytes eight at a time as uint64 lanes (each byte lane
+            # stays below 256), then add the eight lanes of each window
+            lanes = matches.view(np.uint64).sum(axis=1)
+            counts = lanes.view(np.uint8).reshape(-1, 8).sum(axis=1, dtype=np.int64)
+        else:
+            counts = np.count_nonzero(matches, axis=1)
+        self.max_apt_count = max(self.max_apt_count, int(counts.max()))
+        
+        failing = np.flatnonzero(counts >= self.apt_cutoff)
+        alarms = [(base + int(w) * self.window, int(counts[w])) for w in failing]
+        self._record(alarms, self.apt_alarms)
+        self.apt_alarm_count += len(alarms)
+        return alarms
+    
+    @staticmethod
+    def _record(alarms, store):
+        store.extend(alarms[:MAX_REPORTED_ALARMS - len(store)])
+
+def stuck_source_check(min_entropy=DEFAULT_MIN_ENTROPY, alpha=DEFAULT_ALPHA, window=APT_WINDOW):
+    """Known-answer check: a constant source must raise RCT alarms and an APT alarm in every window
+
+    Returns a list of problems (empty when both tests catch the stuck source).
+    """
+    monitor = HealthMonitor(min_entropy, alpha, window)
+    windows = 8
+    monitor.update(np.zeros(window * windows, dtype=np.uint8))
+    problems = []
+    if not monitor.rct_alarm_count:
+        problems.append(f"RCT raised no alarm (max run {monitor.max_run}, cutoff {monitor.rct_cutoff})")
+    if monitor.apt_alarm_count != windows or monitor.max_apt_count != window:
+        problems.append(f"APT raised {monitor.apt_alarm_count}/{windows} alarms "
+                        f"(max count {monitor.max_apt_count}, expected {window})")
+    return problems
+
+def byte_statistics(samples, histogram_bytes=HISTOGRAM_SAMPLE):
+    """(set bits, byte histogram) of one buffer
+
+    Bits are counted over the whole buffer; the byte histogram, which costs
+    far more per byte, only over its first histogram_bytes.
+    """
+    if len(samples) % 8 == 0 and hasattr(np, 'bitwise_count'):
+        ones = int(np.bitwise_count(samples.view(np.uint64)).sum())
+    else:
+        ones = int(np.unpackbits(samples).sum())
+    return ones, np.bincount(samples[:histogram_bytes], minlength=256)
+
+def iter_buffers(stream, buffer_size=BUFFER_SIZE):
+    """Yield uint8 arrays filled from a binary stream with readinto (no per-read allocation)"""
+    buffer = bytearray(buffer_size)
+    view = memoryview(buffer)
+    filled = 0
+    while True:
+        read = stream.readinto(view[filled:])
+        if not read:
+            break
+        filled += read
+        # Pipes return short reads; hand out full buffers where possible
+        if filled == buffer_size:
+            yield np.frombuffer(buffer, dtype=np.uint8)
+            filled = 0
+    if filled:
+        yield np.frombuffer(buffer, dtype=np.uint8, count=filled)
+
+def monitor_stream(stream, monitor, interval=5.0, max_bytes=None, buffer_size=BUFFER_SIZE,
+                   quiet=False):
+    """Feed a stream through a HealthMonitor, printing alarms and periodic metrics"""
+    started = last_report = time.perf_counter()
+    interval_bytes = 0
+    interval_ones = 0
+    interval_histogram = np.zeros(256, dtype=np.int64)
+    total_ones = 0
+    
+    for samples in iter_buffers(stream, buffer_size):
+        if max_bytes is not None and monitor.position + len(samples) > max_bytes:
+            samples = samples[:max_bytes - monitor.position]
+            if not len(samples):
+                break
+        rct, apt = monitor.update(samples)
+        for position, length in rct:
+            print(f"⚠️  RCT alarm at byte {position}: run of {length} identical samples "
+                  f"(cutoff {monitor.rct_cutoff})")
+        for position, count in apt:
+            print(f"⚠️  APT alarm at byte {position}: {count}/{monitor.window} "
+                  f"(cutoff {monitor.apt_cutoff})")
+        
+        ones, histogram = byte_statistics(samples)
+        interval_bytes += len(samples)
+        interval_ones += ones
+        total_ones += ones
+        interval_histogram += histogram
+        
+        now = time.perf_counter()
+        if not quiet and now - last_report >= interval:
+            expected = interval_histogram.sum() / 256
+            chi_square = float(((interval_histogram - expected) ** 2).sum() / expected)
+            print(f"📊 {monitor.position / 1e6:,.0f} MB  "
+                  f"{interval_bytes / (now - last_report) / 1e6:,.1f} MB/s  "
+                  f"ones {interval_ones / (8 * interval_bytes):.6f}  "
+                  f"byte chi2 {chi_square:.1f} (255 df)  "
+                  f"max run {monitor.max_run}  max APT {monitor.max_apt_count}")
+            last_report = now
+            interval_bytes = interval_ones = 0
+            interval_histogram[:] = 0
+        
+        if max_bytes is not None and monitor.position >= max_bytes:
+            break
+    
+    elapsed = time.perf_counter() - started
+    return {
+        'bytes': monitor.position,
+        'seconds': elapsed,
+        'throughput_mb_s': monitor.position / elapsed / 1e6 if elapsed else None,
+        'ones_fraction': total_ones / (8 * monitor.position) if monitor.position else None,
+        'rct_cutoff': monitor.rct_cutoff,
+        'apt_cutoff': monitor.apt_cutoff,
+        'apt_window': monitor.window,
+        'max_run': monitor.max_run,
+        'max_apt_count': monitor.max_apt_count,
+        'rct_alarms': monitor.rct_alarm_count,
+        'apt_alarms': monitor.apt_alarm_count,
+        # Alarms expected from ideal data at the assessed entropy (false positives)
+        'expected_rct_alarms': monitor.position * 2.0 ** (-monitor.min_entropy * (monitor.rct_cutoff - 1)),
+        'expected_apt_alarms': monitor.position / monitor.window * monitor.alpha,
+        'rct_alarm_positions': monitor.rct_alarms,
+        'apt_alarm_positions': monitor.apt_alarms
+    }
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(
+        description='Run SP 800-90B continuous health tests over a byte stream',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  sqef_generator | %(prog)s -
+  %(prog)s /tmp/sqef.fifo --min-entropy 7.97 --interval 1
+  %(prog)s --self-test --window 1024
+  %(prog)s ../sample-outputs/sample-outputs-STANDARD-512/512MB-master/sqef_master_512mb_STANDARD_for_slicing.bin
+        """
+    )
+    parser.add_argument('input', nargs='?', default='-', help='File or FIFO to read, or - for stdin (default)')
+    parser.add_argument('--min-entropy', type=float, default=DEFAULT_MIN_ENTROPY,
+                        help=f'Assessed min-entropy in bits per byte (default: {DEFAULT_MIN_ENTROPY})')
+    parser.add_argument('--alpha', type=float, default=DEFAULT_ALPHA,
+                        help='False-positive probability per test (default: 2^-20)')
+    parser.add_argument('--window', type=int, default=APT_WINDOW,
+                        help=f'Adaptive proportion window (default: {APT_WINDOW})')
+    parser.add_argument('--interval', type=float, default=5.0, help='Seconds between metric lines')
+    parser.add_argument('--buffer-mb', type=int, default=BUFFER_SIZE // (1024 * 1024),
+                        help='Read buffer size in MB (default: 16)')
+    parser.add_argument('--max-bytes', type=int, help='Stop after this many bytes')
+    parser.add_argument('--quiet', '-q', action='store_true', help='Only print alarms and the final result')
+    parser.add_argument('--output', '-o', help='Write the final result as JSON')
+    parser.add_argument('--self-test', action='store_true',
+                        help='Only run the stuck-source known-answer check')
+    
+    args = parser.parse_args()
+    if args.max_bytes is not None and args.max_bytes < 1:
+        parser.error('--max-bytes must be at least 1')
+    
+    # Start-up check: both tests must fire on a constant source
+    problems = stuck_source_check(args.min_entropy, args.alpha, args.window)
+    for problem in problems:
+        print(f"❌ Self-test: {problem}", file=sys.stderr)
+    if problems:
+        return 2
+    if args.self_test:
+        print("✅ Self-test: RCT and APT alarm on a stuck source")
+        return 0
+    
+    monitor = HealthMonitor(args.min_entropy, args.alpha, args.window)
+    print(f"RCT cutoff {monitor.rct_cutoff}, APT cutoff {monitor.apt_cutoff}/{monitor.window} "
+          f"(H={args.min_entropy} bits/byte, alpha={args.alpha:.3g})", file=sys.stderr)
+    
+    buffer_size = args.buffer_mb * 1024 * 1024
+    try:
+        if args.input == '-':
+            result = monitor_stream(sys.stdin.buffer, monitor, args.interval, args.max_bytes,
+                                    buffer_size, args.quiet)
+        else:
+            with open(args.input, 'rb', buffering=0) as stream:
+                result = monitor_stream(stream, monitor, args.interval, args.max_bytes,
+                                        buffer_size, args.quiet)
+    except KeyboardInterrupt:
+        result = None
+    
+    if result is None:
+        print("\n⚠️  Interrupted")
+        return 130
+    
+    status = '✅' if not (result['rct_alarms'] or result['apt_alarms']) else '❌'
+    print(f"\n{status} {result['bytes']:,} bytes in {result['seconds']:.2f}s "
+          f"({result['throughput_mb_s'] or 0:,.1f} MB/s): "
+          f"{result['rct_alarms']} RCT alarms (expected {result['expected_rct_alarms']:.1f}), "
+          f"{result['apt_alarms']} APT alarms (expected {result['expected_apt_alarms']:.1f}), "
+          f"max run {result['max_run']}, max APT count {result['max_apt_count']}")
+    
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(result, f, indent=2)
+        print(f"✅ Results saved to: {args.output}")
+    
+    return 1 if result['rct_alarms'] or result['apt_alarms'] else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
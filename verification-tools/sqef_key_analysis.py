@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+SQEF Key Analysis
+Bit-position bias and pairwise Hamming distances of sliced key files
+
+A key file is treated as a (keys x key_bytes) matrix. Per-bit bias comes from
+column-wise popcounts over chunks of keys; Hamming distances are computed for
+consecutive keys and for randomly sampled pairs with word-parallel XOR and
+popcount, so memory stays bounded by the chunk size.
+"""
+
+import os
+import sys
+import json
+import math
+import argparse
+from pathlib import Path
+from datetime import datetime
+
+import numpy as np
+
+from sqef_key_files import get_key_file_info, open_key_matrix, scan_key_files
+from sqef_uniformity_verifier import ALPHA, igamc
+
+# Largest key analysed per bit position (4KB keys = 32768 positions)
+MAX_KEY_BYTES = 4096
+CHUNK_BYTES = 64 * 1024 * 1024
+DEFAULT_PAIRS = 1000000
+
+_BYTE_POPCOUNT = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+def popcount_rows(words):
+    """Number of set bits in each row of a 2-D unsigned integer array"""
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(words).sum(axis=1, dtype=np.int64)
+    return _BYTE_POPCOUNT[words.view(np.uint8)].sum(axis=1, dtype=np.int64)
+
+def as_words(keys):
+    """View a (n, key_bytes) uint8 batch as 64-bit words when the key size allows it"""
+    keys = np.ascontiguousarray(keys)
+    if keys.shape[1] % 8 == 0:
+        return keys.view(np.uint64)
+    return keys
+
+def chunk_keys(key_bytes):
+    """Keys per chunk so that one chunk stays within CHUNK_BYTES"""
+    return max(1, CHUNK_BYTES // max(key_bytes, 1))
+
+def bit_position_counts(matrix):
+    """Number of keys with each bit position set (MSB-first within each byte)"""
+    num_keys, key_bytes = matrix.shape
+    ones = np.zeros((key_bytes, 8), dtype=np.int64)
+    step = chunk_keys(key_bytes)
+    for start in range(0, num_keys, step):
+        chunk = np.asarray(matrix[start:start + step])
+        for bit in range(8):
+            ones[:, bit] += ((chunk >> (7 - bit)) & 1).sum(axis=0, dtype=np.int64)
+    return ones.ravel()
+
+def bit_bias_statistics(ones, num_keys, alpha=ALPHA):
+    """Per-position z-scores and overall chi-square for the column popcounts"""
+    key_bits = len(ones)
+    z_scores = (ones - num_keys / 2.0) / math.sqrt(num_keys / 4.0)
+    p_values = np.array([math.erfc(abs(z) / math.sqrt(2)) for z in z_scores])
+    chi_square = float((z_scores ** 2).sum())
+    worst = int(np.argmax(np.abs(z_scores)))
+    
+    return {
+        'key_bits': key_bits,
+        'num_keys': int(num_keys),
+        'mean_ones_fraction': float(ones.sum() / (key_bits * num_keys)),
+        'max_abs_bias': float(np.abs(ones / num_keys - 0.5).max()),
+        'worst_position': worst,
+        'worst_z_score': float(z_scores[worst]),
+        'worst_p_value': float(p_values[worst]),
+        # Bonferroni-corrected significance of the most biased position
+        'worst_p_value_corrected': float(min(1.0, p_values[worst] * key_bits)),
+        'positions_below_alpha': int((p_values < alpha).sum()),
+        'expected_positions_below_alpha': alpha * key_bits,
+        'chi_square': chi_square,
+        'chi_square_p_value': float(igamc(key_bits / 2.0, chi_square / 2.0)),
+        'passed': bool(p_values[worst] * key_bits >= alpha)
+    }
+
+def consecutive_distances(matrix):
+    """Histogram of Hamming distances between each key and the next one"""
+    num_keys, key_bytes = matrix.shape
+    histogram = np.zeros(key_bytes * 8 + 1, dtype=np.int64)
+    step = chunk_keys(key_bytes)
+    for start in range(0, num_keys - 1, step):
+        stop = min(start + step + 1, num_keys)
+        words = as_words(matrix[start:stop])
+        histogram += np.bincount(popcount_rows(words[1:] ^ words[:-1]),
+                                 minlength=len(histogram))
+    return histogram
+
+def sampled_distances(matrix, pairs=DEFAULT_PAIRS, seed=None):
+    """Histogram of Hamming distances between randomly sampled distinct key pairs"""
+    num_keys, key_bytes = matrix.shape
+    histogram = np.zeros(key_bytes * 8 + 1, dtype=np.int64)
+    if num_keys < 2:
+        return histogram
+    rng = np.random.default_rng(seed)
+    step = chunk_keys(2 * key_bytes)
+    
+    remaining = pairs
+    while remaining > 0:
+        batch = min(step, remaining)
+        first = np.sort(rng.integers(0, num_keys, size=batch))
+        # A non-zero offset guarantees the two keys of a pair differ
+        second = (first + rng.integers(1, num_keys, size=batch)) % num_keys
+        a = as_words(matrix[first])
+        b = as_words(matrix[second])
+        histogram += np.bincount(popcount_rows(a ^ b), minlength=len(histogram))
+        remaining -= batch
+    return histogram
+
+def distance_statistics(histogram):
+    """Compare a Hamming-distance histogram with Binomial(key_bits, 1/2)"""
+    key_bits = len(histogram) - 1
+    pairs = int(histogram.sum())
+    if pairs == 0:
+        return {'pairs': 0}
+    distances = np.arange(len(histogram))
+    mean = float((histogram * distances).sum() / pairs)
+    variance = float((histogram * (distances - mean) ** 2).sum() / pairs)
+    expected_mean = key_bits / 2.0
+    expected_std = math.sqrt(key_bits) / 2.0
+    observed = np.flatnonzero(histogram)
+    mean_z = (mean - expected_mean) / (expected_std / math.sqrt(pairs))
+    
+    return {
+        'pairs': pairs,
+        'mean': mean,
+        'expected_mean': expected_mean,
+        'std': math.sqrt(variance),
+        'expected_std': expected_std,
+        'mean_z_score': mean_z,
+        'mean_p_value': math.erfc(abs(mean_z) / math.sqrt(2)),
+        'min_distance': int(observed[0]),
+        'max_distance': int(observed[-1]),
+        'zero_distance_pairs': int(histogram[0])
+    }
+
+def analyze_key_file(filepath, key_bytes=None, pairs=DEFAULT_PAIRS, seed=None, alpha=ALPHA):
+    """Bias and Hamming-distance analysis of one key file"""
+    matrix = open_key_matrix(filepath, key_bytes)
+    num_keys, key_bytes = matrix.shape
+    
+    bias = bit_bias_statistics(bit_position_counts(matrix), num_keys, alpha)
+    consecutive = distance_statistics(consecutive_distances(matrix))
+    sampled = distance_statistics(sampled_distances(matrix, pairs, seed))
+    
+    return {
+        'file': str(filepath),
+        'key_bytes': key_bytes,
+        'num_keys': num_keys,
+        'bit_bias': bias,
+        'consecutive_distances': consecutive,
+        'sampled_distances': sampled
+    }
+
+def print_analysis(result):
+    """Print a short analysis summary for one key file"""
+    bias = result['bit_bias']
+    status = '✅' if bias['passed'] else '❌'
+    print(f"  {status} bit bias: worst position {bias['worst_position']} "
+          f"(z={bias['worst_z_score']:+.2f}, corrected p={bias['worst_p_value_corrected']:.4f}), "
+          f"{bias['positions_below_alpha']} positions below alpha "
+          f"(expected {bias['expected_positions_below_alpha']:.1f}), "
+          f"chi-square p={bias['chi_square_p_value']:.4f}")
+    for label in ('consecutive_distances', 'sampled_distances'):
+        d = result[label]
+        if not d['pairs']:
+            continue
+        print(f"  📊 {label.replace('_', ' ')}: {d['pairs']} pairs, "
+              f"mean {d['mean']:.2f} (expected {d['expected_mean']:.1f}), "
+              f"std {d['std']:.2f} (expected {d['expected_std']:.2f}), "
+              f"range {d['min_distance']}-{d['max_distance']}")
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(
+        description='Analyse bit-position bias and Hamming distances of SQEF key files',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  %(prog)s ../sample-outputs
+  %(prog)s --file sqef_sliced_256bit_500000keys_from_STANDARD_master.bin
+  %(prog)s ../sample-outputs --pairs 5000000 --seed 2025 --output key_analysis.json
+        """
+    )
+    parser.add_argument('path', nargs='?', default=os.getcwd(),
+                        help='Root directory containing .bin files (default: current directory)')
+    parser.add_argument('--file', help='Analyse a single key file instead of a tree')
+    parser.add_argument('--pairs', type=int, default=DEFAULT_PAIRS,
+                        help=f'Randomly sampled key pairs per file (default: {DEFAULT_PAIRS})')
+    parser.add_argument('--seed', type=int, help='Random seed for reproducible sampling')
+    parser.add_argument('--alpha', type=float, default=ALPHA, help='Significance level (default: 0.01)')
+    parser.add_argument('--output', '-o', help='Write results as JSON')
+    
+    args = parser.parse_args()
+    
+    files = [Path(args.file)] if args.file else scan_key_files(args.path)
+    if not files:
+        print("No .bin files found!")
+        return 0
+    
+    results = []
+    for file_path in files:
+        info = get_key_file_info(file_path)
+        if info['key_bytes'] > MAX_KEY_BYTES or info['num_keys'] < 2:
+            print(f"Skipping: {file_path.name} ({info['num_keys']} keys of {info['key_bytes']} bytes)")
+            continue
+        print(f"Analysing: {file_path.name} ({info['num_keys']} keys of {info['key_bytes']} bytes)")
+        result = analyze_key_file(file_path, info['key_bytes'], args.pairs, args.seed, args.alpha)
+        result.update({k: info[k] for k in ('security_level', 'key_size')})
+        print_analysis(result)
+        results.append(result)
+    
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({
+                'generated': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                'alpha': args.alpha,
+                'files': results
+            }, f, indent=2)
+        print(f"\n✅ Results saved to: {args.output}")
+    
+    return 0 if all(r['bit_bias']['passed'] for r in results) else 1
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+SQEF Key Collision Checker
+Finds repeated keys in sliced key files
+
+Each key is reduced to a 64-bit prefix plus its index. Prefixes are sorted
+(in memory, or hash-partitioned into spill files for files larger than the
+memory budget); only keys whose prefixes collide are compared in full
+through the memory map.
+"""
+
+import os
+import sys
+import json
+import tempfile
+import argparse
+from pathlib import Path
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from sqef_key_files import get_key_file_info, open_key_matrix, scan_key_files
+
+PREFIX_RECORD_DTYPE = np.dtype([('prefix', '>u8'), ('index', '<u8')])
+DEFAULT_MEMORY_LIMIT = 512 * 1024 * 1024
+CHUNK_KEYS = 1 << 20
+MAX_REPORTED_GROUPS = 20
+
+def key_prefixes(matrix, start, stop):
+    """Big-endian 64-bit prefix of keys [start, stop); short keys are zero-padded"""
+    width = min(8, matrix.shape[1])
+    padded = np.zeros((stop - start, 8), dtype=np.uint8)
+    padded[:, :width] = matrix[start:stop, :width]
+    return padded.view('>u8').ravel()
+
+def prefix_records(matrix, start, stop):
+    """(prefix, index) records for keys [start, stop)"""
+    records = np.empty(stop - start, dtype=PREFIX_RECORD_DTYPE)
+    records['prefix'] = key_prefixes(matrix, start, stop)
+    records['index'] = np.arange(start, stop, dtype=np.uint64)
+    return records
+
+def find_duplicates_in_records(filepath, key_bytes, records):
+    """Sort one partition by prefix and confirm prefix collisions with full-key comparison
+
+    Returns a list of index groups, one per distinct repeated key.
+    """
+    if len(records) < 2:
+        return []
+    order = np.argsort(records['prefix'], kind='stable')
+    prefixes = records['prefix'][order]
+    indexes = records['index'][order]
+    
+    same = prefixes[1:] == prefixes[:-1]
+    if not same.any():
+        return []
+    
+    # Start/end of each run of equal prefixes
+    boundaries = np.flatnonzero(np.diff(np.concatenate(([False], same, [False])).astype(np.int8)))
+    matrix = open_key_matrix(filepath, key_bytes)
+    
+    groups = []
+    for run_start, run_end in zip(boundaries[::2], boundaries[1::2] + 1):
+        candidates = np.sort(indexes[run_start:run_end])
+        keys = {}
+        for index in candidates.tolist():
+            keys.setdefault(matrix[index].tobytes(), []).append(index)
+        groups.extend(g for g in keys.values() if len(g) > 1)
+    return groups
+
+def _find_duplicates_in_partition(filepath, key_bytes, partition_file):
+    """Worker: load one spilled partition and resolve its duplicates"""
+    records = np.fromfile(partition_file, dtype=PREFIX_RECORD_DTYPE)
+    return find_duplicates_in_records(filepath, key_bytes, records)
+
+def find_duplicate_keys(filepath, key_bytes=None, memory_limit=DEFAULT_MEMORY_LIMIT,
+                        workers=None, temp_dir=None):
+    """Return (num_keys, duplicate index groups) for one key file"""
+    filepath = Path(filepath)
+    matrix = open_key_matrix(filepath, key_bytes)
+    num_keys, key_bytes = matrix.shape
+    
+    record_bytes = PREFIX_RECORD_DTYPE.itemsize
+    if num_keys * record_bytes <= memory_limit:
+        records = np.concatenate([prefix_records(matrix, start, min(start + CHUNK_KEYS, num_keys))
+                                  for start in range(0, num_keys, CHUNK_KEYS)] or
+                                 [np.empty(0, dtype=PREFIX_RECORD_DTYPE)])
+        return num_keys, find_duplicates_in_records(filepath, key_bytes, records)
+    
+    # External-memory path: hash-partition records on their top prefix bits
+    partitions = 1
+    while num_keys * record_bytes / partitions > memory_limit:
+        partitions *= 2
+    shift = np.uint64(64 - partitions.bit_length() + 1)
+    
+    with tempfile.TemporaryDirectory(dir=temp_dir, prefix='sqef_collisions_') as spill_dir:
+        partition_files = [Path(spill_dir) / f'partition_{p:05d}.bin' for p in range(partitions)]
+        handles = [open(p, 'wb') for p in partition_files]
+        try:
+            for start in range(0, num_keys, CHUNK_KEYS):
+                records = prefix_records(matrix, start, min(start + CHUNK_KEYS, num_keys))
+                bucket = (records['prefix'].astype(np.uint64) >> shift).astype(np.int64)
+                order = np.argsort(bucket, kind='stable')
+                bucket_starts = np.searchsorted(bucket[order], np.arange(partitions + 1))
+                for p in range(partitions):
+                    part = records[order[bucket_starts[p]:bucket_starts[p + 1]]]
+                    if len(part):
+                        part.tofile(handles[p])
+        finally:
+            for handle in handles:
+                handle.close()
+        
+        groups = []
+        with ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1) as pool:
+            futures = [pool.submit(_find_duplicates_in_partition, str(filepath), key_bytes,
+                                   str(partition_file))
+                       for partition_file in partition_files]
+            for future in futures:
+                groups.extend(future.result())
+    return num_keys, groups
+
+def check_tree(root_path, memory_limit=DEFAULT_MEMORY_LIMIT, workers=None, temp_dir=None):
+    """Check every .bin file below root_path"""
+    root = Path(root_path)
+    results = []
+    for file_path in scan_key_files(root):
+        info = get_key_file_info(file_path)
+        print(f"Checking: {file_path.name} ({info['key_bytes']} byte keys)")
+        try:
+            num_keys, groups = find_duplicate_keys(file_path, info['key_bytes'], memory_limit,
+                                                   workers, temp_dir)
+        except ValueError as e:
+            print(f"  ⚠️  Skipped: {e}")
+            continue
+        duplicate_keys = sum(len(g) - 1 for g in groups)
+        status = '✓' if not groups else '❌'
+        print(f"  {status} {num_keys} keys, {duplicate_keys} duplicates")
+        
+        try:
+            relative_path = file_path.relative_to(root)
+        except ValueError:
+            relative_path = file_path
+        results.append({
+            'relative_path': str(relative_path).replace('\\', '/'),
+            'security_level': info['security_level'],
+            'key_size': info['key_size'],
+            'key_bytes': info['key_bytes'],
+            'num_keys': num_keys,
+            'duplicate_keys': duplicate_keys,
+            'duplicate_groups': [g[:10] for g in groups[:MAX_REPORTED_GROUPS]]
+        })
+    return results
+
+def latest_checksum_manifest(root_path):
+    """Most recent sqef_checksums_*.json in root_path, if any"""
+    manifests = sorted(Path(root_path).glob('sqef_checksums_*.json'))
+    return manifests[-1] if manifests else None
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(
+        description='Detect repeated keys in SQEF sliced key files',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  %(prog)s ../sample-outputs
+  %(prog)s ../sample-outputs --memory-limit 64 --workers 8
+  %(prog)s --file sqef_sliced_256bit_500000keys_from_STANDARD_master.bin
+        """
+    )
+    parser.add_argument('path', nargs='?', default=os.getcwd(),
+                        help='Root directory containing .bin files (default: current directory)')
+    parser.add_argument('--file', help='Check a single key file instead of a tree')
+    parser.add_argument('--memory-limit', type=int, default=DEFAULT_MEMORY_LIMIT // (1024 * 1024),
+                        help='Sort in memory up to this many MB of prefix records, '
+                             'spill to partitions beyond it (default: 512)')
+    parser.add_argument('--workers', type=int, help='Worker processes for spilled partitions')
+    parser.add_argument('--temp-dir', help='Directory for partition spill files')
+    
+    args = parser.parse_args()
+    memory_limit = args.memory_limit * 1024 * 1024
+    
+    if args.file:
+        info = get_key_file_info(args.file)
+        try:
+            num_keys, groups = find_duplicate_keys(args.file, info['key_bytes'], memory_limit,
+                                                   args.workers, args.temp_dir)
+        except ValueError as e:
+            print(f"❌ {e}")
+            return 1
+        print(f"{num_keys} keys of {info['key_bytes']} bytes, "
+              f"{sum(len(g) - 1 for g in groups)} duplicates")
+        for group in groups[:MAX_REPORTED_GROUPS]:
+            print(f"  key indexes: {group}")
+        return 1 if groups else 0
+    
+    root_path = os.path.abspath(args.path)
+    results = check_tree(root_path, memory_limit, args.workers, args.temp_dir)
+    if not results:
+        print("No .bin files found!")
+        return 0
+    
+    # Report next to the existing checksums
+    manifest = latest_checksum_manifest(root_path)
+    if manifest:
+        with open(manifest, 'r', encoding='utf-8') as f:
+            checksums = {entry['relative_path']: entry['sha256']
+                         for entry in json.load(f).get('files', [])}
+        for result in results:
+            result['sha256'] = checksums.get(result['relative_path'])
+    
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    json_path = os.path.join(root_path, f"sqef_duplicates_{timestamp}.json")
+    with open(json_path, 'w', encoding='utf-8') as f:
+        json.dump({
+            'generated': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'root_path': str(root_path),
+            'checksum_manifest': manifest.name if manifest else None,
+            'total_files': len(results),
+            'files_with_duplicates': sum(1 for r in results if r['duplicate_keys']),
+            'files': results
+        }, f, indent=2)
+    print(f"✓ Duplicate report saved to: {json_path}")
+    
+    return 1 if any(r['duplicate_keys'] for r in results) else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
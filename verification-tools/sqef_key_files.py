@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+SQEF Key Files
+Describes sqef_sliced_<size>_<N>keys_from_<LEVEL>_master.bin files and
+exposes them as memory-mapped (keys x key_bytes) NumPy matrices and
+zero-copy key batches
+"""
+
+from pathlib import Path
+
+import numpy as np
+
+from sqef_test_summary_generator import get_configuration_from_path
+
+KEY_SIZE_BYTES = {
+    '128-bit': 16,
+    '256-bit': 32,
+    '512-bit': 64,
+    '1024-bit': 128,
+    '2048-bit': 256,
+    '4096-bit': 512,
+    '1KB': 1024,
+    '4KB': 4096,
+    '1MB': 1024 * 1024,
+    '16MB': 16 * 1024 * 1024,
+    '256MB': 256 * 1024 * 1024,
+    '512MB': 512 * 1024 * 1024
+}
+
+def get_key_file_info(filepath):
+    """Key size and count of a sliced key file, parsed from its name like get_configuration_from_path
+
+    Falls back to the whole file as one key when the size is not in the name;
+    an empty file has key_bytes 0 and no keys.
+    """
+    filepath = Path(filepath)
+    config = get_configuration_from_path(filepath.name)
+    if config['security_level'] == 'UNKNOWN':
+        config.update({k: v for k, v in get_configuration_from_path(filepath).items()
+                       if k in ('security_level', 'expansion_ratio')})
+    
+    file_size = filepath.stat().st_size
+    key_bytes = KEY_SIZE_BYTES.get(config['key_size'], file_size)
+    if key_bytes > file_size:
+        key_bytes = file_size
+    available_keys = file_size // key_bytes if key_bytes else 0
+    num_keys = config.get('num_keys', available_keys)
+    
+    return {
+        **config,
+        'file': str(filepath),
+        'file_size': file_size,
+        'key_bytes': key_bytes,
+        'num_keys': min(num_keys, available_keys),
+        'name_matches_size': num_keys * key_bytes == file_size
+    }
+
+def open_key_matrix(filepath, key_bytes=None):
+    """Map a key file read-only as a (num_keys, key_bytes) uint8 matrix (no data is copied)
+
+    Raises ValueError for an empty file, which has no key size.
+    """
+    filepath = Path(filepath)
+    if key_bytes is None:
+        key_bytes = get_key_file_info(filepath)['key_bytes']
+    if not key_bytes:
+        raise ValueError(f"{filepath.name} is empty")
+    num_keys = filepath.stat().st_size // key_bytes
+    if num_keys == 0:
+        return np.empty((0, key_bytes), dtype=np.uint8)
+    return np.memmap(filepath, dtype=np.uint8, mode='r', shape=(num_keys, key_bytes))
+
+def scan_key_files(root_path):
+    """Recursively find all .bin files, sorted by path"""
+    return sorted(p for p in Path(root_path).rglob('*.bin') if p.is_file())
+
+DEFAULT_BATCH_KEYS = 4096
+
+def iter_key_batches(matrix, batch_keys=DEFAULT_BATCH_KEYS, start=0, stop=None, as_memoryview=False):
+    """Yield (first key index, batch) for consecutive batches of a key matrix
+
+    Each batch is a (keys, key_bytes) view of the matrix, or a memoryview of
+    that view, so no key data is copied; pages are read when a batch is used.
+    """
+    stop = len(matrix) if stop is None else min(stop, len(matrix))
+    for first in range(start, stop, batch_keys):
+        batch = matrix[first:min(first + batch_keys, stop)]
+        yield first, (memoryview(batch) if as_memoryview else batch)
+
+class KeyFile:
+    """Read-only, zero-copy access to the keys of one sliced key file
+
+    keys[i] is a memoryview of key i, keys[i:j] a (j - i, key_bytes) view;
+    both point into the memory map.
+    """
+    
+    def __init__(self, filepath, key_bytes=None):
+        self.info = get_key_file_info(filepath)
+        if key_bytes is not None:
+            self.info['key_bytes'] = key_bytes
+            self.info['num_keys'] = self.info['file_size'] // key_bytes
+        self.key_bytes = self.info['key_bytes']
+        self.matrix = open_key_matrix(filepath, self.key_bytes)[:self.info['num_keys']]
+    
+    def __len__(self):
+        return len(self.matrix)
+    
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self.matrix[index]
+        return memoryview(self.matrix[index])
+    
+    def batches(self, batch_keys=DEFAULT_BATCH_KEYS, start=0, stop=None, as_memoryview=False):
+        """Zero-copy batches of keys [start, stop), see iter_key_batches"""
+        return iter_key_batches(self.matrix, batch_keys, start, stop, as_memoryview)
+    
+    def buffer(self):
+        """The keys as one flat memoryview of num_keys * key_bytes bytes"""
+        return memoryview(self.matrix).cast('B')
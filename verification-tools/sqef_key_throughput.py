@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+SQEF Key Throughput
+Measures how fast keys can be delivered from sliced key files, in keys/ms
+and MB/s per key size
+
+Two access patterns are timed. 'batch' hands out zero-copy (keys x key_bytes)
+views of the memory map and XOR-folds each one, so every byte is read once;
+'key' hands out one key at a time as a bytes object, the way a service
+answering single-key requests would. The fastest of --repeat passes is kept;
+the first pass is reported separately because it may include page-cache misses.
+"""
+
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+from pathlib import Path
+from datetime import datetime
+
+import numpy as np
+
+from sqef_key_files import KEY_SIZE_BYTES, DEFAULT_BATCH_KEYS, KeyFile, get_key_file_info, scan_key_files
+from sqef_benchmark import SIZE_DIRECTORIES, environment, key_file_name, write_random_file
+
+MODES = ('batch', 'key')
+SLICED_PREFIX = 'sqef_sliced_'
+MB = 1024 * 1024
+
+# Published delivery rates (README, "Throughput")
+README_KEYS_PER_MS = {'256-bit': 9943}
+README_MB_PER_SECOND = 273
+
+def _fold_batches(key_file, batch_keys):
+    """XOR of all keys, read batch by batch through zero-copy views"""
+    word = np.uint64 if key_file.key_bytes % 8 == 0 else np.uint8
+    fold = np.zeros(key_file.key_bytes // np.dtype(word).itemsize, dtype=word)
+    for _, batch in key_file.batches(batch_keys):
+        fold ^= np.bitwise_xor.reduce(batch.view(word), axis=0)
+    return fold
+
+def _copy_keys(key_file):
+    """Hand out every key as its own bytes object"""
+    buffer = key_file.buffer()
+    key_bytes = key_file.key_bytes
+    key = b''
+    for offset in range(0, len(buffer), key_bytes):
+        key = bytes(buffer[offset:offset + key_bytes])
+    return key
+
+def benchmark_key_file(filepath, mode='batch', batch_keys=DEFAULT_BATCH_KEYS, repeat=3):
+    """Time `repeat` passes over one key file; returns its best and first pass"""
+    key_file = KeyFile(filepath)
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        if mode == 'batch':
+            _fold_batches(key_file, batch_keys)
+        else:
+            _copy_keys(key_file)
+        timings.append(time.perf_counter() - start)
+    return {
+        'file': str(filepath),
+        'key_size': key_file.info['key_size'],
+        'key_bytes': key_file.key_bytes,
+        'keys': len(key_file),
+        'bytes': len(key_file) * key_file.key_bytes,
+        'seconds': min(timings),
+        'first_pass_seconds': timings[0]
+    }
+
+def _rates(keys, total_bytes, seconds):
+    return {
+        'keys_per_ms': keys / (seconds * 1000) if seconds else 0.0,
+        'mb_per_second': total_bytes / MB / seconds if seconds else 0.0
+    }
+
+def summarize_by_key_size(file_results):
+    """Combine per-file results into keys/ms and MB/s per key size, in KEY_SIZE_BYTES order"""
+    sizes = {}
+    for result in file_results:
+        totals = sizes.setdefault(result['key_size'], {
+            'key_bytes': result['key_bytes'], 'files': 0, 'keys': 0, 'bytes': 0,
+            'seconds': 0.0, 'first_pass_seconds': 0.0
+        })
+        totals['files'] += 1
+        for field in ('keys', 'bytes', 'seconds', 'first_pass_seconds'):
+            totals[field] += result[field]
+    
+    order = list(KEY_SIZE_BYTES)
+    summary = {}
+    for key_size in sorted(sizes, key=lambda s: order.index(s) if s in order else len(order)):
+        totals = sizes[key_size]
+        summary[key_size] = {
+            **totals,
+            **_rates(totals['keys'], totals['bytes'], totals['seconds']),
+            'first_pass': _rates(totals['keys'], totals['bytes'], totals['first_pass_seconds'])
+        }
+    return summary
+
+def find_sliced_files(paths, key_sizes=None):
+    """Sliced key files among the given files and directories, optionally limited to key_sizes"""
+    files = []
+    for path in paths:
+        path = Path(path)
+        candidates = scan_key_files(path) if path.is_dir() else [path]
+        files.extend(p for p in candidates if p.name.startswith(SLICED_PREFIX))
+    if key_sizes:
+        files = [f for f in files if get_key_file_info(f)['key_size'] in key_sizes]
+    return files
+
+def generate_sliced_files(directory, megabytes, seed=0):
+    """Write one random sliced key file of about `megabytes` per key size below 1MB"""
+    rng = np.random.default_rng(seed)
+    files = []
+    for key_size, token, _ in SIZE_DIRECTORIES:
+        key_bytes = KEY_SIZE_BYTES.get(key_size.replace('-blocks', ''))
+        if key_bytes is None or key_bytes >= MB:
+            continue
+        keys = max(1, int(megabytes * MB) // key_bytes)
+        path = Path(directory) / key_file_name(token, keys, 'STANDARD')
+        write_random_file(path, keys * key_bytes, rng)
+        files.append(path)
+    return files
+
+def check_thresholds(summary, min_keys_per_ms=None, min_mb_per_second=None):
+    """(key size, measure, rate, minimum) for every rate below its minimum"""
+    failures = []
+    for key_size, stats in summary.items():
+        if min_keys_per_ms is not None and stats['keys_per_ms'] < min_keys_per_ms:
+            failures.append((key_size, 'keys/ms', stats['keys_per_ms'], min_keys_per_ms))
+        if min_mb_per_second is not None and stats['mb_per_second'] < min_mb_per_second:
+            failures.append((key_size, 'MB/s', stats['mb_per_second'], min_mb_per_second))
+    return failures
+
+def print_summary(mode, summary):
+    print(f"\n📊 {mode} access")
+    print(f"  {'Key size':<10} {'Files':>5} {'Keys':>12} {'Keys/ms':>12} {'MB/s':>10} "
+          f"{'First MB/s':>11}  README")
+    for key_size, stats in summary.items():
+        reference = []
+        if key_size in README_KEYS_PER_MS:
+            reference.append(f"{stats['keys_per_ms'] / README_KEYS_PER_MS[key_size]:.2f}x "
+                             f"{README_KEYS_PER_MS[key_size]:,} keys/ms")
+        reference.append(f"{stats['mb_per_second'] / README_MB_PER_SECOND:.2f}x {README_MB_PER_SECOND} MB/s")
+        print(f"  {key_size:<10} {stats['files']:>5} {stats['keys']:>12,} {stats['keys_per_ms']:>12,.0f} "
+              f"{stats['mb_per_second']:>10,.1f} {stats['first_pass']['mb_per_second']:>11,.1f}  "
+              f"{', '.join(reference)}")
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(
+        description='Measure key delivery rates (keys/ms, MB/s) from SQEF sliced key files',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  %(prog)s ../sample-outputs
+  %(prog)s ../sample-outputs --key-size 256-bit --min-keys-per-ms 9943
+  %(prog)s sqef_sliced_256bit_500000keys_from_STANDARD_master.bin --mode key --repeat 5
+  %(prog)s --synthetic-mb 64 --output key_throughput.json
+        """
+    )
+    parser.add_argument('paths', nargs='*', help='Sliced key files or directories to scan for them')
+    parser.add_argument('--mode', choices=MODES + ('both',), default='both',
+                        help="Access pattern to time (default: both)")
+    parser.add_argument('--batch-keys', type=int, default=DEFAULT_BATCH_KEYS,
+                        help=f'Keys per batch in batch mode (default: {DEFAULT_BATCH_KEYS})')
+    parser.add_argument('--repeat', type=int, default=3, help='Passes per file; the fastest is kept')
+    parser.add_argument('--key-size', action='append', choices=list(KEY_SIZE_BYTES),
+                        help='Only benchmark this key size (repeatable)')
+    parser.add_argument('--synthetic-mb', type=float,
+                        help='Benchmark generated random key files of this many MB per key size')
+    parser.add_argument('--seed', type=int, default=0, help='Seed of the synthetic key files')
+    parser.add_argument('--min-keys-per-ms', type=float,
+                        help='Exit with status 1 if any key size delivers fewer keys/ms (batch mode unless --mode key)')
+    parser.add_argument('--min-mb-per-second', type=float,
+                        help='Exit with status 1 if any key size delivers fewer MB/s (batch mode unless --mode key)')
+    parser.add_argument('--output', '-o', help='Write results as JSON')
+    
+    args = parser.parse_args()
+    if not args.paths and args.synthetic_mb is None:
+        parser.error('give key files or directories, or --synthetic-mb')
+    
+    work_dir = None
+    paths = list(args.paths)
+    if args.synthetic_mb is not None:
+        work_dir = tempfile.mkdtemp(prefix='sqef-keys-')
+        print(f"Generating {args.synthetic_mb:g} MB key files in {work_dir}...")
+        paths.extend(generate_sliced_files(work_dir, args.synthetic_mb, args.seed))
+    
+    try:
+        files = find_sliced_files(paths, args.key_size)
+        if not files:
+            print("No sliced key files found!")
+            return 1
+        
+        modes = MODES if args.mode == 'both' else (args.mode,)
+        results = {
+            'generated': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'environment': environment(),
+            'batch_keys': args.batch_keys,
+            'repeat': args.repeat,
+            'modes': {}
+        }
+        for mode in modes:
+            file_results = []
+            for filepath in files:
+                try:
+                    file_results.append(benchmark_key_file(filepath, mode, args.batch_keys, args.repeat))
+                except ValueError as e:
+                    if mode == modes[0]:
+                        print(f"⚠️  Skipped: {e}")
+            summary = summarize_by_key_size(file_results)
+            print_summary(mode, summary)
+            results['modes'][mode] = {'key_sizes': summary, 'files': file_results}
+    finally:
+        if work_dir:
+            shutil.rmtree(work_dir, ignore_errors=True)
+    
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\n✅ Results saved to: {args.output}")
+    
+    checked = 'batch' if 'batch' in results['modes'] else 'key'
+    failures = check_thresholds(results['modes'][checked]['key_sizes'],
+                                args.min_keys_per_ms, args.min_mb_per_second)
+    for key_size, measure, rate, minimum in failures:
+        print(f"❌ {key_size}: {rate:,.1f} {measure} ({checked} access) is below the required {minimum:,.1f}")
+    if failures:
+        return 1
+    if args.min_keys_per_ms is not None or args.min_mb_per_second is not None:
+        print("✅ All key sizes meet the required delivery rate")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
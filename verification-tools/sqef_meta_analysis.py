@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+SQEF Meta-Analysis
+Second-level tests over every report row of a campaign at once, to catch a
+small bias that is spread across many rows and configurations
+
+Every row's C1-C10 histogram is reduced to a value that is exactly uniform on
+(0, 1) under the null hypothesis, then combined over all rows, per test type
+and per security level: a Kolmogorov-Smirnov test of the pooled values,
+Fisher's and Stouffer's combinations, and a chi-square test of the summed
+histograms.
+
+The printed uniformity P-VALUEs cannot be pooled directly: with 125 sequences
+per row they take only ~160 distinct values, and assess computes them with
+the expected count truncated to an integer, so a KS test rejects even ideal
+data at this scale. Instead each row's statistic sum(C_i^2) is placed in its
+exact multinomial null distribution (randomized probability integral
+transform); rows with more than EXACT_SAMPLE_LIMIT sequences use the
+chi-square approximation with the untruncated expected count. The 148
+NonOverlappingTemplate rows of a report share their sequences, so
+combinations over that test type are somewhat over-dispersed.
+"""
+
+import sys
+import json
+import math
+import argparse
+import functools
+from pathlib import Path
+from statistics import NormalDist
+from datetime import datetime
+
+import numpy as np
+
+from sqef_report_io import glob_reports
+from sqef_result_table import load_result_tables
+from sqef_sequential_test import normal_cdf
+from sqef_test_summary_generator import get_configuration_from_path
+from sqef_uniformity_verifier import ALPHA, igamc
+
+HISTOGRAM_BINS = 10
+EXACT_SAMPLE_LIMIT = 128
+TESTS = ('ks', 'fisher', 'stouffer', 'histogram')
+
+_inv_cdf = np.frompyfunc(NormalDist().inv_cdf, 1, 1)
+
+@functools.lru_cache(maxsize=None)
+def square_sum_distribution(sample_size, bins=HISTOGRAM_BINS):
+    """P(sum C_i^2 = S) for S = 0..sample_size^2, for sample_size draws into equally likely bins
+
+    Dynamic programme over bins; state m (draws placed so far) keeps an array
+    over S = 0..m^2 of sum(prod 1 / C_i!) for the histograms reaching it.
+    """
+    n = sample_size
+    inverse_factorials = [1.0 / math.factorial(c) for c in range(n + 1)]
+    states = [np.zeros(m * m + 1) for m in range(n + 1)]
+    for m in range(n + 1):
+        states[m][m * m] = inverse_factorials[m]
+    
+    for _ in range(bins - 2):
+        merged = [np.zeros(m * m + 1) for m in range(n + 1)]
+        for m, weights in enumerate(states):
+            for c in range(n + 1 - m):
+                merged[m + c][c * c:c * c + len(weights)] += weights * inverse_factorials[c]
+        states = merged
+    
+    # The last bin takes whatever is left
+    distribution = np.zeros(n * n + 1)
+    for m, weights in enumerate(states):
+        c = n - m
+        distribution[c * c:c * c + len(weights)] += weights * inverse_factorials[c]
+    return distribution * math.factorial(n) / bins ** n
+
+def null_uniform_values(counts, rng):
+    """One value per histogram row, uniform on (0, 1) when the row is ideal
+
+    Small values mean too uneven a histogram, as for a P-VALUE. For exact rows
+    the value is P(S' > S) + V * P(S' = S) with V ~ U(0, 1).
+    """
+    counts = np.asarray(counts, dtype=np.int64)
+    sample_sizes = counts.sum(axis=1)
+    square_sums = (counts ** 2).sum(axis=1)
+    values = np.empty(len(counts))
+    
+    for sample_size in np.unique(sample_sizes).tolist():
+        rows = sample_sizes == sample_size
+        if sample_size <= EXACT_SAMPLE_LIMIT:
+            pmf = square_sum_distribution(sample_size)
+            upper = np.cumsum(pmf[::-1])[::-1]
+            s = square_sums[rows]
+            values[rows] = upper[s] - pmf[s] + rng.random(len(s)) * pmf[s]
+        else:
+            expected = sample_size / HISTOGRAM_BINS
+            chi2 = ((counts[rows] - expected) ** 2).sum(axis=1) / expected
+            values[rows] = igamc((HISTOGRAM_BINS - 1) / 2.0, chi2 / 2.0)
+    return np.clip(values, np.finfo(np.float64).tiny, 1.0 - np.finfo(np.float64).epsneg)
+
+def kolmogorov_p_values(d, n):
+    """Asymptotic KS P-VALUE of statistic d for n values, with Stephens' small-sample correction"""
+    d = np.asarray(d, dtype=np.float64)
+    root_n = np.sqrt(np.asarray(n, dtype=np.float64))
+    lam = (root_n + 0.12 + 0.11 / root_n) * d
+    k = np.arange(1, 101)[:, None]
+    series = 2 * ((-1.0) ** (k - 1) * np.exp(-2 * k ** 2 * lam ** 2)).sum(axis=0)
+    return np.clip(np.where(lam < 0.2, 1.0, series), 0.0, 1.0)
+
+def grouped_tests(values, counts, groups, n_groups):
+    """KS, Fisher, Stouffer and summed-histogram chi-square for every group at once
+
+    values are the null-uniform row values, groups the group index of each row.
+    Returns a dict of arrays of length n_groups.
+    """
+    sizes = np.bincount(groups, minlength=n_groups)
+    safe = np.maximum(sizes, 1)
+    
+    # KS: sort by (group, value) and take each group's empirical CDF
+    order = np.lexsort((values, groups))
+    sorted_values = values[order]
+    sorted_groups = groups[order]
+    starts = np.concatenate(([0], np.cumsum(sizes)[:-1]))
+    rank = np.arange(len(values)) - starts[sorted_groups]
+    n = sizes[sorted_groups]
+    gaps = np.maximum((rank + 1) / n - sorted_values, sorted_values - rank / n)
+    d = np.zeros(n_groups)
+    np.maximum.at(d, sorted_groups, gaps)
+    
+    fisher_chi2 = np.bincount(groups, weights=-2 * np.log(values), minlength=n_groups)
+    stouffer_z = np.bincount(groups, weights=-_inv_cdf(values).astype(np.float64),
+                             minlength=n_groups) / np.sqrt(safe)
+    
+    histograms = np.zeros((n_groups, counts.shape[1]))
+    np.add.at(histograms, groups, counts)
+    expected = histograms.sum(axis=1, keepdims=True) / counts.shape[1]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        histogram_chi2 = np.where(expected[:, 0] > 0,
+                                  ((histograms - expected) ** 2 / expected).sum(axis=1), 0.0)
+    
+    return {
+        'rows': sizes,
+        'ks_d': d,
+        'ks_p_value': kolmogorov_p_values(d, safe),
+        'fisher_chi2': fisher_chi2,
+        'fisher_p_value': igamc(safe.astype(np.float64), fisher_chi2 / 2.0),
+        'stouffer_z': stouffer_z,
+        'stouffer_p_value': normal_cdf(-stouffer_z),
+        'histogram': histograms.astype(np.int64),
+        'histogram_chi2': histogram_chi2,
+        'histogram_p_value': igamc((counts.shape[1] - 1) / 2.0, histogram_chi2 / 2.0)
+    }
+
+def meta_analysis(table, levels, seed=0, alpha=ALPHA):
+    """Second-level tests over a ResultTable: all rows, per test type and per security level
+
+    levels holds the security level of each row. Returns {group: {test: value}};
+    a group is flagged when any of its P-VALUEs is below alpha divided by the
+    number of P-VALUEs computed (Bonferroni).
+    """
+    rows = table.rows
+    keep = rows['counts'].sum(axis=1) > 0
+    counts = rows['counts'][keep]
+    values = null_uniform_values(counts, np.random.default_rng(seed))
+    
+    labels = [('ALL', np.zeros(len(counts), dtype=np.int64), ['ALL'])]
+    for kind, column in (('test', rows['test_name'][keep]), ('level', np.asarray(levels)[keep])):
+        names, index = np.unique(column, return_inverse=True)
+        labels.append((kind, index, [f"{kind}:{name}" for name in names.tolist()]))
+    
+    results = {}
+    for _, index, names in labels:
+        tests = grouped_tests(values, counts, index, len(names))
+        for i, name in enumerate(names):
+            results[name] = {key: (array[i].tolist() if key == 'histogram' else
+                                   int(array[i]) if key == 'rows' else float(array[i]))
+                             for key, array in tests.items()}
+    
+    bound = alpha / (len(results) * len(TESTS))
+    for stats in results.values():
+        stats['flagged'] = [test for test in TESTS if stats[f'{test}_p_value'] < bound]
+    return results, bound
+
+def load_campaign(root_path):
+    """Every SP 800-22 report row below root_path and the security level of each row"""
+    report_files = [p for p in glob_reports(Path(root_path), '*finalAnalysisReport*.txt', recursive=True)
+                    if 'sp800-90b' not in str(p).lower()]
+    table = load_result_tables(report_files)
+    source_levels = np.array([get_configuration_from_path(s)['security_level'] for s in table.sources])
+    levels = source_levels[table.source_index] if len(table) else np.empty(0, dtype='U8')
+    return table, levels
+
+def print_results(results, bound):
+    print(f"  {'Group':<34} {'Rows':>6} {'KS p':>9} {'Fisher p':>9} {'Stouffer p':>10} {'Hist p':>9}")
+    for name, stats in results.items():
+        status = '⚠️ ' if stats['flagged'] else '  '
+        print(f"{status}{name:<34} {stats['rows']:>6} {stats['ks_p_value']:>9.4f} "
+              f"{stats['fisher_p_value']:>9.4f} {stats['stouffer_p_value']:>10.4f} "
+              f"{stats['histogram_p_value']:>9.4f}")
+    flagged = [name for name, stats in results.items() if stats['flagged']]
+    if flagged:
+        print(f"\n⚠️  {len(flagged)} groups below the Bonferroni bound {bound:.2e}:")
+        for name in flagged:
+            print(f"  - {name}: {', '.join(results[name]['flagged'])}")
+    else:
+        print(f"\n✅ No group below the Bonferroni bound {bound:.2e}")
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(
+        description='Meta-analysis of all SP 800-22 report rows: KS, Fisher, Stouffer and pooled histograms',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  %(prog)s ..
+  %(prog)s ../sp800-22-results/test-results-STANDARD-512
+  %(prog)s .. --alpha 0.001 --output meta_analysis.json
+        """
+    )
+    parser.add_argument('root', help='Root directory to search for finalAnalysisReport.txt files')
+    parser.add_argument('--alpha', type=float, default=ALPHA,
+                        help='Family-wise significance level across all groups and tests (default: 0.01)')
+    parser.add_argument('--seed', type=int, default=0,
+                        help='Seed of the randomized transform of tied histogram statistics (default: 0)')
+    parser.add_argument('--output', '-o', help='Write per-group results as JSON')
+    
+    args = parser.parse_args()
+    
+    table, levels = load_campaign(args.root)
+    if not len(table):
+        print("❌ No finalAnalysisReport.txt files found!")
+        return 1
+    
+    print(f"📊 Meta-analysis of {len(table)} rows from {len(table.sources)} reports\n")
+    results, bound = meta_analysis(table, levels, args.seed, args.alpha)
+    print_results(results, bound)
+    
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({
+                'generated': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                'reports': len(table.sources),
+                'rows': len(table),
+                'alpha': args.alpha,
+                'bonferroni_bound': bound,
+                'seed': args.seed,
+                'groups': results
+            }, f, indent=2)
+        print(f"\n✅ Results saved to: {args.output}")
+    
+    return 1 if any(stats['flagged'] for stats in results.values()) else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+SQEF Null Calibration
+Monte Carlo calibration of the number of failing report rows expected under the
+null hypothesis (ideal random data), for the exact mix of row sample sizes of
+each configuration in MASTER_SUMMARY.json
+
+A row fails, as in the summary generator, when its pass rate is below 96% or it
+carries a uniformity / proportion '*'. Rows are simulated independently; the
+NonOverlappingTemplate rows of one report share their sequences, so the real
+failure count is somewhat over-dispersed relative to this model.
+"""
+
+import os
+import sys
+import json
+import math
+import argparse
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from sqef_result_table import ResultTable, PASS_RATE_THRESHOLD
+from sqef_uniformity_verifier import ALPHA, UNIFORMITY_ALPHA, proportion_bounds
+
+DEFAULT_TRIALS = 100000
+BATCH_TRIALS = 10000
+
+def row_failure_flags(passed, totals, p_values, alpha=ALPHA):
+    """Vectorized summary-generator failure rule for arrays of pass counts and P-VALUEs"""
+    threshold_min, threshold_max = proportion_bounds(totals, alpha)
+    proportion_flag = (passed < threshold_min) | (passed > threshold_max)
+    below_rate = passed < PASS_RATE_THRESHOLD * totals
+    return below_rate | proportion_flag | (p_values < UNIFORMITY_ALPHA)
+
+def simulate_failure_counts(totals, trials, seed, alpha=ALPHA):
+    """Histogram of failing-row counts over `trials` synthetic reports
+
+    Each batch draws a (batch, rows) matrix of binomial pass counts and
+    uniform P-VALUEs at once. Pass counts are drawn as total minus the
+    (small) number of failing sequences, which samples much faster.
+    """
+    totals = np.asarray(totals, dtype=np.int64)
+    rng = np.random.default_rng(seed)
+    histogram = np.zeros(len(totals) + 1, dtype=np.int64)
+    
+    # The failure rule only depends on the pass count through fixed per-row limits
+    candidates = np.arange(totals.max() + 1)
+    row_fails = np.stack([row_failure_flags(candidates, np.full(len(candidates), total),
+                                            np.ones(len(candidates)), alpha)
+                          for total in totals])
+    
+    remaining = trials
+    while remaining > 0:
+        batch = min(BATCH_TRIALS, remaining)
+        passed = totals - rng.binomial(totals, alpha, size=(batch, len(totals)))
+        p_values = rng.random((batch, len(totals)), dtype=np.float32)
+        failed = np.take_along_axis(row_fails.T, passed, axis=0) | (p_values < UNIFORMITY_ALPHA)
+        histogram += np.bincount(failed.sum(axis=1), minlength=len(totals) + 1)
+        remaining -= batch
+    return histogram
+
+def row_failure_probability(total, alpha=ALPHA):
+    """Exact null probability that a row with `total` sequences fails"""
+    passed = np.arange(total + 1)
+    fails = row_failure_flags(passed, np.full(total + 1, total), np.ones(total + 1), alpha)
+    log_pmf = np.array([
+        math.lgamma(total + 1) - math.lgamma(k + 1) - math.lgamma(total - k + 1)
+        + k * math.log(1.0 - alpha) + (total - k) * math.log(alpha)
+        for k in passed
+    ])
+    proportion_fail = float(np.exp(log_pmf[fails]).sum())
+    return 1.0 - (1.0 - proportion_fail) * (1.0 - UNIFORMITY_ALPHA)
+
+def analytic_failure_distribution(totals, alpha=ALPHA):
+    """Poisson-binomial distribution of the failing-row count (independent rows)"""
+    distribution = np.zeros(len(totals) + 1)
+    distribution[0] = 1.0
+    cache = {}
+    for n, total in enumerate(totals, 1):
+        q = cache.setdefault(int(total), row_failure_probability(int(total), alpha))
+        distribution[1:n + 1] = distribution[1:n + 1] * (1 - q) + distribution[:n] * q
+        distribution[0] *= 1 - q
+    return distribution
+
+def load_configurations(root_path):
+    """(name, report file, observed failures) for each MASTER_SUMMARY.json configuration"""
+    master_file = root_path / 'MASTER_SUMMARY.json'
+    with open(master_file, 'r', encoding='utf-8') as f:
+        master = json.load(f)
+    
+    configurations = []
+    for name, entry in master['test_configurations'].items():
+        directory = root_path / name.replace('\\', '/')
+        reports = sorted(directory.glob('*finalAnalysisReport*.txt'))
+        if not reports:
+            print(f"  ⚠️  No analysis report found for {name}")
+            continue
+        configurations.append((name, reports[0], entry['failed_individual_tests']))
+    return configurations
+
+def calibrate(root_path, trials=DEFAULT_TRIALS, workers=None, seed=None, alpha=ALPHA):
+    """Simulate every configuration across a process pool and return tail probabilities"""
+    configurations = load_configurations(Path(root_path))
+    workers = workers or os.cpu_count() or 1
+    
+    # Split each configuration's trials into chunks so the pool stays busy
+    chunks_per_config = max(1, workers)
+    chunk_trials = [trials // chunks_per_config + (1 if i < trials % chunks_per_config else 0)
+                    for i in range(chunks_per_config)]
+    seeds = np.random.SeedSequence(seed).spawn(len(configurations) * chunks_per_config)
+    
+    totals_by_config = [ResultTable.from_report(report).rows['total']
+                        for _, report, _ in configurations]
+    
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = []
+        for c, totals in enumerate(totals_by_config):
+            for k, n_trials in enumerate(chunk_trials):
+                if n_trials:
+                    futures.append((c, pool.submit(simulate_failure_counts, totals, n_trials,
+                                                   seeds[c * chunks_per_config + k], alpha)))
+        
+        histograms = [np.zeros(len(t) + 1, dtype=np.int64) for t in totals_by_config]
+        for c, future in futures:
+            histograms[c] += future.result()
+    
+    results = {}
+    for (name, report, observed), totals, histogram in zip(configurations, totals_by_config,
+                                                          histograms):
+        analytic = analytic_failure_distribution(totals, alpha)
+        counts = np.arange(len(histogram))
+        results[name] = {
+            'rows': int(len(totals)),
+            'observed_failures': observed,
+            'expected_failures': float((histogram * counts).sum() / trials),
+            'tail_probability': float(histogram[observed:].sum() / trials),
+            'analytic_tail_probability': float(analytic[observed:].sum()),
+            'trials': trials
+        }
+    return results
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(
+        description='Calibrate expected failing-row counts under the null hypothesis',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  %(prog)s ..
+  %(prog)s .. --trials 5000000 --workers 16
+  %(prog)s .. --seed 2025 --output calibration.json
+        """
+    )
+    parser.add_argument('root', help='Root directory containing MASTER_SUMMARY.json')
+    parser.add_argument('--trials', type=int, default=DEFAULT_TRIALS,
+                        help=f'Synthetic reports per configuration (default: {DEFAULT_TRIALS})')
+    parser.add_argument('--workers', type=int, help='Worker processes (default: all cores)')
+    parser.add_argument('--seed', type=int, help='Random seed for reproducible runs')
+    parser.add_argument('--alpha', type=float, default=ALPHA, help='Significance level (default: 0.01)')
+    parser.add_argument('--output', '-o', help='Write results as JSON')
+    
+    args = parser.parse_args()
+    
+    root_path = Path(args.root)
+    if not (root_path / 'MASTER_SUMMARY.json').exists():
+        print(f"❌ Error: MASTER_SUMMARY.json not found in {root_path}")
+        return 1
+    
+    results = calibrate(root_path, args.trials, args.workers, args.seed, args.alpha)
+    
+    print(f"{'Configuration':<55} {'Obs':>4} {'E[F]':>6} {'P(F>=obs)':>10} {'exact':>10}")
+    for name, r in results.items():
+        print(f"{name.replace(chr(92), '/'):<55} {r['observed_failures']:>4} "
+              f"{r['expected_failures']:>6.2f} {r['tail_probability']:>10.4f} "
+              f"{r['analytic_tail_probability']:>10.4f}")
+    
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\n✅ Results saved to: {args.output}")
+    
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
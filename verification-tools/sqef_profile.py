@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+"""
+SQEF Profiling
+Per-stage wall/CPU time and I/O counters for the SQEF command line tools
+
+A Profiler replaces selected functions with timing wrappers for the duration
+of one run, so nothing is instrumented unless --profile is given. Stages may
+nest (a summary stage contains its parse and entropy stages); each stage's
+times are inclusive. The report is written as JSON or as a Prometheus
+textfile-collector file, optionally with cProfile statistics for the
+captured functions and tracemalloc peaks per stage.
+"""
+
+import os
+import sys
+import json
+import time
+import pstats
+import cProfile
+import platform
+import functools
+import tracemalloc
+from pathlib import Path
+from datetime import datetime
+from contextlib import contextmanager
+
+CAPTURE_MODES = ('cprofile', 'tracemalloc')
+PROMETHEUS_SUFFIXES = ('.prom', '.txt')
+TOP_ENTRIES = 25
+
+_EXHAUSTED = object()
+
+class Profiler:
+    """Stage timers and counters for one run of a tool"""
+    
+    def __init__(self, tool, capture=()):
+        self.tool = tool
+        self.capture = set(capture)
+        self.stages = {}
+        self.counters = {}
+        self.started = datetime.now()
+        self._wall = time.perf_counter()
+        self._cpu = time.process_time()
+        self._patched = []
+        self._cprofile = cProfile.Profile() if 'cprofile' in self.capture else None
+        self._cprofile_depth = 0
+        self._peaks = []
+        if 'tracemalloc' in self.capture:
+            tracemalloc.start()
+    
+    @contextmanager
+    def stage(self, name):
+        """Accumulate wall and CPU time (and peak traced memory) under name"""
+        tracing = tracemalloc.is_tracing()
+        if tracing:
+            if self._peaks:
+                self._peaks[-1] = max(self._peaks[-1], tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+            self._peaks.append(0)
+        wall = time.perf_counter()
+        cpu = time.process_time()
+        try:
+            yield
+        finally:
+            stats = self.stages.setdefault(name, {'calls': 0, 'wall_seconds': 0.0, 'cpu_seconds': 0.0})
+            stats['calls'] += 1
+            stats['wall_seconds'] += time.perf_counter() - wall
+            stats['cpu_seconds'] += time.process_time() - cpu
+            if tracing:
+                peak = max(self._peaks.pop(), tracemalloc.get_traced_memory()[1])
+                stats['peak_memory_bytes'] = max(stats.get('peak_memory_bytes', 0), peak)
+                if self._peaks:
+                    self._peaks[-1] = max(self._peaks[-1], peak)
+                tracemalloc.reset_peak()
+    
+    def count(self, name, value=1):
+        """Add value to counter name"""
+        self.counters[name] = self.counters.get(name, 0) + value
+    
+    @contextmanager
+    def _captured(self):
+        """Run the body under cProfile; nested captures share the outer one"""
+        if self._cprofile is None:
+            yield
+            return
+        self._cprofile_depth += 1
+        if self._cprofile_depth == 1:
+            self._cprofile.enable()
+        try:
+            yield
+        finally:
+            self._cprofile_depth -= 1
+            if self._cprofile_depth == 0:
+                self._cprofile.disable()
+    
+    def instrument(self, owner, attribute, stage, counter=None, capture=False):
+        """Replace owner.attribute with a wrapper timing each call under stage
+
+        counter(profiler, args, result) is called after each call to update
+        the counters; capture=True runs the call under cProfile.
+        """
+        original = getattr(owner, attribute)
+        
+        @functools.wraps(original)
+        def wrapper(*args, **kwargs):
+            with self.stage(stage), (self._captured() if capture else _no_capture()):
+                result = original(*args, **kwargs)
+            if counter is not None:
+                counter(self, args, result)
+            return result
+        
+        self._patched.append((owner, attribute, original))
+        setattr(owner, attribute, wrapper)
+    
+    def instrument_iterator(self, owner, attribute, stage, counter=None):
+        """Replace the generator function owner.attribute with one timing each step under stage
+
+        Calls made while a step is being timed (a recursive walk) are passed
+        through untimed, so no time is counted twice. counter(profiler, args,
+        item) is called for each item.
+        """
+        original = getattr(owner, attribute)
+        active = []
+        
+        @functools.wraps(original)
+        def wrapper(*args, **kwargs):
+            if active:
+                yield from original(*args, **kwargs)
+                return
+            iterator = original(*args, **kwargs)
+            while True:
+                with self.stage(stage):
+                    active.append(True)
+                    try:
+                        item = next(iterator, _EXHAUSTED)
+                    finally:
+                        active.pop()
+                if item is _EXHAUSTED:
+                    return
+                if counter is not None:
+                    counter(self, args, item)
+                yield item
+        
+        self._patched.append((owner, attribute, original))
+        setattr(owner, attribute, wrapper)
+    
+    def count_reads(self, *modules):
+        """Count the files and bytes opened through each module's map_report"""
+        for module in modules:
+            original = module.map_report
+            
+            @contextmanager
+            def map_report(filepath, _original=original):
+                with _original(filepath) as buf:
+                    self.count('files_read')
+                    self.count('bytes_read', len(buf))
+                    yield buf
+            
+            self._patched.append((module, 'map_report', original))
+            module.map_report = map_report
+    
+    def restore(self):
+        """Put every instrumented function back"""
+        while self._patched:
+            owner, attribute, original = self._patched.pop()
+            setattr(owner, attribute, original)
+    
+    def report(self):
+        """The run's stages, counters and throughput as a dict"""
+        wall = time.perf_counter() - self._wall
+        report = {
+            'tool': self.tool,
+            'command': sys.argv,
+            'started': self.started.isoformat(),
+            'python': platform.python_version(),
+            'wall_seconds': wall,
+            'cpu_seconds': time.process_time() - self._cpu,
+            'stages': self.stages,
+            'counters': self.counters,
+            'throughput': {}
+        }
+        if self.counters.get('bytes_read') and wall > 0:
+            report['throughput']['read_bytes_per_second'] = self.counters['bytes_read'] / wall
+        if self.counters.get('bytes_hashed') and self.stages.get('hash', {}).get('wall_seconds'):
+            report['throughput']['hash_bytes_per_second'] = \
+                self.counters['bytes_hashed'] / self.stages['hash']['wall_seconds']
+        
+        if self._cprofile is not None:
+            stats = pstats.Stats(self._cprofile)
+            report['cprofile'] = [
+                {'function': f"{Path(filename).name}:{line}({name})", 'calls': calls,
+                 'total_seconds': total, 'cumulative_seconds': cumulative}
+                for (filename, line, name), (_, calls, total, cumulative, _)
+                in sorted(stats.stats.items(), key=lambda item: -item[1][3])[:TOP_ENTRIES]
+            ]
+        if tracemalloc.is_tracing():
+            report['tracemalloc'] = {
+                'peak_bytes': tracemalloc.get_traced_memory()[1],
+                'top_allocations': [
+                    {'location': f"{Path(s.traceback[0].filename).name}:{s.traceback[0].lineno}",
+                     'bytes': s.size, 'blocks': s.count}
+                    for s in tracemalloc.take_snapshot().statistics('lineno')[:TOP_ENTRIES]
+                ]
+            }
+        return report
+    
+    def finish(self, path, fmt=None):
+        """Restore the instrumented functions and write the report to path"""
+        self.restore()
+        report = self.report()
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+        
+        path = Path(path)
+        fmt = fmt or ('prometheus' if path.suffix in PROMETHEUS_SUFFIXES else 'json')
+        text = prometheus_text(report) if fmt == 'prometheus' else json.dumps(report, indent=2)
+        
+        # Write-then-rename so textfile collectors never read a partial file
+        tmp = path.with_name(path.name + '.tmp')
+        with open(tmp, 'w') as f:
+            f.write(text)
+        os.replace(tmp, path)
+        if self._cprofile is not None:
+            self._cprofile.dump_stats(str(path.with_suffix('.pstats')))
+        print(f"📊 Profile saved to: {path}", file=sys.stderr)
+        return report
+
+@contextmanager
+def _no_capture():
+    yield
+
+def _metric(lines, name, kind, help_text, samples):
+    """Append one Prometheus metric family"""
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} {kind}")
+    for labels, value in samples:
+        label_text = ','.join(f'{k}="{v}"' for k, v in labels.items())
+        lines.append(f"{name}{{{label_text}}} {value!r}")
+
+def prometheus_text(report):
+    """Render a Profiler report in the Prometheus text exposition format"""
+    tool = {'tool': report['tool']}
+    stages = report['stages']
+    lines = []
+    _metric(lines, 'sqef_run_wall_seconds', 'gauge', 'Wall-clock time of the whole run',
+            [(tool, report['wall_seconds'])])
+    _metric(lines, 'sqef_run_cpu_seconds', 'gauge', 'CPU time of the whole run',
+            [(tool, report['cpu_seconds'])])
+    _metric(lines, 'sqef_stage_calls_total', 'counter', 'Calls per stage',
+            [({**tool, 'stage': name}, s['calls']) for name, s in stages.items()])
+    _metric(lines, 'sqef_stage_wall_seconds', 'gauge', 'Inclusive wall-clock time per stage',
+            [({**tool, 'stage': name}, s['wall_seconds']) for name, s in stages.items()])
+    _metric(lines, 'sqef_stage_cpu_seconds', 'gauge', 'Inclusive CPU time per stage',
+            [({**tool, 'stage': name}, s['cpu_seconds']) for name, s in stages.items()])
+    peaks = [({**tool, 'stage': name}, s['peak_memory_bytes'])
+             for name, s in stages.items() if 'peak_memory_bytes' in s]
+    if peaks:
+        _metric(lines, 'sqef_stage_peak_memory_bytes', 'gauge', 'Peak traced memory per stage', peaks)
+    for name, value in report['counters'].items():
+        _metric(lines, f'sqef_{name}_total', 'counter', name.replace('_', ' ').capitalize(),
+                [(tool, value)])
+    for name, value in report['throughput'].items():
+        _metric(lines, f'sqef_{name}', 'gauge', name.replace('_', ' ').capitalize(), [(tool, value)])
+    return '\n'.join(lines) + '\n'
+
+def add_profile_arguments(parser):
+    """Add the --profile options shared by the SQEF tools"""
+    group = parser.add_argument_group('profiling')
+    group.add_argument('--profile', metavar='PATH',
+                       help='Write per-stage timings and I/O counters to PATH')
+    group.add_argument('--profile-format', choices=['json', 'prometheus'],
+                       help='Profile format (default: prometheus for .prom/.txt, otherwise json)')
+    group.add_argument('--profile-capture', action='append', choices=CAPTURE_MODES, default=[],
+                       help='Also capture cProfile statistics or tracemalloc peaks (repeatable)')
+
+def profiler_from_args(args, tool):
+    """A Profiler when --profile was given, otherwise None"""
+    return Profiler(tool, args.profile_capture) if args.profile else None
+
+def count_rows(key=None):
+    """Counter callback adding the length of the result (or result[key]) to rows_parsed"""
+    def counter(profiler, args, result):
+        rows = result if key is None or result is None else result.get(key, ())
+        profiler.count('rows_parsed', len(rows) if rows is not None else 0)
+    return counter
@@ -0,0 +1,427 @@
+#!/usr/bin/env python3
+"""
+SQEF Query Service
+Serves parsed SP 800-22 and SP 800-90B results as JSON over HTTP on localhost
+
+Every report and entropy assessment below the root is parsed once into an
+in-memory index (one concatenated ResultTable plus per-configuration
+arrays). A watcher thread polls the files' size and mtime and re-parses
+only the ones that changed. Encoded responses are kept in an LRU cache
+keyed by index generation, so repeated queries are served without
+touching the index.
+
+Endpoints (all GET, filters are query parameters):
+  /status                          index and cache statistics
+  /configurations  level, key_size
+  /rows            level, key_size, test, ordinal, failing, limit
+  /failing         level, key_size, test, limit (rows with failing=1)
+  /tests           level, key_size, test (pass counts per test name)
+  /entropy         level, key_size, min, max
+"""
+
+import sys
+import json
+import time
+import threading
+import argparse
+from pathlib import Path
+from datetime import datetime
+from collections import OrderedDict
+from urllib.parse import urlsplit, parse_qs
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import numpy as np
+
+from sqef_report_io import map_report, iter_entropy_sections, parse_entropy_section, glob_reports
+from sqef_result_table import ResultTable, PASS_RATE_THRESHOLD
+from sqef_test_summary_generator import get_configuration_from_path
+
+DEFAULT_PORT = 8765
+DEFAULT_CACHE_SIZE = 1024
+DEFAULT_POLL_SECONDS = 2.0
+DEFAULT_ROW_LIMIT = 1000
+
+class QueryError(ValueError):
+    """A malformed query parameter (answered with HTTP 400)"""
+
+def _signature(path):
+    """(size, mtime) used to detect changed files"""
+    stat = path.stat()
+    return stat.st_size, stat.st_mtime_ns
+
+def load_entropy_assessments(entropy_file):
+    """One dict per section of a consolidated entropy-assessment file"""
+    security_level = get_configuration_from_path(entropy_file.name.upper())['security_level']
+    assessments = []
+    with map_report(entropy_file) as buf:
+        for filename, bits, start, end in iter_entropy_sections(buf):
+            values, verdicts = parse_entropy_section(buf, start, end)
+            statuses = list(verdicts.values())
+            if statuses and all(v == 'PASSED' for v in statuses):
+                overall = 'PASSED'
+            elif any(v == 'FAILED' for v in statuses):
+                overall = 'FAILED'
+            else:
+                overall = 'UNKNOWN'
+            assessments.append({
+                'source_file': entropy_file.name,
+                'filename': filename,
+                'security_level': security_level,
+                'key_size': get_configuration_from_path(filename)['key_size'],
+                'bits_per_symbol': bits,
+                'h_original': values.get('h_original'),
+                'h_bitstring': values.get('h_bitstring'),
+                'min_entropy': values.get('min_entropy'),
+                'verdicts': verdicts,
+                'overall_status': overall
+            })
+    return assessments
+
+class Snapshot:
+    """Immutable view of the index used to answer queries"""
+    
+    __slots__ = ('generation', 'loaded', 'configurations', 'table', 'levels', 'key_sizes',
+                 'row_levels', 'row_key_sizes', 'meets_requirement', 'entropy')
+    
+    def __init__(self, generation, configurations, tables, entropy):
+        self.generation = generation
+        self.loaded = datetime.now().isoformat()
+        self.configurations = configurations
+        self.table = ResultTable.concatenate(tables)
+        self.levels = np.array([c['security_level'] for c in configurations], dtype=object)
+        self.key_sizes = np.array([c['key_size'] for c in configurations], dtype=object)
+        self.row_levels = self.levels[self.table.source_index] if configurations else self.levels
+        self.row_key_sizes = self.key_sizes[self.table.source_index] if configurations else self.key_sizes
+        self.meets_requirement = self.table.meets_requirement
+        self.entropy = entropy
+
+class ResultIndex:
+    """Parsed results of one tree, refreshed file by file"""
+    
+    def __init__(self, root_path):
+        self.root_path = Path(root_path)
+        self._reports = {}
+        self._entropy_files = {}
+        self._generation = 0
+        self._lock = threading.Lock()
+        self.snapshot = Snapshot(0, [], [], [])
+    
+    def _directory(self, report_file):
+        try:
+            directory = report_file.parent.relative_to(self.root_path)
+        except ValueError:
+            directory = report_file.parent
+        return str(directory).replace('\\', '/')
+    
+    def _load_report(self, report_file):
+        table = ResultTable.from_report(report_file)
+        config = get_configuration_from_path(report_file.parent)
+        summary = table.summary()
+        configuration = {
+            'directory': self._directory(report_file),
+            'report_file': report_file.name,
+            **config,
+            **summary,
+            'status': 'PASSED' if summary['overall_pass_rate'] >= PASS_RATE_THRESHOLD else 'FAILED'
+        }
+        return configuration, table
+    
+    def refresh(self):
+        """Re-parse new and changed files, drop removed ones; returns files changed"""
+        with self._lock:
+            report_files = [f for f in glob_reports(self.root_path, '*finalAnalysisReport*.txt',
+                                                    recursive=True)
+                            if 'sp800-90b' not in str(f).lower()]
+            entropy_files = glob_reports(self.root_path, 'entropy-assessment-*.txt', recursive=True)
+            
+            changed = 0
+            for files, cache, loader in ((report_files, self._reports, self._load_report),
+                                         (entropy_files, self._entropy_files, load_entropy_assessments)):
+                current = set(files)
+                for stale in set(cache) - current:
+                    del cache[stale]
+                    changed += 1
+                for path in files:
+                    try:
+                        signature = _signature(path)
+                        if path in cache and cache[path][0] == signature:
+                            continue
+                        cache[path] = (signature, loader(path))
+                        changed += 1
+                    except Exception as e:
+                        # Half-written files are retried on the next poll
+                        print(f"⚠️  Could not load {path}: {e}", file=sys.stderr)
+                        cache.pop(path, None)
+            
+            if changed or self._generation == 0:
+                self._generation += 1
+                reports = [self._reports[f][1] for f in sorted(self._reports)]
+                self.snapshot = Snapshot(
+                    self._generation,
+                    [configuration for configuration, _ in reports],
+                    [table for _, table in reports],
+                    [a for f in sorted(self._entropy_files) for a in self._entropy_files[f][1]]
+                )
+            return changed
+
+def _text(params, name):
+    values = params.get(name)
+    return values[-1] if values else None
+
+def _number(params, name, kind=float):
+    value = _text(params, name)
+    if value is None:
+        return None
+    try:
+        return kind(value)
+    except ValueError:
+        raise QueryError(f"{name} must be a number, got {value!r}")
+
+def _flag(params, name):
+    value = _text(params, name)
+    return value is not None and value.lower() not in ('0', 'false', 'no', '')
+
+def _configuration_mask(params, levels, key_sizes):
+    mask = np.ones(len(levels), dtype=bool)
+    level = _text(params, 'level')
+    key_size = _text(params, 'key_size')
+    if level:
+        mask &= levels == level.upper()
+    if key_size:
+        mask &= key_sizes == key_size
+    return mask
+
+def query_configurations(snapshot, params):
+    """Configurations filtered by level and key size"""
+    mask = _configuration_mask(params, snapshot.levels, snapshot.key_sizes)
+    return [snapshot.configurations[i] for i in np.flatnonzero(mask)]
+
+def _row_mask(snapshot, params):
+    rows = snapshot.table.rows
+    mask = _configuration_mask(params, snapshot.row_levels, snapshot.row_key_sizes)
+    test = _text(params, 'test')
+    ordinal = _number(params, 'ordinal', int)
+    if test:
+        mask &= rows['test_name'] == test
+    if ordinal is not None:
+        mask &= rows['ordinal'] == ordinal
+    if _flag(params, 'failing'):
+        mask &= ~snapshot.meets_requirement
+    return mask
+
+def query_rows(snapshot, params):
+    """Report rows filtered by configuration, test name, ordinal and failure"""
+    limit = _number(params, 'limit', int)
+    if limit is None:
+        limit = DEFAULT_ROW_LIMIT
+    elif limit < 1:
+        raise QueryError(f"limit must be at least 1, got {limit}")
+    indexes = np.flatnonzero(_row_mask(snapshot, params))
+    table = snapshot.table
+    rows = []
+    for i in indexes[:limit]:
+        configuration = snapshot.configurations[table.source_index[i]]
+        rows.append({
+            'directory': configuration['directory'],
+            'security_level': configuration['security_level'],
+            'key_size': configuration['key_size'],
+            **table.row_dict(i)
+        })
+    return {'total': len(indexes), 'returned': len(rows), 'rows': rows}
+
+def query_failing(snapshot, params):
+    """Rows that miss the pass-rate requirement or carry an asterisk"""
+    return query_rows(snapshot, {**params, 'failing': ['1']})
+
+def query_tests(snapshot, params):
+    """Row and failure counts and mean pass rate per test name"""
+    mask = _row_mask(snapshot, params)
+    table = snapshot.table
+    names = table.rows['test_name'][mask]
+    if not len(names):
+        return []
+    unique, inverse = np.unique(names, return_inverse=True)
+    rows = np.bincount(inverse, minlength=len(unique))
+    failing = np.bincount(inverse, weights=~snapshot.meets_requirement[mask], minlength=len(unique))
+    pass_rate = np.bincount(inverse, weights=table.pass_rate[mask], minlength=len(unique)) / rows
+    return [{'test_name': str(name), 'rows': int(n), 'failing_rows': int(f),
+             'mean_pass_rate': float(rate)}
+            for name, n, f, rate in zip(unique, rows, failing, pass_rate)]
+
+def query_entropy(snapshot, params):
+    """Entropy assessments filtered by level, key size and min-entropy range"""
+    level = _text(params, 'level')
+    key_size = _text(params, 'key_size')
+    low = _number(params, 'min')
+    high = _number(params, 'max')
+    results = []
+    for a in snapshot.entropy:
+        if level and a['security_level'] != level.upper():
+            continue
+        if key_size and a['key_size'] != key_size:
+            continue
+        if low is not None and (a['min_entropy'] is None or a['min_entropy'] < low):
+            continue
+        if high is not None and (a['min_entropy'] is None or a['min_entropy'] > high):
+            continue
+        results.append(a)
+    return results
+
+QUERIES = {
+    '/configurations': query_configurations,
+    '/rows': query_rows,
+    '/failing': query_failing,
+    '/tests': query_tests,
+    '/entropy': query_entropy
+}
+
+class ResponseCache:
+    """LRU cache of encoded responses"""
+    
+    def __init__(self, maxsize=DEFAULT_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key):
+        with self._lock:
+            body = self._entries.get(key)
+            if body is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return body
+    
+    def put(self, key, body):
+        with self._lock:
+            self._entries[key] = body
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+    
+    def stats(self):
+        return {'entries': len(self._entries), 'maxsize': self.maxsize,
+                'hits': self.hits, 'misses': self.misses}
+
+def answer(index, cache, path, query_string):
+    """(HTTP status, encoded JSON body) for one request"""
+    snapshot = index.snapshot
+    if path == '/status':
+        return 200, json.dumps({
+            'root': str(index.root_path),
+            'generation': snapshot.generation,
+            'loaded': snapshot.loaded,
+            'configurations': len(snapshot.configurations),
+            'rows': len(snapshot.table),
+            'entropy_assessments': len(snapshot.entropy),
+            'cache': cache.stats()
+        }, indent=2).encode()
+    
+    handler = QUERIES.get(path)
+    if handler is None:
+        return 404, json.dumps({'error': f"unknown endpoint {path}",
+                                'endpoints': ['/status'] + sorted(QUERIES)}).encode()
+    
+    params = parse_qs(query_string)
+    key = (snapshot.generation, path, tuple(sorted((k, tuple(v)) for k, v in params.items())))
+    body = cache.get(key)
+    if body is None:
+        try:
+            body = json.dumps(handler(snapshot, params), indent=2).encode()
+        except QueryError as e:
+            return 400, json.dumps({'error': str(e)}).encode()
+        cache.put(key, body)
+    return 200, body
+
+def make_handler(index, cache, quiet=False):
+    """Request handler class bound to an index and cache"""
+    class QueryHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urlsplit(self.path)
+            status, body = answer(index, cache, url.path.rstrip('/') or '/', url.query)
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        
+        def log_message(self, format, *args):
+            if not quiet:
+                super().log_message(format, *args)
+    
+    return QueryHandler
+
+def watch(index, cache, interval, stop):
+    """Poll for changed files until stop is set"""
+    while not stop.wait(interval):
+        start = time.perf_counter()
+        changed = index.refresh()
+        if changed:
+            cache.clear()
+            print(f"🔄 Reloaded {changed} changed files in "
+                  f"{(time.perf_counter() - start) * 1000:.1f} ms "
+                  f"(generation {index.snapshot.generation})", file=sys.stderr)
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(
+        description='Serve parsed SQEF NIST results as JSON over HTTP on localhost',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  %(prog)s ..
+  %(prog)s .. --port 9000 --cache-size 4096 --poll 10
+  curl "http://127.0.0.1:8765/failing?level=MAXIMUM&test=NonOverlappingTemplate"
+  curl "http://127.0.0.1:8765/entropy?min=7.9&max=7.99"
+        """
+    )
+    parser.add_argument('root', help='Repository or archive root directory')
+    parser.add_argument('--host', default='127.0.0.1', help='Address to bind (default: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT,
+                        help=f'Port to listen on (default: {DEFAULT_PORT})')
+    parser.add_argument('--cache-size', type=int, default=DEFAULT_CACHE_SIZE,
+                        help=f'Cached responses (default: {DEFAULT_CACHE_SIZE})')
+    parser.add_argument('--poll', type=float, default=DEFAULT_POLL_SECONDS,
+                        help=f'Seconds between file change checks, 0 to disable (default: {DEFAULT_POLL_SECONDS})')
+    parser.add_argument('--quiet', action='store_true', help='Do not log requests')
+    
+    args = parser.parse_args()
+    
+    root_path = Path(args.root)
+    if not root_path.exists():
+        print(f"❌ Error: Directory does not exist: {root_path}")
+        return 1
+    
+    start = time.perf_counter()
+    index = ResultIndex(root_path)
+    index.refresh()
+    snapshot = index.snapshot
+    print(f"✅ Indexed {len(snapshot.configurations)} configurations, {len(snapshot.table)} rows "
+          f"and {len(snapshot.entropy)} entropy assessments in "
+          f"{(time.perf_counter() - start) * 1000:.1f} ms")
+    
+    cache = ResponseCache(args.cache_size)
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(index, cache, args.quiet))
+    stop = threading.Event()
+    if args.poll > 0:
+        threading.Thread(target=watch, args=(index, cache, args.poll, stop), daemon=True).start()
+    
+    print(f"📊 Serving on http://{args.host}:{server.server_address[1]}/ (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nStopping")
+    finally:
+        stop.set()
+        server.server_close()
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
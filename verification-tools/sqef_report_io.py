@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+SQEF Report I/O
+Memory-mapped access to NIST SP 800-22 / SP 800-90B output files
+Parsers work on raw bytes with precompiled patterns and only decode matched fields
+Archived reports compressed as .gz, .xz or .zst (zstandard, optional) are read
+as streams and parsed in the same way
+"""
+
+import gzip
+import lzma
+import mmap
+import os
+import re
+from pathlib import Path
+from contextlib import contextmanager
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# One result row of a finalAnalysisReport.txt:
+#  C1..C10 counts, P-VALUE (or "----"), optional uniformity '*',
+#  PROPORTION passed/total, optional proportion '*', STATISTICAL TEST name
+REPORT_ROW_RE = re.compile(
+    rb'^[ \t]*((?:\d+[ \t]+){10})(\d+\.\d+|-+)[ \t]*(\*?)[ \t]*'
+    rb'(\d+)/(\d+)[ \t]*(\*?)[ \t]*(\S+)[ \t]*\r?$',
+    re.MULTILINE
+)
+
+# Section header of a consolidated entropy-assessment file: "<file>.bin <bits>"
+ENTROPY_HEADER_RE = re.compile(rb'^(.*\.bin)[ \t]+(\d+)[ \t]*\r?$', re.MULTILINE)
+
+H_ORIGINAL_RE = re.compile(rb'H_original:\s*(\d+\.?\d*)')
+H_BITSTRING_RE = re.compile(rb'H_bitstring:\s*(\d+\.?\d*)')
+MIN_ENTROPY_RE = re.compile(rb'min\([^)\n]+\):\s*(\d+\.?\d*)')
+
+# freq.txt record: "BITSREAD = 1000000 0s = 500190 1s = 499810"
+BITSREAD_RE = re.compile(rb'BITSREAD\s*=\s*(\d+)\s+0s\s*=\s*(\d+)\s+1s\s*=\s*(\d+)')
+
+NUMBER_RE = re.compile(rb'\d+\.?\d*')
+
+ENTROPY_TESTS = {
+    'chi_square': b'chi square tests',
+    'iid_permutation': b'IID permutation tests',
+    'lrs': b'length of longest repeated substring test'
+}
+
+COMPRESSED_SUFFIXES = ('.gz', '.xz', '.zst')
+
+def is_compressed(filepath):
+    """True for .gz, .xz and .zst files"""
+    return Path(filepath).suffix.lower() in COMPRESSED_SUFFIXES
+
+def logical_name(filepath):
+    """File name without its compression suffix (report.txt.gz -> report.txt)"""
+    name = Path(filepath).name
+    return name[:-len(Path(name).suffix)] if is_compressed(name) else name
+
+def open_stream(filepath):
+    """Open a file for binary reading, decompressing .gz/.xz/.zst transparently"""
+    suffix = Path(filepath).suffix.lower()
+    if suffix == '.gz':
+        return gzip.open(filepath, 'rb')
+    if suffix == '.xz':
+        return lzma.open(filepath, 'rb')
+    if suffix == '.zst':
+        if zstandard is None:
+            raise ImportError(f"reading {filepath} requires the zstandard package (pip install zstandard)")
+        return zstandard.ZstdDecompressor().stream_reader(open(filepath, 'rb'), closefd=True)
+    return open(filepath, 'rb')
+
+def find_variant(filepath):
+    """filepath if it exists, else its first existing compressed sibling, else None"""
+    filepath = Path(filepath)
+    for candidate in [filepath] + [filepath.with_name(filepath.name + s) for s in COMPRESSED_SUFFIXES]:
+        if candidate.exists():
+            return candidate
+    return None
+
+def glob_reports(directory, pattern, recursive=False):
+    """Sorted files matching pattern, plain or with a compression suffix"""
+    directory = Path(directory)
+    search = directory.rglob if recursive else directory.glob
+    found = set()
+    for suffix in ('',) + COMPRESSED_SUFFIXES:
+        found.update(p for p in search(pattern + suffix) if p.is_file())
+    return sorted(found)
+
+@contextmanager
+def map_report(filepath):
+    """Map a report file read-only; yields a bytes-like buffer (empty bytes for empty files)
+
+    Compressed files are decompressed into memory instead; reports are small
+    and compress by an order of magnitude, so this is cheaper than mapping
+    the raw file from slow storage.
+    """
+    if is_compressed(filepath):
+        with open_stream(filepath) as f:
+            yield f.read()
+        return
+    with open(filepath, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            # mmap refuses zero-length files
+            yield b''
+            return
+        buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            yield buf
+        finally:
+            buf.close()
+
+def iter_report_rows(buf):
+    """Yield one tuple per SP 800-22 result row:
+    (counts, p_value, uniformity_flag, passed, total, proportion_flag, test_name)"""
+    for m in REPORT_ROW_RE.finditer(buf):
+        counts, p_value, uni_flag, passed, total, prop_flag, name = m.groups()
+        try:
+            p_value = float(p_value)
+        except ValueError:
+            p_value = None
+        yield ([int(c) for c in counts.split()], p_value, bool(uni_flag),
+               int(passed), int(total), bool(prop_flag), name.decode('ascii', 'replace'))
+
+def iter_entropy_sections(buf):
+    """Yield (filename, bits_per_symbol, start, end) for each section of an entropy file"""
+    headers = list(ENTROPY_HEADER_RE.finditer(buf))
+    for i, m in enumerate(headers):
+        end = headers[i + 1].start() if i + 1 < len(headers) else len(buf)
+        yield (m.group(1).strip().decode('utf-8', 'ignore'), int(m.group(2)),
+               m.end(), end)
+
+def parse_entropy_section(buf, start, end):
+    """Extract H values and test verdicts from buf[start:end] without copying the section"""
+    values = {}
+    for key, pattern in (('h_original', H_ORIGINAL_RE),
+                         ('h_bitstring', H_BITSTRING_RE),
+                         ('min_entropy', MIN_ENTROPY_RE)):
+        m = pattern.search(buf, start, end)
+        if m:
+            values[key] = float(m.group(1))
+    
+    verdicts = {}
+    for test_name, phrase in ENTROPY_TESTS.items():
+        if buf.find(b'Passed ' + phrase, start, end) != -1:
+            verdicts[test_name] = 'PASSED'
+        elif buf.find(b'Failed ' + phrase, start, end) != -1:
+            verdicts[test_name] = 'FAILED'
+    return values, verdicts
+
+def count_token(buf, token):
+    """Count non-overlapping occurrences of token in buf (mmap has no count() before 3.13)"""
+    count = 0
+    pos = buf.find(token)
+    while pos != -1:
+        count += 1
+        pos = buf.find(token, pos + len(token))
+    return count
+
+def iter_bitsread_records(buf):
+    """Yield (bits_read, zeros, ones) for each BITSREAD line of a freq.txt file"""
+    for m in BITSREAD_RE.finditer(buf):
+        yield int(m.group(1)), int(m.group(2)), int(m.group(3))
+
+def iter_report_lines(buf):
+    """Yield the non-empty, non-comment lines of buf as bytes, one at a time"""
+    start = 0
+    size = len(buf)
+    while start < size:
+        end = buf.find(b'\n', start)
+        if end == -1:
+            end = size
+        if buf[start:start + 1] != b'#':
+            line = buf[start:end]
+            if line.strip():
+                yield line
+        start = end + 1
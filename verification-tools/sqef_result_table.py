@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+SQEF Result Table
+Columnar (NumPy structured array) representation of finalAnalysisReport.txt
+Keeps every row - all 148 NonOverlappingTemplate instances, both CumulativeSums,
+every RandomExcursions state - together with its C1-C10 p-value histogram
+"""
+
+from pathlib import Path
+
+import numpy as np
+
+from sqef_report_io import map_report, count_token, iter_report_rows
+
+# NIST requires >=96% of sequences to pass each test
+PASS_RATE_THRESHOLD = 0.96
+
+RESULT_ROW_DTYPE = np.dtype([
+    ('ordinal', np.int16),            # 1-based instance of this test name within the report
+    ('test_name', 'U32'),
+    ('counts', np.int32, (10,)),      # C1..C10 p-value histogram
+    ('p_value', np.float64),          # uniformity P-VALUE, NaN when printed as "----"
+    ('passed', np.int32),
+    ('total', np.int32),
+    ('uniformity_flag', np.bool_),    # '*' after the P-VALUE
+    ('proportion_flag', np.bool_)     # '*' after the PROPORTION
+])
+
+class ResultTable:
+    """All result rows of one or more SP 800-22 reports"""
+    
+    __slots__ = ('rows', 'sources', 'source_index')
+    
+    def __init__(self, rows, sources=None, source_index=None):
+        self.rows = rows
+        self.sources = sources if sources is not None else []
+        if source_index is None:
+            source_index = np.zeros(len(rows), dtype=np.int32)
+        self.source_index = source_index
+    
+    def __len__(self):
+        return len(self.rows)
+    
+    @classmethod
+    def from_report(cls, filepath):
+        """Load every result row of a finalAnalysisReport.txt"""
+        filepath = Path(filepath)
+        with map_report(filepath) as buf:
+            # Each row carries exactly one '/', so this is an upper bound
+            rows = np.empty(count_token(buf, b'/'), dtype=RESULT_ROW_DTYPE)
+            seen = {}
+            n = 0
+            for (counts, p_value, uniformity_flag, passed, total,
+                 proportion_flag, test_name) in iter_report_rows(buf):
+                seen[test_name] = seen.get(test_name, 0) + 1
+                rows[n] = (seen[test_name], test_name, counts,
+                           np.nan if p_value is None else p_value,
+                           passed, total, uniformity_flag, proportion_flag)
+                n += 1
+        return cls(rows[:n].copy(), [str(filepath)])
+    
+    @classmethod
+    def concatenate(cls, tables):
+        """Stack several tables; source_index maps each row back to its report"""
+        tables = list(tables)
+        if not tables:
+            return cls(np.empty(0, dtype=RESULT_ROW_DTYPE))
+        sources = []
+        indexes = []
+        for table in tables:
+            indexes.append(table.source_index + len(sources))
+            sources.extend(table.sources)
+        return cls(np.concatenate([t.rows for t in tables]), sources,
+                   np.concatenate(indexes).astype(np.int32))
+    
+    @property
+    def pass_rate(self):
+        return self.rows['passed'] / np.maximum(self.rows['total'], 1)
+    
+    @property
+    def has_asterisk(self):
+        return self.rows['uniformity_flag'] | self.rows['proportion_flag']
+    
+    @property
+    def meets_requirement(self):
+        return (self.pass_rate >= PASS_RATE_THRESHOLD) & ~self.has_asterisk
+    
+    def unique_test_names(self):
+        """Test names in order of first appearance"""
+        return list(dict.fromkeys(self.rows['test_name'].tolist()))
+    
+    def summary(self):
+        """Overall counts, counting each row as one individual test"""
+        total_tests = len(self.rows)
+        passed_tests = int(self.meets_requirement.sum())
+        return {
+            'total_tests': total_tests,
+            'passed_tests': passed_tests,
+            'failed_tests': total_tests - passed_tests,
+            'overall_pass_rate': passed_tests / total_tests if total_tests else 0,
+            'unique_test_types': len(self.unique_test_names())
+        }
+    
+    def row_dict(self, i):
+        """One row as a JSON-ready dict"""
+        row = self.rows[i]
+        passed = int(row['passed'])
+        total = int(row['total'])
+        pass_rate = passed / total if total else 0.0
+        has_asterisk = bool(row['uniformity_flag'] or row['proportion_flag'])
+        p_value = float(row['p_value'])
+        return {
+            'test_name': str(row['test_name']),
+            'ordinal': int(row['ordinal']),
+            'counts': row['counts'].tolist(),
+            'p_value': None if np.isnan(p_value) else p_value,
+            'passed': passed,
+            'total': total,
+            'pass_rate': pass_rate,
+            'percentage': f"{pass_rate*100:.2f}%",
+            'uniformity_flag': bool(row['uniformity_flag']),
+            'proportion_flag': bool(row['proportion_flag']),
+            'meets_requirement': pass_rate >= PASS_RATE_THRESHOLD and not has_asterisk
+        }
+    
+    def to_records(self):
+        """Every row as a list of JSON-ready dicts, in report order"""
+        return [self.row_dict(i) for i in range(len(self.rows))]
+    
+    def first_row_indexes(self):
+        """Index of the first row of each test name (the legacy one-entry-per-test view)"""
+        first = {}
+        for i, name in enumerate(self.rows['test_name'].tolist()):
+            if name not in first:
+                first[name] = i
+        return first
+    
+    def select(self, mask):
+        """Rows matching a boolean mask, keeping their source mapping"""
+        return ResultTable(self.rows[mask], self.sources, self.source_index[mask])
+
+def load_result_tables(report_files):
+    """Load many reports into a single concatenated table"""
+    return ResultTable.concatenate(ResultTable.from_report(f) for f in report_files)
@@ -0,0 +1,363 @@
+#!/usr/bin/env python3
+"""
+SQEF Results Database
+Ingests parsed SP 800-22 reports, SP 800-90B assessments and checksum manifests
+into an indexed SQLite database for fast cross-configuration queries
+"""
+
+import sys
+import json
+import time
+import sqlite3
+import argparse
+from pathlib import Path
+from datetime import datetime
+
+from sqef_report_io import map_report, iter_entropy_sections, parse_entropy_section, glob_reports
+from sqef_result_table import ResultTable
+from sqef_test_summary_generator import get_configuration_from_path
+
+DEFAULT_DB = 'sqef_results.db'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS configurations (
+    id INTEGER PRIMARY KEY,
+    directory TEXT UNIQUE NOT NULL,
+    security_level TEXT NOT NULL,
+    expansion_ratio TEXT,
+    key_size TEXT NOT NULL,
+    num_keys INTEGER,
+    report_file TEXT,
+    total_tests INTEGER,
+    passed_tests INTEGER,
+    overall_pass_rate REAL,
+    status TEXT,
+    ingested TEXT
+);
+CREATE TABLE IF NOT EXISTS test_rows (
+    id INTEGER PRIMARY KEY,
+    configuration_id INTEGER NOT NULL REFERENCES configurations(id) ON DELETE CASCADE,
+    row_index INTEGER NOT NULL,
+    test_name TEXT NOT NULL,
+    ordinal INTEGER NOT NULL,
+    p_value REAL,
+    passed INTEGER NOT NULL,
+    total INTEGER NOT NULL,
+    pass_rate REAL NOT NULL,
+    uniformity_flag INTEGER NOT NULL,
+    proportion_flag INTEGER NOT NULL,
+    meets_requirement INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS histograms (
+    test_row_id INTEGER PRIMARY KEY REFERENCES test_rows(id) ON DELETE CASCADE,
+    c1 INTEGER, c2 INTEGER, c3 INTEGER, c4 INTEGER, c5 INTEGER,
+    c6 INTEGER, c7 INTEGER, c8 INTEGER, c9 INTEGER, c10 INTEGER
+);
+CREATE TABLE IF NOT EXISTS entropy_assessments (
+    id INTEGER PRIMARY KEY,
+    source_file TEXT NOT NULL,
+    filename TEXT NOT NULL,
+    security_level TEXT NOT NULL,
+    key_size TEXT NOT NULL,
+    bits_per_symbol INTEGER,
+    h_original REAL,
+    h_bitstring REAL,
+    min_entropy REAL,
+    chi_square_test TEXT,
+    iid_test TEXT,
+    lrs_test TEXT,
+    overall_status TEXT,
+    UNIQUE (source_file, filename)
+);
+CREATE TABLE IF NOT EXISTS checksums (
+    id INTEGER PRIMARY KEY,
+    relative_path TEXT UNIQUE NOT NULL,
+    filename TEXT NOT NULL,
+    security_level TEXT NOT NULL,
+    key_size TEXT NOT NULL,
+    size_bytes INTEGER,
+    sha256 TEXT NOT NULL,
+    last_modified TEXT,
+    manifest TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_configurations_level ON configurations(security_level);
+CREATE INDEX IF NOT EXISTS idx_configurations_key_size ON configurations(key_size);
+CREATE INDEX IF NOT EXISTS idx_test_rows_name ON test_rows(test_name, ordinal);
+CREATE INDEX IF NOT EXISTS idx_test_rows_configuration ON test_rows(configuration_id);
+CREATE INDEX IF NOT EXISTS idx_test_rows_failing ON test_rows(meets_requirement, test_name);
+CREATE INDEX IF NOT EXISTS idx_entropy_level_size ON entropy_assessments(security_level, key_size);
+CREATE INDEX IF NOT EXISTS idx_checksums_level_size ON checksums(security_level, key_size);
+"""
+
+# Key size in bits, for ordering: key_size is text such as '256-bit', '1KB' or '16MB'
+KEY_BITS = """(CAST({column} AS INTEGER) *
+               CASE WHEN {column} LIKE '%MB' THEN 8388608 WHEN {column} LIKE '%KB' THEN 8192 ELSE 1 END)"""
+
+# Canned audit queries for the CLI; parameters are bound by name
+QUERIES = {
+    'configurations': f"""
+        SELECT directory, security_level, key_size, passed_tests, total_tests,
+               ROUND(overall_pass_rate * 100, 2) AS pass_percentage, status
+        FROM configurations
+        WHERE (:level IS NULL OR security_level = :level)
+          AND (:key_size IS NULL OR key_size = :key_size)
+        ORDER BY security_level, {KEY_BITS.format(column='key_size')}
+    """,
+    'failing-rows': f"""
+        SELECT c.security_level, c.key_size, t.test_name, t.ordinal,
+               t.passed || '/' || t.total AS proportion, t.p_value,
+               t.uniformity_flag, t.proportion_flag
+        FROM test_rows t JOIN configurations c ON c.id = t.configuration_id
+        WHERE t.meets_requirement = 0
+          AND (:level IS NULL OR c.security_level = :level)
+          AND (:key_size IS NULL OR c.key_size = :key_size)
+          AND (:test IS NULL OR t.test_name = :test)
+        ORDER BY c.security_level, {KEY_BITS.format(column='c.key_size')}, t.row_index
+    """,
+    'repeat-failures': """
+        SELECT t.test_name, t.ordinal, COUNT(*) AS failures,
+               GROUP_CONCAT(c.key_size, ', ') AS key_sizes
+        FROM test_rows t JOIN configurations c ON c.id = t.configuration_id
+        WHERE t.meets_requirement = 0
+          AND (:level IS NULL OR c.security_level = :level)
+          AND (:key_size IS NULL OR c.key_size = :key_size)
+          AND (:test IS NULL OR t.test_name = :test)
+        GROUP BY t.test_name, t.ordinal
+        HAVING COUNT(*) >= :min_count
+        ORDER BY failures DESC, t.test_name, t.ordinal
+    """,
+    'entropy': """
+        SELECT security_level, key_size, filename, min_entropy, overall_status
+        FROM entropy_assessments
+        WHERE (:level IS NULL OR security_level = :level)
+          AND (:key_size IS NULL OR key_size = :key_size)
+          AND (:below IS NULL OR min_entropy < :below)
+        ORDER BY min_entropy
+    """,
+    'checksums': """
+        SELECT security_level, key_size, relative_path, size_bytes, sha256
+        FROM checksums
+        WHERE (:level IS NULL OR security_level = :level)
+          AND (:key_size IS NULL OR key_size = :key_size)
+        ORDER BY relative_path
+    """
+}
+
+def connect(db_path):
+    """Open (and if needed create) the results database"""
+    conn = sqlite3.connect(str(db_path))
+    conn.execute('PRAGMA foreign_keys = ON')
+    conn.execute('PRAGMA journal_mode = WAL')
+    conn.executescript(SCHEMA)
+    return conn
+
+def ingest_report(conn, report_file, root_path):
+    """Insert (or replace) one configuration and all of its report rows"""
+    directory = report_file.parent
+    try:
+        rel_dir = str(directory.relative_to(root_path))
+    except ValueError:
+        rel_dir = str(directory)
+    rel_dir = rel_dir.replace('\\', '/')
+    config = get_configuration_from_path(directory)
+    table = ResultTable.from_report(report_file)
+    summary = table.summary()
+    
+    conn.execute('DELETE FROM configurations WHERE directory = ?', (rel_dir,))
+    cursor = conn.execute(
+        """INSERT INTO configurations (directory, security_level, expansion_ratio, key_size,
+               num_keys, report_file, total_tests, passed_tests, overall_pass_rate, status, ingested)
+           VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+        (rel_dir, config['security_level'], config['expansion_ratio'], config['key_size'],
+         config.get('num_keys'), report_file.name, summary['total_tests'],
+         summary['passed_tests'], summary['overall_pass_rate'],
+         'PASSED' if summary['overall_pass_rate'] >= 0.96 else 'FAILED',
+         datetime.now().isoformat())
+    )
+    configuration_id = cursor.lastrowid
+    
+    records = table.to_records()
+    first_id = conn.execute('SELECT COALESCE(MAX(id), 0) + 1 FROM test_rows').fetchone()[0]
+    conn.executemany(
+        """INSERT INTO test_rows (id, configuration_id, row_index, test_name, ordinal, p_value,
+               passed, total, pass_rate, uniformity_flag, proportion_flag, meets_requirement)
+           VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+        [(first_id + i, configuration_id, i, r['test_name'], r['ordinal'], r['p_value'],
+          r['passed'], r['total'], r['pass_rate'], int(r['uniformity_flag']),
+          int(r['proportion_flag']), int(r['meets_requirement']))
+         for i, r in enumerate(records)]
+    )
+    conn.executemany(
+        'INSERT INTO histograms VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+        [(first_id + i, *r['counts']) for i, r in enumerate(records)]
+    )
+    return len(records)
+
+def ingest_entropy_file(conn, entropy_file):
+    """Insert every section of a consolidated entropy-assessment file"""
+    security_level = get_configuration_from_path(entropy_file.name.upper())['security_level']
+    rows = []
+    with map_report(entropy_file) as buf:
+        for filename, bits, start, end in iter_entropy_sections(buf):
+            values, verdicts = parse_entropy_section(buf, start, end)
+            statuses = list(verdicts.values())
+            if statuses and all(v == 'PASSED' for v in statuses):
+                overall = 'PASSED'
+            elif any(v == 'FAILED' for v in statuses):
+                overall = 'FAILED'
+            else:
+                overall = 'UNKNOWN'
+            rows.append((
+                str(entropy_file.name), filename, security_level,
+                get_configuration_from_path(filename)['key_size'], bits,
+                values.get('h_original'), values.get('h_bitstring'), values.get('min_entropy'),
+                verdicts.get('chi_square'), verdicts.get('iid_permutation'), verdicts.get('lrs'),
+                overall
+            ))
+    conn.executemany(
+        """INSERT OR REPLACE INTO entropy_assessments (source_file, filename, security_level,
+               key_size, bits_per_symbol, h_original, h_bitstring, min_entropy,
+               chi_square_test, iid_test, lrs_test, overall_status)
+           VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+        rows
+    )
+    return len(rows)
+
+def ingest_checksum_manifest(conn, manifest_file):
+    """Insert the file entries of a sqef_checksums_*.json manifest"""
+    with open(manifest_file, 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+    rows = []
+    for entry in manifest.get('files', []):
+        config = get_configuration_from_path(entry['relative_path'])
+        rows.append((entry['relative_path'], entry['filename'], config['security_level'],
+                     config['key_size'], entry.get('size_bytes'), entry['sha256'],
+                     entry.get('last_modified'), manifest_file.name))
+    conn.executemany(
+        """INSERT OR REPLACE INTO checksums (relative_path, filename, security_level, key_size,
+               size_bytes, sha256, last_modified, manifest)
+           VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
+        rows
+    )
+    return len(rows)
+
+def ingest_tree(conn, root_path):
+    """Ingest every report, entropy file and checksum manifest below root_path"""
+    root_path = Path(root_path)
+    counts = {'configurations': 0, 'test_rows': 0, 'entropy_assessments': 0, 'checksums': 0}
+    
+    with conn:
+        for report_file in glob_reports(root_path, '*finalAnalysisReport*.txt', recursive=True):
+            if 'sp800-90b' in str(report_file).lower():
+                continue
+            counts['test_rows'] += ingest_report(conn, report_file, root_path)
+            counts['configurations'] += 1
+        
+        for entropy_file in glob_reports(root_path, 'entropy-assessment-*.txt', recursive=True):
+            counts['entropy_assessments'] += ingest_entropy_file(conn, entropy_file)
+        
+        for manifest_file in sorted(root_path.rglob('sqef_checksums_*.json')):
+            counts['checksums'] += ingest_checksum_manifest(conn, manifest_file)
+    
+    return counts
+
+def run_query(conn, name, **params):
+    """Run a canned query; missing parameters are bound as NULL (no filter)"""
+    sql = QUERIES[name]
+    bound = {'level': None, 'key_size': None, 'test': None, 'below': None, 'min_count': 1}
+    bound.update({k: v for k, v in params.items() if v is not None})
+    cursor = conn.execute(sql, bound)
+    columns = [d[0] for d in cursor.description]
+    return columns, cursor.fetchall()
+
+def run_sql(conn, sql):
+    """Run an ad-hoc read-only SQL statement"""
+    conn.execute('PRAGMA query_only = ON')
+    cursor = conn.execute(sql)
+    columns = [d[0] for d in cursor.description] if cursor.description else []
+    return columns, cursor.fetchall()
+
+def print_rows(columns, rows, as_json=False):
+    """Print query results as an aligned table or JSON"""
+    if as_json:
+        print(json.dumps([dict(zip(columns, row)) for row in rows], indent=2))
+        return
+    if not columns:
+        return
+    widths = [len(c) for c in columns]
+    text_rows = [['' if v is None else str(v) for v in row] for row in rows]
+    for row in text_rows:
+        widths = [max(w, len(v)) for w, v in zip(widths, row)]
+    print('  '.join(c.ljust(w) for c, w in zip(columns, widths)))
+    print('  '.join('-' * w for w in widths))
+    for row in text_rows:
+        print('  '.join(v.ljust(w) for v, w in zip(row, widths)))
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(
+        description='Store and query SQEF NIST results in SQLite',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  %(prog)s ingest ..
+  %(prog)s query configurations --level MAXIMUM
+  %(prog)s query repeat-failures --level ENHANCED --test NonOverlappingTemplate --min-count 3
+  %(prog)s query entropy --below 7.965
+  %(prog)s sql "SELECT key_size, AVG(p_value) FROM test_rows JOIN configurations c ON c.id = configuration_id GROUP BY key_size"
+        """
+    )
+    parser.add_argument('--db', default=DEFAULT_DB, help=f'Database file (default: {DEFAULT_DB})')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    
+    ingest_parser = subparsers.add_parser('ingest', help='Ingest a results tree')
+    ingest_parser.add_argument('root', help='Repository or archive root directory')
+    
+    query_parser = subparsers.add_parser('query', help='Run a canned audit query')
+    query_parser.add_argument('name', choices=sorted(QUERIES))
+    query_parser.add_argument('--level', type=str.upper, help='Security level filter')
+    query_parser.add_argument('--key-size', help='Key size filter (e.g. 256-bit, 1KB, 16MB)')
+    query_parser.add_argument('--test', help='Statistical test name filter')
+    query_parser.add_argument('--below', type=float, help='Maximum min-entropy (entropy query)')
+    query_parser.add_argument('--min-count', type=int, help='Minimum failures (repeat-failures)')
+    query_parser.add_argument('--json', action='store_true', help='Print results as JSON')
+    
+    sql_parser = subparsers.add_parser('sql', help='Run a read-only SQL statement')
+    sql_parser.add_argument('statement')
+    sql_parser.add_argument('--json', action='store_true', help='Print results as JSON')
+    
+    args = parser.parse_args()
+    
+    conn = connect(args.db)
+    start = time.perf_counter()
+    
+    if args.command == 'ingest':
+        root_path = Path(args.root)
+        if not root_path.exists():
+            print(f"❌ Error: Directory does not exist: {root_path}")
+            return 1
+        counts = ingest_tree(conn, root_path)
+        elapsed = (time.perf_counter() - start) * 1000
+        print(f"✅ Ingested into {args.db} in {elapsed:.1f} ms:")
+        for table_name, count in counts.items():
+            print(f"  {table_name}: {count}")
+    elif args.command == 'query':
+        columns, rows = run_query(conn, args.name, level=args.level, key_size=args.key_size,
+                                  test=args.test, below=args.below, min_count=args.min_count)
+        print_rows(columns, rows, args.json)
+        if not args.json:
+            print(f"\n{len(rows)} rows in {(time.perf_counter() - start) * 1000:.2f} ms")
+    elif args.command == 'sql':
+        try:
+            columns, rows = run_sql(conn, args.statement)
+        except sqlite3.Error as e:
+            print(f"❌ SQL error: {e}")
+            conn.close()
+            return 1
+        print_rows(columns, rows, args.json)
+    
+    conn.close()
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,439 @@
+#!/usr/bin/env python3
+"""
+SQEF Results Diff
+Compares two result trees (summary.json / MASTER_SUMMARY.json) configuration
+by configuration and test row by test row
+
+Both trees are loaded into keyed structured arrays - configurations by their
+test-results-<LEVEL>-<RATIO>/<size> directory, test rows by configuration,
+test name and ordinal - matched with a single sorted intersection, and all
+deltas and regression checks are computed on whole columns at once.
+"""
+
+import os
+import sys
+import json
+import time
+import zlib
+import argparse
+from pathlib import Path
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from sqef_report_io import find_variant
+from sqef_result_table import ResultTable
+from sqef_uniformity_verifier import ALPHA, UNIFORMITY_ALPHA, igamc
+
+# Drop in min-entropy (bits/byte) reported as a regression
+ENTROPY_TOLERANCE = 0.01
+
+# Trees with more summary.json files than this are loaded by a process pool
+PARALLEL_THRESHOLD = 64
+
+CONFIG_DTYPE = np.dtype([
+    ('key', 'U128'),
+    ('security_level', 'U16'),
+    ('key_size', 'U16'),
+    ('total', np.int32),
+    ('passed', np.int32),
+    ('pass_rate', np.float64),
+    ('meets_requirement', np.bool_),
+    ('min_entropy', np.float64)       # NaN when no SP 800-90B section was found
+])
+
+ROW_DTYPE = np.dtype([
+    ('config_index', np.int32),       # row of the tree's configuration array
+    ('test_id', np.uint32),           # CRC-32 of test_name
+    ('test_name', 'U32'),
+    ('ordinal', np.int16),
+    ('p_value', np.float64),
+    ('passed', np.int32),
+    ('total', np.int32),
+    ('uniformity_flag', np.bool_),
+    ('proportion_flag', np.bool_),
+    ('meets_requirement', np.bool_)
+])
+
+def configuration_key(directory):
+    """Normalised configuration key: '/'-separated, without the sp800-22-results component
+
+    Trees rooted at the repository and at sp800-22-results/ then produce the
+    same keys, while archive prefixes (build-41/...) are kept.
+    """
+    parts = str(directory).replace('\\', '/').split('/')
+    return '/'.join(p for p in parts if p and p.lower() != 'sp800-22-results')
+
+@lru_cache(maxsize=None)
+def _test_id(test_name):
+    return zlib.crc32(test_name.encode())
+
+def _summary_rows(summary, summary_file, config):
+    """Test rows of one summary.json as ROW_DTYPE tuples
+
+    Uses 'test_rows' when present; older summaries only carry the first row
+    of each test, so the sibling finalAnalysisReport.txt is parsed instead
+    when it is available.
+    """
+    if summary.get('test_rows'):
+        return [(config, _test_id(r['test_name']), r['test_name'], r['ordinal'],
+                 np.nan if r['p_value'] is None else r['p_value'], r['passed'], r['total'],
+                 r['uniformity_flag'], r['proportion_flag'], r['meets_requirement'])
+                for r in summary['test_rows']]
+    
+    report_file = find_variant(summary_file.parent / summary.get('metadata', {}).get('report_file', 'finalAnalysisReport.txt'))
+    if report_file:
+        table = ResultTable.from_report(report_file)
+        rows = table.rows
+        meets = table.meets_requirement
+        return [(config, _test_id(name), name, ordinal, p_value, passed, total,
+                 uniformity_flag, proportion_flag, ok)
+                for name, ordinal, p_value, passed, total, uniformity_flag, proportion_flag, ok in zip(
+                    rows['test_name'].tolist(), rows['ordinal'].tolist(), rows['p_value'].tolist(),
+                    rows['passed'].tolist(), rows['total'].tolist(), rows['uniformity_flag'].tolist(),
+                    rows['proportion_flag'].tolist(), meets.tolist())]
+    
+    return [(config, _test_id(name), name, 1,
+             np.nan if r['p_value'] is None else r['p_value'], r['passed'], r['total'],
+             r.get('uniformity_fail', False), False, r['meets_requirement'])
+            for name, r in summary.get('individual_tests', {}).items()]
+
+def _config_tuple(key, configuration, overall, min_entropy):
+    total = overall['total_individual_tests']
+    passed = overall['passed_individual_tests']
+    return (key, configuration.get('security_level', 'UNKNOWN'), configuration.get('key_size', 'UNKNOWN'),
+            total, passed, overall['overall_pass_rate'],
+            overall['meets_nist_requirement'], np.nan if min_entropy is None else min_entropy)
+
+def _load_summaries(root, summary_files):
+    """Configurations and test rows of a batch of summary.json files
+
+    config_index of the returned rows refers to the order of the returned
+    configuration dict.
+    """
+    configurations = {}
+    rows = []
+    for summary_file in summary_files:
+        with open(summary_file, 'r', encoding='utf-8') as f:
+            summary = json.load(f)
+        if 'overall_results' not in summary:
+            continue
+        key = configuration_key(summary_file.parent.relative_to(root) if summary_file.parent != root
+                                else summary.get('metadata', {}).get('directory', ''))
+        if key in configurations:
+            print(f"⚠️  Skipping {summary_file}: duplicate configuration {key}")
+            continue
+        entropy = summary.get('entropy_assessment') or {}
+        configurations[key] = _config_tuple(key, summary.get('configuration', {}),
+                                            summary['overall_results'], entropy.get('min_entropy'))
+        rows.extend(_summary_rows(summary, summary_file, len(configurations) - 1))
+    
+    return configurations, np.array(rows, dtype=ROW_DTYPE)
+
+def load_tree(path, workers=None):
+    """Load a result tree, a summary.json or a MASTER_SUMMARY.json
+
+    Returns (configurations, rows) as CONFIG_DTYPE and ROW_DTYPE arrays.
+    Configurations only listed in MASTER_SUMMARY.json have no test rows.
+    Large trees are parsed in batches by a process pool, since JSON decoding
+    dominates the load time.
+    """
+    path = Path(path)
+    if path.is_file():
+        root, summary_files = path.parent, [path] if path.name == 'summary.json' else []
+        master_file = path if path.name != 'summary.json' else None
+    else:
+        root = path
+        summary_files = sorted(path.rglob('summary.json'))
+        master_file = path / 'MASTER_SUMMARY.json' if (path / 'MASTER_SUMMARY.json').exists() else None
+    
+    workers = workers or os.cpu_count() or 1
+    if workers > 1 and len(summary_files) > PARALLEL_THRESHOLD:
+        batches = [summary_files[i::workers] for i in range(workers)]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_load_summaries, [root] * workers, batches))
+    else:
+        results = [_load_summaries(root, summary_files)]
+    
+    configurations = {}
+    for batch_configurations, _ in results:
+        configurations.update(batch_configurations)
+    
+    if master_file is not None:
+        with open(master_file, 'r', encoding='utf-8') as f:
+            master = json.load(f)
+        for directory, entry in master.get('test_configurations', {}).items():
+            key = configuration_key(directory)
+            if key not in configurations:
+                configurations[key] = _config_tuple(key, entry.get('configuration', {}),
+                                                    entry, entry.get('entropy_min'))
+    
+    configs = np.array(sorted(configurations.values()), dtype=CONFIG_DTYPE)
+    
+    # Point every row at its configuration in the sorted array
+    position = {key: i for i, key in enumerate(configs['key'].tolist())}
+    for batch_configurations, batch_rows in results:
+        remap = np.array([position[key] for key in batch_configurations], dtype=np.int32)
+        batch_rows['config_index'] = remap[batch_rows['config_index']] if len(batch_rows) else batch_rows['config_index']
+    rows = np.concatenate([batch_rows for _, batch_rows in results])
+    return configs, rows
+
+def number_keys(old_keys, new_keys):
+    """Integer ids for two lists of hashable keys, equal ids for equal keys"""
+    ids = {}
+    old_ids = np.fromiter((ids.setdefault(k, len(ids)) for k in old_keys), dtype=np.int64, count=len(old_keys))
+    new_ids = np.fromiter((ids.setdefault(k, len(ids)) for k in new_keys), dtype=np.int64, count=len(new_keys))
+    return old_ids, new_ids
+
+def match(old_ids, new_ids):
+    """(matched old indexes, matched new indexes, removed old indexes, added new indexes)
+
+    Ids are unique within each array.
+    """
+    _, old_index, new_index = np.intersect1d(old_ids, new_ids, assume_unique=True, return_indices=True)
+    return (old_index, new_index, np.flatnonzero(np.isin(old_ids, new_ids, invert=True)),
+            np.flatnonzero(np.isin(new_ids, old_ids, invert=True)))
+
+def row_ids(old_configs, old_rows, new_configs, new_rows):
+    """Integer (configuration, test name, ordinal) key of every row of both trees
+
+    Configurations are numbered by key and test names by their CRC-32, so rows
+    are matched without comparing strings; a CRC-32 shared by two different
+    names is rejected.
+    """
+    old_config_ids, new_config_ids = number_keys(old_configs['key'].tolist(), new_configs['key'].tolist())
+    test_ids, first = np.unique(np.concatenate((old_rows['test_id'], new_rows['test_id'])), return_index=True)
+    names = np.concatenate((old_rows['test_name'], new_rows['test_name']))
+    for rows in (old_rows, new_rows):
+        if np.any(rows['test_name'] != names[first][np.searchsorted(test_ids, rows['test_id'])]):
+            raise ValueError('test name CRC-32 collision')
+    
+    max_ordinal = int(max(old_rows['ordinal'].max(initial=0), new_rows['ordinal'].max(initial=0)))
+    ids = []
+    for config_ids, rows in ((old_config_ids, old_rows), (new_config_ids, new_rows)):
+        name_index = np.searchsorted(test_ids, rows['test_id'])
+        ids.append((config_ids[rows['config_index']] * len(test_ids) + name_index) * (max_ordinal + 1)
+                   + rows['ordinal'])
+    return ids
+
+def _row_labels(configs, rows):
+    return sorted(f"{configs['key'][c]} {name} #{ordinal}" for c, name, ordinal in
+                  zip(rows['config_index'].tolist(), rows['test_name'].tolist(), rows['ordinal'].tolist()))
+
+def proportion_drop_p_values(old_passed, old_total, new_passed, new_total):
+    """One-sided two-proportion z-test P-VALUE that the new pass rate is lower"""
+    old_total = np.maximum(old_total, 1)
+    new_total = np.maximum(new_total, 1)
+    pooled = (old_passed + new_passed) / (old_total + new_total)
+    spread = np.sqrt(pooled * (1 - pooled) * (1 / old_total + 1 / new_total))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        z = (old_passed / old_total - new_passed / new_total) / spread
+    z = np.where(spread > 0, z, 0.0)
+    # erfc(|z| / sqrt(2)) = igamc(1/2, z^2 / 2)
+    tail = 0.5 * igamc(0.5, z * z / 2.0)
+    return np.where(z > 0, tail, 1.0 - tail)
+
+def diff_configurations(old, new, entropy_tolerance=ENTROPY_TOLERANCE):
+    """Matched configurations with their deltas and regression flags"""
+    old_index, new_index, removed, added = match(*number_keys(old['key'].tolist(), new['key'].tolist()))
+    a, b = old[old_index], new[new_index]
+    entropy_delta = b['min_entropy'] - a['min_entropy']
+    return {
+        'keys': a['key'],
+        'pass_rate_delta': b['pass_rate'] - a['pass_rate'],
+        'passed_delta': b['passed'] - a['passed'],
+        'entropy_delta': entropy_delta,
+        'requirement_lost': a['meets_requirement'] & ~b['meets_requirement'],
+        'requirement_gained': ~a['meets_requirement'] & b['meets_requirement'],
+        'entropy_regression': np.nan_to_num(entropy_delta, nan=0.0) < -entropy_tolerance,
+        'removed': sorted(old['key'][removed].tolist()),
+        'added': sorted(new['key'][added].tolist())
+    }
+
+def diff_rows(old_configs, old, new_configs, new, alpha=ALPHA):
+    """Matched test rows with their deltas and regression flags"""
+    old_index, new_index, removed, added = match(*row_ids(old_configs, old, new_configs, new))
+    a, b = old[old_index], new[new_index]
+    
+    p_value_delta = b['p_value'] - a['p_value']
+    changed = (np.nan_to_num(p_value_delta) != 0) | (np.isnan(a['p_value']) != np.isnan(b['p_value'])) | \
+        (a['passed'] != b['passed']) | (a['total'] != b['total']) | \
+        (a['uniformity_flag'] != b['uniformity_flag']) | (a['proportion_flag'] != b['proportion_flag'])
+    
+    drop_p = proportion_drop_p_values(a['passed'], a['total'], b['passed'], b['total'])
+    with np.errstate(invalid='ignore'):
+        uniformity_lost = ~(a['p_value'] < UNIFORMITY_ALPHA) & (b['p_value'] < UNIFORMITY_ALPHA)
+    
+    return {
+        'old': a,
+        'new': b,
+        'p_value_delta': p_value_delta,
+        'pass_rate_delta': b['passed'] / np.maximum(b['total'], 1) - a['passed'] / np.maximum(a['total'], 1),
+        'proportion_drop_p_value': drop_p,
+        'changed': changed,
+        'requirement_lost': a['meets_requirement'] & ~b['meets_requirement'],
+        'proportion_regression': drop_p < alpha,
+        'uniformity_regression': uniformity_lost | (~a['uniformity_flag'] & b['uniformity_flag']),
+        'configurations': old_configs['key'][a['config_index']],
+        'removed': _row_labels(old_configs, old[removed]),
+        'added': _row_labels(new_configs, new[added])
+    }
+
+def regressions(config_diff, row_diff):
+    """JSON-ready list of every flagged regression"""
+    found = []
+    for i in np.flatnonzero(config_diff['requirement_lost'] | config_diff['entropy_regression']):
+        reasons = []
+        if config_diff['requirement_lost'][i]:
+            reasons.append('configuration no longer meets the 96% requirement')
+        if config_diff['entropy_regression'][i]:
+            reasons.append(f"min-entropy dropped by {-config_diff['entropy_delta'][i]:.6f} bits/byte")
+        found.append({'configuration': str(config_diff['keys'][i]), 'test': None, 'reasons': reasons})
+    
+    flagged = row_diff['requirement_lost'] | row_diff['proportion_regression'] | row_diff['uniformity_regression']
+    a, b = row_diff['old'], row_diff['new']
+    for i in np.flatnonzero(flagged):
+        reasons = []
+        if row_diff['requirement_lost'][i]:
+            reasons.append('row no longer meets the requirement')
+        if row_diff['proportion_regression'][i]:
+            reasons.append(f"pass proportion {a['passed'][i]}/{a['total'][i]} -> {b['passed'][i]}/{b['total'][i]} "
+                           f"(P = {row_diff['proportion_drop_p_value'][i]:.6f})")
+        if row_diff['uniformity_regression'][i]:
+            reasons.append(f"uniformity P-VALUE {a['p_value'][i]:.6f} -> {b['p_value'][i]:.6f}")
+        found.append({
+            'configuration': str(row_diff['configurations'][i]),
+            'test': f"{a['test_name'][i]} #{a['ordinal'][i]}",
+            'reasons': reasons
+        })
+    return found
+
+def diff_trees(old_path, new_path, alpha=ALPHA, entropy_tolerance=ENTROPY_TOLERANCE, workers=None):
+    """Load and compare two result trees; returns a JSON-ready report"""
+    start = time.perf_counter()
+    old_configs, old_rows = load_tree(old_path, workers)
+    new_configs, new_rows = load_tree(new_path, workers)
+    loaded = time.perf_counter()
+    
+    config_diff = diff_configurations(old_configs, new_configs, entropy_tolerance)
+    row_diff = diff_rows(old_configs, old_rows, new_configs, new_rows, alpha)
+    found = regressions(config_diff, row_diff)
+    finished = time.perf_counter()
+    
+    changed_configs = (config_diff['pass_rate_delta'] != 0) | \
+        (np.nan_to_num(config_diff['entropy_delta']) != 0)
+    return {
+        'old': str(old_path),
+        'new': str(new_path),
+        'configurations': {
+            'old': len(old_configs),
+            'new': len(new_configs),
+            'matched': len(config_diff['keys']),
+            'changed': int(changed_configs.sum()),
+            'added': config_diff['added'],
+            'removed': config_diff['removed'],
+            'changes': [
+                {
+                    'configuration': str(config_diff['keys'][i]),
+                    'pass_rate_delta': float(config_diff['pass_rate_delta'][i]),
+                    'passed_delta': int(config_diff['passed_delta'][i]),
+                    'entropy_delta': None if np.isnan(config_diff['entropy_delta'][i])
+                    else float(config_diff['entropy_delta'][i])
+                }
+                for i in np.flatnonzero(changed_configs)
+            ]
+        },
+        'test_rows': {
+            'old': len(old_rows),
+            'new': len(new_rows),
+            'matched': len(row_diff['old']),
+            'changed': int(row_diff['changed'].sum()),
+            'added': row_diff['added'],
+            'removed': row_diff['removed'],
+            'largest_p_value_moves': _largest_moves(row_diff)
+        },
+        'regressions': found,
+        'timing': {'load_seconds': loaded - start, 'diff_seconds': finished - loaded}
+    }
+
+def _largest_moves(row_diff, limit=20):
+    delta = np.nan_to_num(np.abs(row_diff['p_value_delta']))
+    order = np.argsort(-delta, kind='stable')[:limit]
+    a, b = row_diff['old'], row_diff['new']
+    return [{
+        'configuration': str(row_diff['configurations'][i]),
+        'test': f"{a['test_name'][i]} #{a['ordinal'][i]}",
+        'old_p_value': float(a['p_value'][i]),
+        'new_p_value': float(b['p_value'][i])
+    } for i in order if delta[i] > 0]
+
+def print_report(report, limit=50):
+    """Print a compact diff summary"""
+    configs = report['configurations']
+    rows = report['test_rows']
+    print(f"📊 Configurations: {configs['matched']} matched, {configs['changed']} changed, "
+          f"{len(configs['added'])} added, {len(configs['removed'])} removed")
+    print(f"📊 Test rows: {rows['matched']} matched, {rows['changed']} changed, "
+          f"{len(rows['added'])} added, {len(rows['removed'])} removed")
+    
+    for key in configs['added'][:limit]:
+        print(f"  + {key}")
+    for key in configs['removed'][:limit]:
+        print(f"  - {key}")
+    
+    if report['regressions']:
+        print(f"\n❌ {len(report['regressions'])} regressions:")
+        for entry in report['regressions'][:limit]:
+            where = entry['configuration'] + (f" {entry['test']}" if entry['test'] else '')
+            print(f"  {where}: {'; '.join(entry['reasons'])}")
+        if len(report['regressions']) > limit:
+            print(f"  ... {len(report['regressions']) - limit} more")
+    else:
+        print("\n✅ No statistically meaningful regressions")
+    
+    timing = report['timing']
+    print(f"\nLoaded in {timing['load_seconds']*1000:.0f} ms, compared in {timing['diff_seconds']*1000:.0f} ms")
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(
+        description='Compare two SQEF result trees and flag regressions',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  %(prog)s ../archive/build-41 ..
+  %(prog)s ../archive/build-41 ../archive/build-42 --workers 8
+  %(prog)s old/MASTER_SUMMARY.json new/MASTER_SUMMARY.json
+  %(prog)s old new --alpha 0.001 --entropy-tolerance 0.005 --output diff.json
+        """
+    )
+    parser.add_argument('old', help='Baseline result tree, summary.json or MASTER_SUMMARY.json')
+    parser.add_argument('new', help='Result tree, summary.json or MASTER_SUMMARY.json to compare')
+    parser.add_argument('--alpha', type=float, default=ALPHA,
+                        help=f'Significance level of the pass-proportion drop test (default: {ALPHA})')
+    parser.add_argument('--entropy-tolerance', type=float, default=ENTROPY_TOLERANCE,
+                        help=f'Min-entropy drop in bits/byte reported as a regression (default: {ENTROPY_TOLERANCE})')
+    parser.add_argument('--workers', type=int, help='Processes used to load large trees (default: all cores)')
+    parser.add_argument('--limit', type=int, default=50, help='Maximum entries printed per section')
+    parser.add_argument('--output', '-o', help='Write the full diff as JSON')
+    
+    args = parser.parse_args()
+    
+    for path in (args.old, args.new):
+        if not os.path.exists(path):
+            print(f"❌ Not found: {path}")
+            return 1
+    
+    report = diff_trees(args.old, args.new, args.alpha, args.entropy_tolerance, args.workers)
+    print_report(report, args.limit)
+    
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"✅ Diff saved to: {args.output}")
+    
+    return 1 if report['regressions'] else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
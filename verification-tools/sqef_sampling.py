@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+"""
+SQEF Stratified Sampling
+Fast approximate analysis of .bin files from a few percent of their bytes
+
+Each file is split into equal strata and read in rounds through a memory map;
+every round reads one randomly chosen, not yet sampled block per stratum.
+After each round the stratified estimate of the ones fraction and the
+byte-histogram Shannon entropy (with a leave-one-block-out jackknife
+interval) are updated, and sampling stops as soon as both intervals are
+narrower than their tolerances or the I/O budget is spent. A spot-hash over
+fixed, evenly spaced blocks fingerprints the file: identical files always
+give the same spot-hash, so it is a quick pre-check against a full SHA256.
+The verdict is GO when the ones-fraction interval contains 1/2 and the
+entropy interval reaches the minimum; full analysis remains the release gate.
+"""
+
+import os
+import sys
+import json
+import math
+import hashlib
+import argparse
+from pathlib import Path
+from statistics import NormalDist
+from datetime import datetime
+
+import numpy as np
+
+from sqef_key_files import scan_key_files
+from sqef_sequential_test import byte_popcounts
+from sqef_test_summary_generator import get_configuration_from_path
+
+DEFAULT_BLOCK_BYTES = 64 * 1024
+DEFAULT_STRATA = 64
+DEFAULT_MAX_FRACTION = 0.05
+DEFAULT_CONFIDENCE = 0.99
+DEFAULT_BIAS_TOLERANCE = 2e-4
+DEFAULT_ENTROPY_TOLERANCE = 1e-3
+DEFAULT_MIN_ENTROPY = 7.99
+
+JACKKNIFE_BLOCKS = 16
+
+SPOT_HASH_BLOCKS = 64
+SPOT_HASH_BLOCK_BYTES = 4096
+
+def spot_hash(data, blocks=SPOT_HASH_BLOCKS, block_bytes=SPOT_HASH_BLOCK_BYTES):
+    """SHA256 of the file size and `blocks` evenly spaced blocks (the whole file if it is small)"""
+    digest = hashlib.sha256(len(data).to_bytes(8, 'little'))
+    if len(data) <= blocks * block_bytes:
+        digest.update(memoryview(np.ascontiguousarray(data)))
+        return digest.hexdigest()
+    for offset in np.linspace(0, len(data) - block_bytes, blocks).astype(np.int64).tolist():
+        digest.update(memoryview(np.ascontiguousarray(data[offset:offset + block_bytes])))
+    return digest.hexdigest()
+
+def shannon_entropy(histograms):
+    """Plug-in Shannon entropy in bits per byte of each row of an (n, 256) histogram array"""
+    histograms = np.atleast_2d(histograms).astype(np.float64)
+    totals = histograms.sum(axis=1, keepdims=True)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        p = histograms / totals
+        terms = np.where(p > 0, -p * np.log2(p), 0.0)
+    return terms.sum(axis=1)
+
+def entropy_interval(block_histograms):
+    """Jackknife-corrected entropy of the pooled blocks and its standard error"""
+    total = block_histograms.sum(axis=0)
+    n = len(block_histograms)
+    pooled = float(shannon_entropy(total)[0])
+    if n < 2:
+        return pooled, float('inf')
+    leave_one_out = shannon_entropy(total - block_histograms)
+    corrected = n * pooled - (n - 1) * float(leave_one_out.mean())
+    error = math.sqrt((n - 1) / n * float(((leave_one_out - leave_one_out.mean()) ** 2).sum()))
+    return min(corrected, 8.0), error
+
+def stratified_mean(observations, weights, population):
+    """Stratified estimate of the mean and its standard error
+
+    observations holds one array of block values per stratum, weights the
+    stratum shares of the file and population the blocks in each stratum.
+    """
+    estimate = variance = 0.0
+    for values, weight, size in zip(observations, weights, population):
+        n = len(values)
+        estimate += weight * float(np.mean(values))
+        if n > 1:
+            variance += weight ** 2 * float(np.var(values, ddof=1)) / n * (1 - n / size)
+    return estimate, math.sqrt(variance)
+
+def sample_file(filepath, block_bytes=DEFAULT_BLOCK_BYTES, strata=DEFAULT_STRATA,
+                max_fraction=DEFAULT_MAX_FRACTION, confidence=DEFAULT_CONFIDENCE,
+                bias_tolerance=DEFAULT_BIAS_TOLERANCE, entropy_tolerance=DEFAULT_ENTROPY_TOLERANCE,
+                min_entropy=DEFAULT_MIN_ENTROPY, seed=None):
+    """Estimate bias and entropy of one file from stratified random blocks
+
+    The number of strata is reduced until two blocks per stratum fit both the
+    file and the max_fraction budget. Files where not even one stratum of two
+    blocks fits are read completely, and 'within_budget' is False when that
+    exceeds max_fraction. Raises ValueError for files shorter than two bytes.
+    """
+    filepath = Path(filepath)
+    size = filepath.stat().st_size
+    if size < 2:
+        raise ValueError(f"{filepath.name} is too short to sample ({size} bytes)")
+    data = np.memmap(filepath, dtype=np.uint8, mode='r')
+    z = NormalDist().inv_cdf(1 - (1 - confidence) / 2)
+    slots = size // block_bytes
+    budget_blocks = int(max_fraction * size) // block_bytes
+    strata = min(strata, slots // 2, budget_blocks // 2)
+    
+    histograms = []
+    bytes_read = 0
+    if strata < 1:
+        # Too small to sample within the budget: read the whole file, in blocks
+        # small enough for a jackknife over at least JACKKNIFE_BLOCKS of them
+        exhaustive = True
+        block_bytes = min(block_bytes, -(-size // JACKKNIFE_BLOCKS))
+        ones = 0
+        for offset in range(0, size, block_bytes):
+            block = np.asarray(data[offset:offset + block_bytes])
+            ones += int(byte_popcounts(block).sum(dtype=np.int64))
+            histograms.append(np.bincount(block, minlength=256))
+            bytes_read += len(block)
+        blocks_per_stratum = None
+        # The ones fraction gets the interval of size * 8 independent bits (the
+        # frequency test); the entropy the same jackknife as the sampled blocks
+        bias = ones / (size * 8)
+        bias_error = 0.5 / math.sqrt(size * 8)
+        entropy, entropy_error = entropy_interval(np.array(histograms))
+    else:
+        exhaustive = False
+        rng = np.random.default_rng(seed)
+        strata_slots = np.linspace(0, slots, strata + 1).astype(np.int64)
+        population = np.diff(strata_slots)
+        weights = population / population.sum()
+        max_blocks = min(budget_blocks // strata, int(population.min()))
+        offsets = [((start + rng.permutation(stop - start)[:max_blocks]) * block_bytes).tolist()
+                   for start, stop in zip(strata_slots[:-1], strata_slots[1:])]
+        ones = [[] for _ in offsets]
+        blocks_per_stratum = 0
+        
+        while blocks_per_stratum < max_blocks:
+            # The first round takes two blocks per stratum so every stratum has a variance
+            take = 2 if blocks_per_stratum == 0 else 1
+            for stratum, stratum_offsets in enumerate(offsets):
+                for offset in stratum_offsets[blocks_per_stratum:blocks_per_stratum + take]:
+                    block = np.asarray(data[offset:offset + block_bytes])
+                    ones[stratum].append(int(byte_popcounts(block).sum(dtype=np.int64)) / (block_bytes * 8))
+                    histograms.append(np.bincount(block, minlength=256))
+                    bytes_read += block_bytes
+            blocks_per_stratum += take
+            
+            bias, bias_error = stratified_mean(ones, weights, population)
+            entropy, entropy_error = entropy_interval(np.array(histograms))
+            if z * bias_error <= bias_tolerance and z * entropy_error <= entropy_tolerance:
+                break
+    
+    total = np.sum(histograms, axis=0) if histograms else np.zeros(256, dtype=np.int64)
+    sampled_bytes = int(total.sum())
+    p_max = float(total.max()) / sampled_bytes if sampled_bytes else 1.0
+    p_upper = min(1.0, p_max + z * math.sqrt(p_max * (1 - p_max) / max(sampled_bytes - 1, 1)))
+    
+    bias_interval = [bias - z * bias_error, bias + z * bias_error]
+    shannon_interval = [entropy - z * entropy_error, min(entropy + z * entropy_error, 8.0)]
+    go = bias_interval[0] <= 0.5 <= bias_interval[1] and shannon_interval[1] >= min_entropy
+    return {
+        'file': str(filepath),
+        'security_level': get_configuration_from_path(filepath)['security_level'],
+        'size': size,
+        'spot_sha256': spot_hash(data),
+        'exhaustive': exhaustive,
+        'strata': None if exhaustive else strata,
+        'blocks_per_stratum': blocks_per_stratum,
+        'blocks_read': len(histograms),
+        'bytes_read': bytes_read,
+        'fraction_read': bytes_read / size,
+        'within_budget': bytes_read <= max_fraction * size,
+        'confidence': confidence,
+        'ones_fraction': bias,
+        'ones_fraction_interval': bias_interval,
+        'shannon_entropy': entropy,
+        'shannon_entropy_interval': shannon_interval,
+        'min_entropy_mcv': -math.log2(p_upper) if p_upper > 0 else 8.0,
+        'converged': exhaustive or (z * bias_error <= bias_tolerance and
+                                    z * entropy_error <= entropy_tolerance),
+        'verdict': 'GO' if go else 'NO-GO'
+    }
+
+def print_sample(result):
+    status = '✅' if result['verdict'] == 'GO' else '❌'
+    low, high = result['ones_fraction_interval']
+    h_low, h_high = result['shannon_entropy_interval']
+    if result['exhaustive']:
+        mode = 'read completely' + ('' if result['within_budget'] else
+                                    ', too small to sample within the budget')
+    else:
+        mode = (f"read {result['fraction_read'] * 100:.2f}%, {result['blocks_per_stratum']} blocks "
+                f"in each of {result['strata']} strata"
+                f"{'' if result['converged'] else ', budget spent before convergence'}")
+    print(f"{status} {Path(result['file']).name}: {result['verdict']} ({mode})")
+    print(f"  ones fraction {result['ones_fraction']:.6f} [{low:.6f}, {high:.6f}], "
+          f"entropy {result['shannon_entropy']:.5f} [{h_low:.5f}, {h_high:.5f}] bits/byte, "
+          f"MCV min-entropy {result['min_entropy_mcv']:.4f}")
+    print(f"  spot-hash {result['spot_sha256']}")
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(
+        description='Approximate bias/entropy analysis of .bin files from stratified samples',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  %(prog)s ../sample-outputs
+  %(prog)s --file sqef_master_512mb_STANDARD_for_slicing.bin --max-fraction 0.02
+  %(prog)s ../sample-outputs --confidence 0.999 --seed 2025 --output sample.json
+        """
+    )
+    parser.add_argument('path', nargs='?', default=os.getcwd(),
+                        help='Root directory containing .bin files (default: current directory)')
+    parser.add_argument('--file', action='append', help='Sample this file (repeatable)')
+    parser.add_argument('--block-kb', type=int, default=DEFAULT_BLOCK_BYTES // 1024,
+                        help=f'Sampled block size in KB (default: {DEFAULT_BLOCK_BYTES // 1024})')
+    parser.add_argument('--strata', type=int, default=DEFAULT_STRATA,
+                        help=f'Strata per file (default: {DEFAULT_STRATA})')
+    parser.add_argument('--max-fraction', type=float, default=DEFAULT_MAX_FRACTION,
+                        help=f'Largest share of each file to read (default: {DEFAULT_MAX_FRACTION})')
+    parser.add_argument('--confidence', type=float, default=DEFAULT_CONFIDENCE,
+                        help=f'Confidence level of the intervals (default: {DEFAULT_CONFIDENCE})')
+    parser.add_argument('--bias-tolerance', type=float, default=DEFAULT_BIAS_TOLERANCE,
+                        help=f'Stop once the ones-fraction half-width is below this (default: {DEFAULT_BIAS_TOLERANCE})')
+    parser.add_argument('--entropy-tolerance', type=float, default=DEFAULT_ENTROPY_TOLERANCE,
+                        help=f'Stop once the entropy half-width is below this (default: {DEFAULT_ENTROPY_TOLERANCE})')
+    parser.add_argument('--min-entropy', type=float, default=DEFAULT_MIN_ENTROPY,
+                        help=f'Shannon entropy in bits/byte required for GO (default: {DEFAULT_MIN_ENTROPY})')
+    parser.add_argument('--seed', type=int, help='Random seed for reproducible block selection')
+    parser.add_argument('--output', '-o', help='Write results as JSON')
+    
+    args = parser.parse_args()
+    
+    files = [Path(f) for f in args.file] if args.file else scan_key_files(args.path)
+    if not files:
+        print("No .bin files found!")
+        return 0
+    
+    results = []
+    for filepath in files:
+        try:
+            result = sample_file(filepath, args.block_kb * 1024, args.strata, args.max_fraction,
+                                 args.confidence, args.bias_tolerance, args.entropy_tolerance,
+                                 args.min_entropy, args.seed)
+        except ValueError as e:
+            print(f"⚠️  Skipping: {e}")
+            continue
+        print_sample(result)
+        results.append(result)
+    
+    total_size = sum(r['size'] for r in results)
+    total_read = sum(r['bytes_read'] for r in results)
+    print(f"\n📊 {len(results)} files, read {total_read / max(total_size, 1) * 100:.2f}% of "
+          f"{total_size / (1024 * 1024):.1f}MB, "
+          f"{sum(r['verdict'] == 'GO' for r in results)} GO / {sum(r['verdict'] != 'GO' for r in results)} NO-GO")
+    
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({
+                'generated': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                'seed': args.seed,
+                'files': results
+            }, f, indent=2)
+        print(f"✅ Results saved to: {args.output}")
+    
+    return 0 if all(r['verdict'] == 'GO' for r in results) else 1
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+SQEF Expansion Segment Analysis
+Tests master files segment by segment along their seed-expansion boundaries
+
+Each 1MB seed expands to at most 512MB (STANDARD), 128MB (ENHANCED) or 32MB
+(MAXIMUM), so a 512MB master holds 1, 4 or 16 expansion segments. Every
+segment is analysed in parallel, in place through a memory map: bit bias,
+runs, byte histogram, lag-1 byte correlation, correlation with the next
+segment, and the same bias/histogram statistics over a window straddling
+each seam. Results are kept in one structured array per file.
+"""
+
+import os
+import sys
+import json
+import math
+import argparse
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from sqef_key_files import scan_key_files
+from sqef_sequential_test import TRANSITIONS, byte_popcounts
+from sqef_slice_provenance import is_master_file
+from sqef_test_summary_generator import get_configuration_from_path
+from sqef_uniformity_verifier import igamc
+
+SEED_BYTES = 1024 * 1024
+CHUNK_BYTES = 16 * 1024 * 1024
+SEAM_BYTES = 1024 * 1024
+
+SEGMENT_DTYPE = np.dtype([
+    ('index', '<i4'),
+    ('offset', '<i8'),
+    ('size', '<i8'),
+    ('ones_fraction', '<f8'),
+    ('bias_z', '<f8'),
+    ('bias_p_value', '<f8'),
+    ('runs_p_value', '<f8'),
+    ('byte_chi2', '<f8'),
+    ('byte_p_value', '<f8'),
+    ('serial_correlation', '<f8'),
+    ('next_correlation', '<f8'),
+    ('next_pairs', '<i8'),
+    ('seam_ones_fraction', '<f8'),
+    ('seam_byte_p_value', '<f8')
+])
+
+def segment_size_for(filepath):
+    """Expansion segment size from the security level's ratio (1:512 -> 512MB)"""
+    config = get_configuration_from_path(filepath)
+    if config['expansion_ratio'] == 'UNKNOWN':
+        return None
+    return int(config['expansion_ratio'].split(':')[1]) * SEED_BYTES
+
+def bias_statistics(ones, bits):
+    """(ones fraction, z-score, P-VALUE) of a monobit count"""
+    z = (2 * ones - bits) / math.sqrt(bits)
+    return ones / bits, z, math.erfc(abs(z) / math.sqrt(2))
+
+def runs_p_value(ones, transitions, bits):
+    """SP 800-22 Runs P-VALUE from the ones and bit-transition counts"""
+    pi = ones / bits
+    if abs(pi - 0.5) > 2.0 / math.sqrt(bits):
+        return 0.0
+    v_obs = transitions + 1
+    return math.erfc(abs(v_obs - 2.0 * bits * pi * (1 - pi)) /
+                     (2.0 * math.sqrt(2 * bits) * pi * (1 - pi)))
+
+def byte_chi_square(histogram):
+    """(chi-square, P-VALUE) of a byte histogram against uniform, 255 df"""
+    expected = histogram.sum() / 256
+    chi2 = float(((histogram - expected) ** 2).sum() / expected)
+    return chi2, float(igamc(255 / 2.0, chi2 / 2.0))
+
+def correlation(sums, n):
+    """Pearson correlation from (sum x, sum y, sum x^2, sum y^2, sum xy)"""
+    sx, sy, sxx, syy, sxy = sums
+    covariance = sxy - sx * sy / n
+    variance = (sxx - sx * sx / n) * (syy - sy * sy / n)
+    return covariance / math.sqrt(variance) if variance > 0 else float('nan')
+
+def analyze_segment(filepath, index, offset, size, next_size=0):
+    """Statistics of data[offset:offset + size]; runs in a worker process"""
+    data = np.memmap(filepath, dtype=np.uint8, mode='r')
+    ones = transitions = 0
+    histogram = np.zeros(256, dtype=np.int64)
+    serial = [0, 0, 0, 0, 0]
+    cross = [0, 0, 0, 0, 0]
+    previous = None
+    
+    for start in range(offset, offset + size, CHUNK_BYTES):
+        stop = min(start + CHUNK_BYTES, offset + size)
+        chunk = np.asarray(data[start:stop])
+        ones += int(byte_popcounts(chunk).sum(dtype=np.int64))
+        transitions += int(TRANSITIONS.take(chunk).sum(dtype=np.int64))
+        transitions += int(np.count_nonzero((chunk[:-1] & 1) != (chunk[1:] >> 7)))
+        if previous is not None:
+            transitions += int((previous & 1) != (chunk[0] >> 7))
+        histogram += np.bincount(chunk, minlength=256)
+        
+        # Lag-1 byte correlation, including the pair across the chunk boundary
+        values = chunk.astype(np.int64)
+        if previous is not None:
+            values = np.concatenate(([int(previous)], values))
+        x, y = values[:-1], values[1:]
+        for i, s in enumerate((x.sum(), y.sum(), x @ x, y @ y, x @ y)):
+            serial[i] += int(s)
+        previous = chunk[-1]
+        
+        # Position-wise correlation with the next segment
+        if next_size > start - offset:
+            other = np.asarray(data[start + size:min(stop + size, offset + size + next_size)])
+            x = chunk[:len(other)].astype(np.int64)
+            y = other.astype(np.int64)
+            for i, s in enumerate((x.sum(), y.sum(), x @ x, y @ y, x @ y)):
+                cross[i] += int(s)
+    
+    bits = size * 8
+    pairs = min(size, next_size)
+    ones_fraction, bias_z, bias_p = bias_statistics(ones, bits)
+    chi2, chi2_p = byte_chi_square(histogram)
+    
+    # Window centred on the seam to the next segment
+    seam_ones = seam_p = float('nan')
+    if next_size:
+        half = min(SEAM_BYTES // 2, size, next_size)
+        seam = np.asarray(data[offset + size - half:offset + size + half])
+        seam_ones = float(byte_popcounts(seam).sum(dtype=np.int64)) / (len(seam) * 8)
+        seam_p = byte_chi_square(np.bincount(seam, minlength=256))[1]
+    
+    return (index, offset, size, ones_fraction, bias_z, bias_p,
+            runs_p_value(ones, transitions, bits), chi2, chi2_p,
+            correlation(serial, size - 1),
+            correlation(cross, pairs) if pairs else float('nan'), pairs,
+            seam_ones, seam_p)
+
+def segment_layout(file_size, segment_size):
+    """(offset, size) of each expansion segment; the last one may be short"""
+    return [(offset, min(segment_size, file_size - offset))
+            for offset in range(0, file_size, segment_size)]
+
+def analyze_file(filepath, segment_size=None, workers=None, pool=None):
+    """Analyse every segment of one file in parallel; returns a SEGMENT_DTYPE array"""
+    filepath = Path(filepath)
+    segment_size = segment_size or segment_size_for(filepath)
+    if not segment_size:
+        raise ValueError(f"cannot determine the expansion ratio of {filepath}")
+    file_size = filepath.stat().st_size
+    if not file_size:
+        raise ValueError(f"{filepath} is empty")
+    layout = segment_layout(file_size, segment_size)
+    
+    own_pool = pool is None
+    pool = pool or ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1)
+    try:
+        futures = [pool.submit(analyze_segment, str(filepath), i, offset, size,
+                               layout[i + 1][1] if i + 1 < len(layout) else 0)
+                   for i, (offset, size) in enumerate(layout)]
+        rows = [future.result() for future in futures]
+    finally:
+        if own_pool:
+            pool.shutdown()
+    return np.array(rows, dtype=SEGMENT_DTYPE)
+
+def segment_outliers(segments, alpha=0.01):
+    """Indexes of segments whose bias, runs, byte histogram or next-segment
+    correlation P-VALUE is below alpha
+    """
+    # Under independence r * sqrt(n) is approximately standard normal
+    correlation_p = np.array([math.erfc(abs(r) * math.sqrt(n / 2.0))
+                              for r, n in zip(segments['next_correlation'], segments['next_pairs'])])
+    p_values = np.stack([segments['bias_p_value'], segments['runs_p_value'],
+                         segments['byte_p_value'], segments['seam_byte_p_value'], correlation_p])
+    return np.flatnonzero(np.nanmin(np.where(np.isnan(p_values), 1.0, p_values), axis=0) < alpha)
+
+def print_segments(filepath, segments, alpha=0.01):
+    """Print one line per segment"""
+    print(f"\n📄 {Path(filepath).name}: {len(segments)} segments of "
+          f"{segments['size'][0] / SEED_BYTES:.0f}MB")
+    print(f"  {'#':>3} {'ones':>9} {'bias p':>8} {'runs p':>8} {'byte p':>8} "
+          f"{'lag-1 r':>9} {'next r':>9} {'seam p':>8}")
+    outliers = set(segment_outliers(segments, alpha).tolist())
+    for s in segments:
+        status = '⚠️ ' if s['index'] in outliers else '  '
+        print(f"{status}{s['index']:>3} {s['ones_fraction']:>9.6f} {s['bias_p_value']:>8.4f} "
+              f"{s['runs_p_value']:>8.4f} {s['byte_p_value']:>8.4f} "
+              f"{s['serial_correlation']:>9.2e} {s['next_correlation']:>9.2e} "
+              f"{s['seam_byte_p_value']:>8.4f}")
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(
+        description='Analyse master files along their seed-expansion segment boundaries',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  %(prog)s ../sample-outputs
+  %(prog)s --file sqef_master_512mb_MAXIMUM_for_slicing.bin --workers 16
+  %(prog)s ../sample-outputs --segment-mb 8 --output segments.json
+        """
+    )
+    parser.add_argument('path', nargs='?', default=os.getcwd(),
+                        help='Root directory containing master .bin files (default: current directory)')
+    parser.add_argument('--file', action='append', help='Analyse this file (repeatable)')
+    parser.add_argument('--segment-mb', type=int,
+                        help='Segment size in MB (default: from the security level)')
+    parser.add_argument('--workers', type=int, help='Worker processes (default: all cores)')
+    parser.add_argument('--alpha', type=float, default=0.01, help='Outlier significance level')
+    parser.add_argument('--output', '-o', help='Write per-segment arrays as JSON')
+    
+    args = parser.parse_args()
+    
+    files = [Path(f) for f in args.file] if args.file else \
+        [p for p in scan_key_files(args.path) if is_master_file(p)]
+    if not files:
+        print("❌ No master files found!")
+        return 1
+    
+    segment_size = args.segment_mb * SEED_BYTES if args.segment_mb else None
+    results = {}
+    with ProcessPoolExecutor(max_workers=args.workers or os.cpu_count() or 1) as pool:
+        for filepath in files:
+            try:
+                segments = analyze_file(filepath, segment_size, pool=pool)
+            except ValueError as e:
+                print(f"⚠️  Skipping {filepath.name}: {e}")
+                continue
+            print_segments(filepath, segments, args.alpha)
+            results[str(filepath)] = segments
+    
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({
+                name: {
+                    'security_level': get_configuration_from_path(name)['security_level'],
+                    'outliers': segment_outliers(segments, args.alpha).tolist(),
+                    **{field: segments[field].tolist() for field in SEGMENT_DTYPE.names}
+                }
+                for name, segments in results.items()
+            }, f, indent=2)
+        print(f"\n✅ Results saved to: {args.output}")
+    
+    return 1 if any(len(segment_outliers(s, args.alpha)) for s in results.values()) else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
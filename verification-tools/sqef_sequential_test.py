@@ -0,0 +1,332 @@
+#!/usr/bin/env python3
+"""
+SQEF Sequential Re-validation
+Early-stopping SP 800-22 re-validation of a binary file
+
+Runs the Frequency, BlockFrequency, CumulativeSums and Runs tests on batches
+of sequences, updating each test's pass count and P-VALUE histogram as it
+goes. A test stops as soon as its final outcome (proportion of passing
+sequences and uniformity of P-VALUEs over the full sample size) is decided at
+the configured confidence:
+
+- proportion: the remaining failures are predicted with a Beta-Binomial
+  posterior of the failure rate observed so far
+- uniformity: the remaining P-VALUEs are drawn as uniform histogram counts
+  and the final uniformity P-VALUE is recomputed for each draw
+
+The result is written in finalAnalysisReport.txt format (readable by
+parse_sp800_22_report and ResultTable), with each row's PROPORTION over the
+sequences actually used.
+"""
+
+import sys
+import json
+import math
+import argparse
+from pathlib import Path
+
+import numpy as np
+
+from sqef_uniformity_verifier import (ALPHA, UNIFORMITY_ALPHA, igamc, uniformity_p_values,
+                                      proportion_bounds)
+
+SEQUENCE_LENGTH = 1000000
+MAX_BITSTREAMS = 1000
+BLOCK_FREQUENCY_M = 128
+DEFAULT_CONFIDENCE = 0.99
+DEFAULT_BATCH = 16
+# NIST does not assess uniformity on fewer than 55 sequences
+MIN_UNIFORMITY_SEQUENCES = 55
+PREDICTIVE_DRAWS = 4000
+
+TEST_ROWS = ['Frequency', 'BlockFrequency', 'CumulativeSums', 'CumulativeSums', 'Runs']
+
+_erfc = np.frompyfunc(math.erfc, 1, 1)
+
+def erfc(x):
+    """Vectorized complementary error function"""
+    return _erfc(np.asarray(x, dtype=np.float64)).astype(np.float64)
+
+def normal_cdf(x):
+    """Vectorized standard normal CDF"""
+    return 0.5 * erfc(-np.asarray(x, dtype=np.float64) / math.sqrt(2))
+
+def _byte_tables():
+    """Per byte value (MSB first): set bits, bit transitions, and the net / max / min
+    of the +1/-1 partial sums over its eight bits"""
+    bits = np.unpackbits(np.arange(256, dtype=np.uint8)[:, None], axis=1).astype(np.int32)
+    partial = np.cumsum(2 * bits - 1, axis=1)
+    transitions = np.count_nonzero(bits[:, 1:] != bits[:, :-1], axis=1)
+    return (bits.sum(axis=1), transitions, partial[:, -1], partial.max(axis=1),
+            partial.min(axis=1))
+
+POPCOUNT, TRANSITIONS, STEP_NET, STEP_MAX, STEP_MIN = (t.astype(np.int8) for t in _byte_tables())
+
+def _lookup(table, data):
+    """table[data] for a byte array (take on the flat array is the fastest gather)"""
+    return table.take(data.ravel()).reshape(data.shape)
+
+def byte_popcounts(data):
+    """Set bits of every byte"""
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(data)
+    return _lookup(POPCOUNT, data)
+
+def frequency_p_values(data, ones=None):
+    """Frequency (monobit) test for each row of a (sequences, n/8) byte array"""
+    n = data.shape[1] * 8
+    ones = byte_popcounts(data) if ones is None else ones
+    s_obs = np.abs(2 * ones.sum(axis=1, dtype=np.int64) - n) / math.sqrt(n)
+    return erfc(s_obs / math.sqrt(2))
+
+def block_frequency_p_values(data, block_size=BLOCK_FREQUENCY_M, ones=None):
+    """Frequency within a block test (block_size a multiple of 8)"""
+    block_bytes = block_size // 8
+    blocks = data.shape[1] // block_bytes
+    ones = byte_popcounts(data) if ones is None else ones
+    ones = ones[:, :blocks * block_bytes].reshape(len(data), blocks, block_bytes)
+    pi = ones.sum(axis=2, dtype=np.int64) / block_size
+    chi_squared = 4.0 * block_size * ((pi - 0.5) ** 2).sum(axis=1)
+    return igamc(blocks / 2.0, chi_squared / 2.0)
+
+def runs_p_values(data, ones=None):
+    """Runs test; sequences failing the frequency prerequisite get P-VALUE 0"""
+    n = data.shape[1] * 8
+    ones = byte_popcounts(data) if ones is None else ones
+    pi = ones.sum(axis=1, dtype=np.int64) / n
+    # Transitions inside each byte plus those between neighbouring bytes
+    v_obs = (1 + _lookup(TRANSITIONS, data).sum(axis=1, dtype=np.int64) +
+             np.count_nonzero((data[:, :-1] & 1) != (data[:, 1:] >> 7), axis=1))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        p_values = erfc(np.abs(v_obs - 2.0 * n * pi * (1 - pi)) /
+                        (2.0 * math.sqrt(2 * n) * pi * (1 - pi)))
+    return np.where(np.abs(pi - 0.5) > 2.0 / math.sqrt(n), 0.0, p_values)
+
+def _trunc_div(a, b):
+    """C integer division (truncates towards zero)"""
+    return int(a / b)
+
+def _cusum_p_value(z, n):
+    """Cumulative sums P-VALUE for maximum excursion z (cusum.c)"""
+    sqrt_n = math.sqrt(n)
+    q = n // z
+    k1 = np.arange(_trunc_div(-q + 1, 4), _trunc_div(q - 1, 4) + 1)
+    k2 = np.arange(_trunc_div(-q - 3, 4), _trunc_div(q - 1, 4) + 1)
+    sum1 = (normal_cdf((4 * k1 + 1) * z / sqrt_n) - normal_cdf((4 * k1 - 1) * z / sqrt_n)).sum()
+    sum2 = (normal_cdf((4 * k2 + 3) * z / sqrt_n) - normal_cdf((4 * k2 + 1) * z / sqrt_n)).sum()
+    return 1.0 - sum1 + sum2
+
+def cumulative_sums_p_values(data):
+    """Cumulative sums test, forward and backward: returns two arrays
+
+    Partial sums are accumulated per byte; the extremes inside a byte come
+    from lookup tables, so only n/8 sums are formed per sequence.
+    """
+    n = data.shape[1] * 8
+    net = _lookup(STEP_NET, data)
+    before = np.cumsum(net, axis=1, dtype=np.int32) - net
+    highest = (before + _lookup(STEP_MAX, data)).max(axis=1)
+    lowest = (before + _lookup(STEP_MIN, data)).min(axis=1)
+    total = before[:, -1] + net[:, -1]
+    z_forward = np.maximum(highest, -lowest)
+    # Backward partial sums are total - S[j] for j < n - 1, plus the total itself
+    z_backward = np.maximum(np.abs(total), np.maximum(total - lowest, highest - total))
+    forward = np.array([_cusum_p_value(int(z), n) for z in z_forward])
+    backward = np.array([_cusum_p_value(int(z), n) for z in z_backward])
+    return forward, backward
+
+def batch_p_values(data):
+    """P-VALUEs of every TEST_ROWS row for a batch of sequences: (rows, sequences)"""
+    ones = byte_popcounts(data)
+    forward, backward = cumulative_sums_p_values(data)
+    return np.stack([frequency_p_values(data, ones),
+                     block_frequency_p_values(data, BLOCK_FREQUENCY_M, ones),
+                     forward, backward, runs_p_values(data, ones)])
+
+def beta_binomial_pmf(trials, a, b):
+    """P(R = r) for r = 0..trials, R ~ BetaBinomial(trials, a, b)"""
+    r = np.arange(trials + 1)
+    log_pmf = np.array([
+        math.lgamma(trials + 1) - math.lgamma(k + 1) - math.lgamma(trials - k + 1)
+        + math.lgamma(k + a) + math.lgamma(trials - k + b) - math.lgamma(trials + a + b)
+        - math.lgamma(a) - math.lgamma(b) + math.lgamma(a + b)
+        for k in r
+    ])
+    return np.exp(log_pmf)
+
+def proportion_outcome_probability(passed, used, total, alpha=ALPHA):
+    """Predictive probability that the full-size proportion test passes"""
+    failed = used - passed
+    remaining = total - used
+    threshold_min, threshold_max = (int(v[0]) for v in proportion_bounds([total], alpha))
+    if remaining == 0:
+        return float(threshold_min <= passed <= threshold_max)
+    pmf = beta_binomial_pmf(remaining, 1 + failed, 1 + passed)
+    final_passed = passed + remaining - np.arange(remaining + 1)
+    return float(pmf[(final_passed >= threshold_min) & (final_passed <= threshold_max)].sum())
+
+def uniformity_outcome_probability(histogram, total, rng, draws=PREDICTIVE_DRAWS):
+    """Predictive probability that the full-size uniformity P-VALUE is >= 0.0001"""
+    remaining = total - int(histogram.sum())
+    if remaining == 0:
+        return float(uniformity_p_values(histogram[None, :])[0] >= UNIFORMITY_ALPHA)
+    final = histogram + rng.multinomial(remaining, [0.1] * 10, size=draws)
+    return float((uniformity_p_values(final) >= UNIFORMITY_ALPHA).mean())
+
+def decide(passed, used, total, histogram, confidence, rng, alpha=ALPHA,
+           min_sequences=MIN_UNIFORMITY_SEQUENCES):
+    """'PASS' / 'FAIL' once the full-size outcome is decided, else None"""
+    p_proportion = proportion_outcome_probability(passed, used, total, alpha)
+    if 1.0 - p_proportion >= confidence:
+        return 'FAIL'
+    if used < min(min_sequences, total):
+        return None
+    p_uniformity = uniformity_outcome_probability(histogram, total, rng)
+    if 1.0 - p_uniformity >= confidence:
+        return 'FAIL'
+    if p_proportion >= confidence and p_uniformity >= confidence:
+        return 'PASS'
+    return None
+
+def sequential_test(filepath, sequence_length=SEQUENCE_LENGTH, streams=None,
+                    confidence=DEFAULT_CONFIDENCE, batch=DEFAULT_BATCH, alpha=ALPHA, seed=None):
+    """Run the sequential tests over a file; returns per-row state arrays"""
+    if sequence_length % 8:
+        raise ValueError("sequence length must be a multiple of 8 bits")
+    data = np.memmap(filepath, dtype=np.uint8, mode='r')
+    sequence_bytes = sequence_length // 8
+    available = len(data) // sequence_bytes
+    total = min(streams or min(MAX_BITSTREAMS, available), available)
+    if total == 0:
+        raise ValueError(f"{filepath} holds less than one {sequence_length}-bit sequence")
+    
+    rng = np.random.default_rng(seed)
+    rows = len(TEST_ROWS)
+    histograms = np.zeros((rows, 10), dtype=np.int64)
+    passed = np.zeros(rows, dtype=np.int64)
+    used = np.zeros(rows, dtype=np.int64)
+    decision = [None] * rows
+    
+    start = 0
+    while start < total and any(d is None for d in decision):
+        stop = min(start + batch, total)
+        sequences = np.asarray(data[start * sequence_bytes:stop * sequence_bytes])
+        p_values = batch_p_values(sequences.reshape(stop - start, sequence_bytes))
+        for row in range(rows):
+            if decision[row] is not None:
+                continue
+            bins = np.minimum((p_values[row] * 10).astype(np.int64), 9)
+            histograms[row] += np.bincount(bins, minlength=10)
+            passed[row] += int((p_values[row] >= alpha).sum())
+            used[row] += stop - start
+            decision[row] = decide(int(passed[row]), int(used[row]), total, histograms[row],
+                                   confidence, rng, alpha)
+        start = stop
+    
+    return {
+        'file': str(filepath),
+        'sequence_length': sequence_length,
+        'sample_size': total,
+        'confidence': confidence,
+        'test_names': list(TEST_ROWS),
+        'histograms': histograms,
+        'passed': passed,
+        'used': used,
+        'decisions': decision,
+        'sequences_read': start
+    }
+
+def format_report(result, alpha=ALPHA):
+    """finalAnalysisReport.txt text for a sequential_test result"""
+    rule = '-' * 78
+    lines = [
+        rule,
+        'RESULTS FOR THE UNIFORMITY OF P-VALUES AND THE PROPORTION OF PASSING SEQUENCES',
+        rule,
+        f"   generator is <{result['file']}>",
+        rule,
+        ' C1  C2  C3  C4  C5  C6  C7  C8  C9 C10  P-VALUE  PROPORTION  STATISTICAL TEST',
+        rule
+    ]
+    for row, name in enumerate(result['test_names']):
+        used = int(result['used'][row])
+        passed = int(result['passed'][row])
+        threshold_min, threshold_max = (int(v[0]) for v in proportion_bounds([used], alpha))
+        counts = ''.join(f"{c:3d} " for c in result['histograms'][row])
+        if used >= MIN_UNIFORMITY_SEQUENCES:
+            p_value = uniformity_p_values(result['histograms'][row:row + 1])[0]
+            p_value = f"{p_value:9.6f} {'*' if p_value < UNIFORMITY_ALPHA else ' '}"
+        else:
+            p_value = '   ----    '
+        proportion_flag = '*' if not threshold_min <= passed <= threshold_max else ' '
+        lines.append(f"{counts}{p_value} {passed:5d}/{used:<5d}{proportion_flag}    {name}")
+    
+    lines += [
+        '',
+        '',
+        '- ' * 40,
+        f"SEQUENTIAL MODE: confidence = {result['confidence']}, maximum sample size = "
+        f"{result['sample_size']} binary sequences of {result['sequence_length']} bits.",
+        f"Sequences read = {result['sequences_read']}.",
+        ''
+    ]
+    for row, name in enumerate(result['test_names']):
+        decision = result['decisions'][row] or 'UNDECIDED'
+        lines.append(f"   {name:<24} decided {decision:<9} after {int(result['used'][row])} "
+                     f"of {result['sample_size']} sequences")
+    lines.append('- ' * 40)
+    return '\n'.join(lines) + '\n'
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(
+        description='Sequential (early-stopping) SP 800-22 re-validation of a binary file',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  %(prog)s sqef_sliced_256bit_500000keys_from_STANDARD_master.bin
+  %(prog)s build.bin --streams 125 --confidence 0.999 --output finalAnalysisReport.txt
+        """
+    )
+    parser.add_argument('file', help='Binary file to test')
+    parser.add_argument('--sequence-length', type=int, default=SEQUENCE_LENGTH,
+                        help=f'Bits per sequence (default: {SEQUENCE_LENGTH})')
+    parser.add_argument('--streams', type=int, help='Full sample size (default: file size, max 1000)')
+    parser.add_argument('--confidence', type=float, default=DEFAULT_CONFIDENCE,
+                        help=f'Stop once the outcome is this certain (default: {DEFAULT_CONFIDENCE})')
+    parser.add_argument('--batch', type=int, default=DEFAULT_BATCH,
+                        help=f'Sequences per batch (default: {DEFAULT_BATCH})')
+    parser.add_argument('--alpha', type=float, default=ALPHA, help='Significance level (default: 0.01)')
+    parser.add_argument('--seed', type=int, help='Random seed for the predictive draws')
+    parser.add_argument('--output', '-o', help='Write the finalAnalysisReport.txt-format report here')
+    parser.add_argument('--json', action='store_true', help='Print the result as JSON')
+    
+    args = parser.parse_args()
+    
+    if not Path(args.file).exists():
+        print(f"❌ Error: File not found: {args.file}")
+        return 1
+    
+    result = sequential_test(args.file, args.sequence_length, args.streams, args.confidence,
+                             args.batch, args.alpha, args.seed)
+    report = format_report(result, args.alpha)
+    
+    if args.json:
+        print(json.dumps({
+            **{k: v for k, v in result.items() if k not in ('histograms', 'passed', 'used')},
+            'histograms': result['histograms'].tolist(),
+            'passed': result['passed'].tolist(),
+            'used': result['used'].tolist()
+        }, indent=2))
+    else:
+        print(report)
+    
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(report)
+        print(f"✅ Report saved to: {args.output}")
+    
+    return 1 if 'FAIL' in result['decisions'] else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+SQEF Slice Provenance
+Locates each sqef_sliced_*_from_<LEVEL>_master.bin inside its
+sqef_master_512mb_<LEVEL>_for_slicing.bin and verifies it byte for byte
+
+The master is indexed once by a 64-bit polynomial fingerprint of every aligned
+block, kept as a sorted array. The fingerprints of all block-sized windows at
+the head of a slice are computed at once (rolling hash), looked up in the
+index, and each candidate offset is confirmed by comparing the whole slice
+against the memory-mapped master.
+"""
+
+import os
+import sys
+import json
+import argparse
+from pathlib import Path
+from datetime import datetime
+
+import numpy as np
+
+from sqef_key_files import scan_key_files
+from sqef_test_summary_generator import get_configuration_from_path
+
+BLOCK_SIZE = 4096
+HASH_BASE = 0x100000001B3
+COMPARE_CHUNK = 16 * 1024 * 1024
+INDEX_CHUNK_BLOCKS = 4096
+
+FINGERPRINT_DTYPE = np.dtype([('fingerprint', '<u8'), ('block', '<u8')])
+
+_MASK = (1 << 64) - 1
+
+def _powers(base, count):
+    """base**0 .. base**(count-1) modulo 2**64"""
+    powers = np.empty(count, dtype=np.uint64)
+    value = 1
+    for i in range(count):
+        powers[i] = value
+        value = (value * base) & _MASK
+    return powers
+
+def is_master_file(filepath):
+    """True for sqef_master_*_for_slicing.bin files"""
+    return Path(filepath).name.startswith('sqef_master_')
+
+def map_file(filepath):
+    """Map a file read-only as a flat uint8 array"""
+    if Path(filepath).stat().st_size == 0:
+        return np.empty(0, dtype=np.uint8)
+    return np.memmap(filepath, dtype=np.uint8, mode='r')
+
+class FingerprintIndex:
+    """Sorted fingerprints of the aligned blocks of one master file"""
+    
+    __slots__ = ('path', 'data', 'block_size', 'entries', '_window_powers')
+    
+    def __init__(self, path, block_size=BLOCK_SIZE):
+        self.path = Path(path)
+        self.data = map_file(path)
+        self.block_size = block_size
+        # Block fingerprint: sum(b[i] * HASH_BASE**(block_size - 1 - i)) mod 2**64
+        self._window_powers = _powers(HASH_BASE, block_size)[::-1].copy()
+        self.entries = self._build()
+    
+    def _build(self):
+        num_blocks = len(self.data) // self.block_size
+        entries = np.empty(num_blocks, dtype=FINGERPRINT_DTYPE)
+        entries['block'] = np.arange(num_blocks, dtype=np.uint64)
+        blocks = self.data[:num_blocks * self.block_size].reshape(num_blocks, self.block_size)
+        for start in range(0, num_blocks, INDEX_CHUNK_BLOCKS):
+            chunk = np.asarray(blocks[start:start + INDEX_CHUNK_BLOCKS], dtype=np.uint64)
+            entries['fingerprint'][start:start + len(chunk)] = chunk @ self._window_powers
+        entries.sort(order='fingerprint', kind='stable')
+        return entries
+    
+    def __len__(self):
+        return len(self.entries)
+    
+    def window_fingerprints(self, head):
+        """Fingerprint of every block-sized window of `head`, via prefix sums
+
+        HASH_BASE is odd, hence invertible modulo 2**64, so window p is
+        HASH_BASE**(p + B - 1) * (S[p + B] - S[p]) with S the prefix sums of
+        b[i] * HASH_BASE**-i.
+        """
+        size = self.block_size
+        windows = len(head) - size + 1
+        if windows <= 0:
+            return np.empty(0, dtype=np.uint64)
+        inverse = pow(HASH_BASE, -1, 1 << 64)
+        scaled = np.asarray(head, dtype=np.uint64) * _powers(inverse, len(head))
+        prefix = np.concatenate((np.zeros(1, dtype=np.uint64), np.cumsum(scaled, dtype=np.uint64)))
+        scale = _powers(HASH_BASE, windows + size - 1)[size - 1:]
+        return scale * (prefix[size:size + windows] - prefix[:windows])
+    
+    def candidate_offsets(self, head):
+        """Master offsets at which `head` may start, in slice-window order"""
+        fingerprints = self.window_fingerprints(head)
+        keys = self.entries['fingerprint']
+        lo = np.searchsorted(keys, fingerprints, side='left')
+        hi = np.searchsorted(keys, fingerprints, side='right')
+        for position in np.flatnonzero(hi > lo):
+            for block in self.entries['block'][lo[position]:hi[position]]:
+                offset = int(block) * self.block_size - int(position)
+                if offset >= 0:
+                    yield offset
+
+def matching_length(master, offset, data):
+    """Number of leading bytes of `data` equal to master[offset:]"""
+    length = min(len(data), len(master) - offset)
+    for start in range(0, length, COMPARE_CHUNK):
+        stop = min(start + COMPARE_CHUNK, length)
+        differs = np.flatnonzero(master[offset + start:offset + stop] != data[start:stop])
+        if len(differs):
+            return start + int(differs[0])
+    return length
+
+def locate_slice(index, slice_path):
+    """Find and verify the offset of a slice inside an indexed master
+
+    Returns a dict with the verified offset, or the best partial match.
+    """
+    data = map_file(slice_path)
+    head = data[:2 * index.block_size - 1]
+    result = {'slice_size': len(data), 'offset': None, 'verified': False, 'matched_bytes': 0}
+    if len(data) < index.block_size:
+        result['error'] = f'slice shorter than one {index.block_size}-byte block'
+        return result
+    
+    tried = set()
+    for offset in index.candidate_offsets(head):
+        if offset in tried:
+            continue
+        tried.add(offset)
+        matched = matching_length(index.data, offset, data)
+        if matched > result['matched_bytes']:
+            result.update({'offset': offset, 'matched_bytes': matched})
+        if matched == len(data):
+            result['verified'] = True
+            break
+    result['candidates'] = len(tried)
+    return result
+
+def find_masters(root_path):
+    """Master files below root_path keyed by security level"""
+    masters = {}
+    for path in scan_key_files(root_path):
+        if is_master_file(path):
+            masters.setdefault(get_configuration_from_path(path.name)['security_level'], path)
+    return masters
+
+def verify_tree(root_path, block_size=BLOCK_SIZE):
+    """Locate every slice below root_path in the master of its security level"""
+    root = Path(root_path)
+    masters = find_masters(root)
+    indexes = {}
+    results = []
+    
+    for slice_path in scan_key_files(root):
+        if is_master_file(slice_path):
+            continue
+        level = get_configuration_from_path(slice_path.name)['security_level']
+        entry = {
+            'relative_path': str(slice_path.relative_to(root)).replace('\\', '/'),
+            'security_level': level,
+            'master': None
+        }
+        
+        # Fall back to the other masters so a mislabelled slice is still located
+        order = [level] + sorted(l for l in masters if l != level) if level in masters else sorted(masters)
+        for candidate_level in order:
+            if candidate_level not in indexes:
+                print(f"Indexing: {masters[candidate_level].name}")
+                indexes[candidate_level] = FingerprintIndex(masters[candidate_level], block_size)
+            found = locate_slice(indexes[candidate_level], slice_path)
+            if entry['master'] is None or found['matched_bytes'] > entry['matched_bytes']:
+                entry.update(found)
+                entry['master'] = str(masters[candidate_level].relative_to(root)).replace('\\', '/')
+            if found['verified']:
+                break
+        
+        entry['master_matches_name'] = entry.get('verified', False) and entry['master'] is not None \
+            and get_configuration_from_path(Path(entry['master']).name)['security_level'] == level
+        status = '✅' if entry['master_matches_name'] else '❌'
+        location = f"offset {entry['offset']}" if entry.get('verified') else \
+            f"{entry.get('matched_bytes', 0)} of {entry.get('slice_size', 0)} bytes matched"
+        print(f"  {status} {slice_path.name}: {location}")
+        results.append(entry)
+    
+    return masters, results
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(
+        description='Verify that sliced key files are cut from their master files',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  %(prog)s ../sample-outputs
+  %(prog)s ../sample-outputs --block-size 65536
+        """
+    )
+    parser.add_argument('path', nargs='?', default=os.getcwd(),
+                        help='Root directory containing master and sliced .bin files (default: current directory)')
+    parser.add_argument('--block-size', type=int, default=BLOCK_SIZE,
+                        help=f'Indexed master block size in bytes (default: {BLOCK_SIZE})')
+    
+    args = parser.parse_args()
+    
+    root_path = os.path.abspath(args.path)
+    masters, results = verify_tree(root_path, args.block_size)
+    if not masters:
+        print("❌ No sqef_master_*_for_slicing.bin files found!")
+        return 1
+    
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    json_path = os.path.join(root_path, f"sqef_provenance_{timestamp}.json")
+    with open(json_path, 'w', encoding='utf-8') as f:
+        json.dump({
+            'generated': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'root_path': str(root_path),
+            'block_size': args.block_size,
+            'masters': {level: str(p.relative_to(root_path)).replace('\\', '/')
+                        for level, p in sorted(masters.items())},
+            'total_slices': len(results),
+            'verified_slices': sum(1 for r in results if r['master_matches_name']),
+            'slices': results
+        }, f, indent=2)
+    print(f"✓ Provenance report saved to: {json_path}")
+    
+    return 0 if all(r['master_matches_name'] for r in results) else 1
+
+if __name__ == '__main__':
+    sys.exit(main())
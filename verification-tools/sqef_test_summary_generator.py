@@ -7,83 +7,95 @@ Correctly counts all individual NIST tests (not just test types)
 """
 
 import os
+import sys
 import re
 import json
+import time
+import fnmatch
+import argparse
 from pathlib import Path
-from datetime import datetime
+from datetime import datetime, timezone
 import hashlib
+import zlib
 
-def parse_final_analysis_report(filepath):
-    """Parse NIST finalAnalysisReport.txt for detailed results"""
-    results = {}
-    
+from sqef_report_io import map_report, iter_entropy_sections, parse_entropy_section, find_variant, glob_reports
+from sqef_result_table import ResultTable
+from sqef_profile import add_profile_arguments, profiler_from_args, count_rows
+
+MASTER_SUMMARY = 'MASTER_SUMMARY.json'
+PARTIAL_PATTERN = 'MASTER_SUMMARY.shard-*-of-*.json'
+ENTROPY_DIRECTORIES = ['sp800-90b-results', 'SP800-90B-results', 'entropy-assessment']
+REPORT_PATTERNS = ['*finalAnalysisReport*.txt', '*final*.txt', '*Analysis*.txt']
+ENTROPY_PATTERN = 'entropy-assessment-*.txt'
+COMPRESSED_SUFFIXES = ('', '.gz', '.xz', '.zst')
+
+DEFAULT_POLL_SECONDS = 5.0
+DEFAULT_DEBOUNCE_SECONDS = 10.0
+
+def generation_time():
+    """Timestamp for generated files; honours SOURCE_DATE_EPOCH for reproducible output"""
+    epoch = os.environ.get('SOURCE_DATE_EPOCH')
+    if epoch:
+        return datetime.fromtimestamp(int(epoch), timezone.utc).replace(tzinfo=None)
+    return datetime.now()
+
+def parse_shard(spec):
+    """'i/N' (1 <= i <= N) -> (i, N)"""
     try:
-        with open(filepath, 'r', encoding='utf-8', errors='ignore') as f:
-            content = f.read()
+        index, count = (int(part) for part in spec.split('/'))
+    except ValueError:
+        raise ValueError(f"shard must look like i/N, got {spec!r}")
+    if not 1 <= index <= count:
+        raise ValueError(f"shard index must be between 1 and {count}, got {index}")
+    return index, count
+
+def in_shard(relative_path, shard):
+    """Whether a path belongs to shard (i, N); stable across machines and runs"""
+    if shard is None:
+        return True
+    index, count = shard
+    key = str(relative_path).replace('\\', '/').encode('utf-8')
+    return zlib.crc32(key) % count == index - 1
+
+def load_result_table(filepath):
+    """Load every result row of a finalAnalysisReport.txt into a ResultTable"""
+    try:
+        return ResultTable.from_report(filepath)
     except Exception as e:
         print(f"❌ Error reading {filepath}: {e}")
         return None
-    
-    # Extract test results with p-values
-    for line in content.split('\n'):
-        # Look for lines with test results
-        if '/' in line and not line.startswith('-'):
-            # Try to extract p-value and proportion
-            parts = line.split()
-            if len(parts) >= 3:
-                # Find the test name (last column)
-                test_name = parts[-1]
-                
-                # Find the proportion (e.g., "123/125")
-                for part in parts:
-                    if '/' in part:
-                        try:
-                            passed, total = part.split('/')
-                            passed = int(passed)
-                            total = int(total)
-                            
-                            # Find p-value (usually before proportion)
-                            p_value = None
-                            idx = parts.index(part)
-                            if idx > 0:
-                                try:
-                                    p_value = float(parts[idx-1])
-                                except:
-                                    pass
-                            
-                            # Check for asterisk (uniformity failure)
-                            has_asterisk = '*' in line
-                            
-                            if test_name not in results:
-                                results[test_name] = {
-                                    'test_name': test_name,
-                                    'passed': passed,
-                                    'total': total,
-                                    'pass_rate': passed / total,
-                                    'percentage': f"{(passed/total)*100:.2f}%",
-                                    'p_value': p_value,
-                                    'meets_requirement': (passed/total) >= 0.96 and not has_asterisk,
-                                    'uniformity_fail': has_asterisk
-                                }
-                            break
-                        except:
-                            continue
-    
+
+def legacy_test_results(table):
+    """One entry per test name (first occurrence), as stored in 'individual_tests'"""
+    results = {}
+    for test_name, i in table.first_row_indexes().items():
+        row = table.row_dict(i)
+        has_asterisk = row['uniformity_flag'] or row['proportion_flag']
+        results[test_name] = {
+            'test_name': test_name,
+            'passed': row['passed'],
+            'total': row['total'],
+            'pass_rate': row['pass_rate'],
+            'percentage': row['percentage'],
+            'p_value': row['p_value'],
+            'meets_requirement': row['meets_requirement'],
+            'uniformity_fail': has_asterisk
+        }
     return results
 
+def parse_final_analysis_report(filepath):
+    """Parse NIST finalAnalysisReport.txt for detailed results"""
+    table = load_result_table(filepath)
+    if table is None:
+        return None
+    return legacy_test_results(table)
+
 def parse_consolidated_entropy_file(entropy_file, key_size, security_level):
     """Parse entropy data for specific key size from consolidated file"""
     
     if not entropy_file or not entropy_file.exists():
         return {}
     
-    try:
-        with open(entropy_file, 'r', encoding='utf-8', errors='ignore') as f:
-            content = f.read()
-    except Exception as e:
-        print(f"  ❌ Error reading entropy file: {e}")
-        return {}
-    
     # Map directory key size to entropy file key size patterns
     # Use underscores to be more specific and avoid false matches
     size_mappings = {
@@ -103,69 +115,45 @@ def parse_consolidated_entropy_file(entropy_file, key_size, security_level):
     
     # Get patterns to search for
     patterns = size_mappings.get(key_size, [f"_{key_size.replace('-', '')}_"])
+    patterns = [pattern.lower() for pattern in patterns]
     
-    # Split content into sections (each starting with a filename)
-    sections = re.split(r'^(.*\.bin\s+\d+)$', content, flags=re.MULTILINE)
-    
-    entropy_data = {}
-    found_section = False
-    best_match = None
-    best_match_content = None
-    
-    # Look for the best matching section
-    for i in range(1, len(sections), 2):
-        if i + 1 < len(sections):
-            header = sections[i]
-            section_content = sections[i + 1]
-            
-            # Check if this section matches our key size
-            header_lower = header.lower()
-            
-            for pattern in patterns:
-                if pattern.lower() in header_lower:
-                    # Since we're reading from a security-level-specific file,
-                    # we don't need to verify security level in the filename
-                    # Just take the first match for the key size
+    try:
+        with map_report(entropy_file) as buf:
+            # Walk the section headers (each starting with a filename)
+            sections = []
+            best_match = None
+            for filename, bits, start, end in iter_entropy_sections(buf):
+                header = f"{filename} {bits}"
+                sections.append(header)
+                
+                # Since we're reading from a security-level-specific file,
+                # we don't need to verify security level in the filename
+                # Just take the first match for the key size
+                if any(pattern in filename.lower() for pattern in patterns):
                     best_match = header
-                    best_match_content = section_content
-                    found_section = True
+                    values, verdicts = parse_entropy_section(buf, start, end)
                     break
-            
-            if found_section:
-                break
+    except Exception as e:
+        print(f"  ❌ Error reading entropy file: {e}")
+        return {}
     
-    if found_section and best_match_content:
-        print(f"  📊 Found entropy section: {best_match.strip()}")
-        
-        # Parse this section
-        h_orig_match = re.search(r'H_original:\s*(\d+\.?\d*)', best_match_content)
-        if h_orig_match:
-            entropy_data['h_original'] = float(h_orig_match.group(1))
-        
-        h_bit_match = re.search(r'H_bitstring:\s*(\d+\.?\d*)', best_match_content)
-        if h_bit_match:
-            entropy_data['h_bitstring'] = float(h_bit_match.group(1))
+    entropy_data = {}
+    
+    if best_match:
+        print(f"  📊 Found entropy section: {best_match}")
         
-        min_match = re.search(r'min\([^)]+\):\s*(\d+\.?\d*)', best_match_content)
-        if min_match:
-            entropy_data['min_entropy'] = float(min_match.group(1))
-            entropy_data['min_entropy_per_byte'] = f"{float(min_match.group(1)):.6f} bits/byte"
+        for key in ('h_original', 'h_bitstring', 'min_entropy'):
+            if key in values:
+                entropy_data[key] = values[key]
+        if 'min_entropy' in values:
+            entropy_data['min_entropy_per_byte'] = f"{values['min_entropy']:.6f} bits/byte"
         
         # Check for test passes
-        if 'Passed chi square tests' in best_match_content:
-            entropy_data['chi_square_test'] = 'PASSED'
-        elif 'Failed chi square tests' in best_match_content:
-            entropy_data['chi_square_test'] = 'FAILED'
-            
-        if 'Passed IID permutation tests' in best_match_content:
-            entropy_data['iid_test'] = 'PASSED'
-        elif 'Failed IID permutation tests' in best_match_content:
-            entropy_data['iid_test'] = 'FAILED'
-            
-        if 'Passed length of longest repeated substring test' in best_match_content:
-            entropy_data['lrs_test'] = 'PASSED'
-        elif 'Failed length of longest repeated substring test' in best_match_content:
-            entropy_data['lrs_test'] = 'FAILED'
+        for test_name, summary_key in (('chi_square', 'chi_square_test'),
+                                       ('iid_permutation', 'iid_test'),
+                                       ('lrs', 'lrs_test')):
+            if test_name in verdicts:
+                entropy_data[summary_key] = verdicts[test_name]
         
         # Calculate entropy percentage
         if 'min_entropy' in entropy_data:
@@ -184,17 +172,15 @@ def parse_consolidated_entropy_file(entropy_file, key_size, security_level):
         # Debug: show available sections
         print(f"      Looking for pattern: {patterns}")
         print(f"      Available sections in file:")
-        for i in range(1, min(len(sections), 11), 2):  # Show first 5 sections
-            if i < len(sections):
-                header = sections[i].strip()
-                # Extract just the key size part for clarity
-                size_part = "unknown"
-                for size in ['256bit', '512bit', '1024bit', '2048bit', '4096bit', 
-                           '1KB', '4KB', '1MB', '16MB', '256MB', '512MB']:
-                    if size.lower() in header.lower():
-                        size_part = size
-                        break
-                print(f"      - {size_part}: {header[:60]}...")
+        for header in sections[:5]:  # Show first 5 sections
+            # Extract just the key size part for clarity
+            size_part = "unknown"
+            for size in ['256bit', '512bit', '1024bit', '2048bit', '4096bit', 
+                       '1KB', '4KB', '1MB', '16MB', '256MB', '512MB']:
+                if size.lower() in header.lower():
+                    size_part = size
+                    break
+            print(f"      - {size_part}: {header[:60]}...")
     
     return entropy_data
 
@@ -262,13 +248,13 @@ def get_entropy_data(root_path, directory_path):
         print(f"  ⚠️  No entropy results folder found")
         return {}
     
-    # Get the consolidated entropy file
-    entropy_file = entropy_dir / entropy_filename
-    if not entropy_file.exists():
+    # Get the consolidated entropy file (plain or .gz/.xz/.zst)
+    entropy_file = find_variant(entropy_dir / entropy_filename)
+    if not entropy_file:
         print(f"  ⚠️  Entropy file not found: {entropy_filename}")
         return {}
     
-    print(f"  📄 Reading entropy file: {entropy_filename}")
+    print(f"  📄 Reading entropy file: {entropy_file.name}")
     
     # Parse the specific section from the consolidated file
     return parse_consolidated_entropy_file(entropy_file, key_size, security_level)
@@ -332,7 +318,7 @@ def generate_summary(directory, root_path):
     # Find the final analysis report
     report_file = None
     for pattern in ['*finalAnalysisReport*.txt', '*final*.txt', '*Analysis*.txt']:
-        files = list(directory.glob(pattern))
+        files = glob_reports(directory, pattern)
         if files:
             report_file = files[0]
             break
@@ -343,11 +329,12 @@ def generate_summary(directory, root_path):
     
     print(f"  📄 Found report: {report_file.name}")
     
-    # Parse the report
-    test_results = parse_final_analysis_report(report_file)
-    if not test_results:
+    # Parse the report - every row is kept, including repeated test names
+    table = load_result_table(report_file)
+    if table is None or len(table) == 0:
         print(f"  ❌ Could not parse test results")
         return None
+    test_results = legacy_test_results(table)
     
     # Get configuration from path
     config = get_configuration_from_path(directory)
@@ -361,52 +348,18 @@ def generate_summary(directory, root_path):
     # Count ALL individual tests (don't group by type)
     # The NIST requirement is that ≥96% of individual tests pass
     # Not that ≥96% of test types pass
-    total_tests = 0
-    passed_tests = 0
-    
-    # Parse the actual number of tests from the report
-    # Each line in the report with a pass/fail ratio is a separate test
-    try:
-        with open(report_file, 'r', encoding='utf-8', errors='ignore') as f:
-            report_content = f.read()
-            
-        for line in report_content.split('\n'):
-            if '/' in line and not line.startswith('-') and not line.startswith('The minimum'):
-                parts = line.split()
-                if len(parts) >= 3:
-                    # Find the proportion (e.g., "123/125")
-                    for part in parts:
-                        if '/' in part:
-                            try:
-                                passed, total = part.split('/')
-                                passed = int(passed)
-                                total = int(total)
-                                
-                                # This is one test
-                                total_tests += 1
-                                
-                                # Check if it meets the requirement
-                                pass_rate = passed / total
-                                has_asterisk = '*' in line
-                                if pass_rate >= 0.96 and not has_asterisk:
-                                    passed_tests += 1
-                                    
-                                break
-                            except:
-                                continue
-    except:
-        # Fallback to the old method if parsing fails
-        total_tests = len(test_results)
-        passed_tests = sum(1 for r in test_results.values() if r['meets_requirement'])
-    
-    overall_pass_rate = passed_tests / total_tests if total_tests > 0 else 0
+    # Each row in the report with a pass/fail ratio is a separate test
+    table_summary = table.summary()
+    total_tests = table_summary['total_tests']
+    passed_tests = table_summary['passed_tests']
+    overall_pass_rate = table_summary['overall_pass_rate']
     
     # Print clarification about test counting
     print(f"  📊 Found {total_tests} individual tests ({len(test_results)} unique test types)")
     print(f"  ✅ {passed_tests}/{total_tests} individual tests passed ({overall_pass_rate*100:.2f}%)")
     
     # Get list of all binary files for checksums (optional, limit to first 5)
-    bin_files = list(directory.glob('*.bin'))
+    bin_files = sorted(directory.glob('*.bin'))
     file_checksums = {}
     
     for bin_file in bin_files[:5]:  # Limit to first 5 files for summary
@@ -426,7 +379,7 @@ def generate_summary(directory, root_path):
     # Create comprehensive summary
     summary = {
         'metadata': {
-            'generated': datetime.now().isoformat(),
+            'generated': generation_time().isoformat(),
             'generator': 'SQEF Test Summary Generator v2.1',
             'directory': str(directory.relative_to(root_path)),
             'report_file': report_file.name
@@ -440,11 +393,12 @@ def generate_summary(directory, root_path):
             'pass_percentage': f"{overall_pass_rate*100:.2f}%",
             'meets_nist_requirement': overall_pass_rate >= 0.96,
             'status': 'PASSED' if overall_pass_rate >= 0.96 else 'FAILED',
-            'unique_test_types': len(test_results),  # For reference
+            'unique_test_types': table_summary['unique_test_types'],  # For reference
             'note': 'NIST requires ≥96% of individual tests to pass, not test types'
         },
         'entropy_assessment': entropy_data if entropy_data else None,
         'individual_tests': test_results,
+        'test_rows': table.to_records(),  # Every row, in report order, with C1-C10 counts
         'test_categories': {
             'frequency_tests': {},
             'runs_tests': {},
@@ -455,7 +409,7 @@ def generate_summary(directory, root_path):
         'file_checksums': file_checksums if file_checksums else None
     }
     
-    # Categorize tests
+    # Categorize tests (first row of each test name)
     for test_name, result in test_results.items():
         if 'Frequency' in test_name:
             summary['test_categories']['frequency_tests'][test_name] = result
@@ -479,8 +433,204 @@ def generate_summary(directory, root_path):
         print(f"  ❌ Error saving summary: {e}")
         return None
 
-def process_all_directories(root_path):
-    """Process all test directories recursively"""
+def master_summary_entry(summary):
+    """Condense one summary.json into its MASTER_SUMMARY.json entry"""
+    return {
+        **summary['overall_results'],
+        'configuration': summary['configuration'],
+        'entropy_min': summary['entropy_assessment'].get('min_entropy') if summary['entropy_assessment'] else None
+    }
+
+def write_master_summary(root_path, all_summaries):
+    """Write MASTER_SUMMARY.json at root_path from {relative directory: entry}"""
+    master_summary = {
+        'metadata': {
+            'generated': generation_time().isoformat(),
+            'total_test_configurations': len(all_summaries),
+            'all_configurations_pass': all(
+                s['meets_nist_requirement'] for s in all_summaries.values()
+            )
+        },
+        'test_configurations': all_summaries
+    }
+    
+    master_file = Path(root_path) / MASTER_SUMMARY
+    try:
+        with open(master_file, 'w', encoding='utf-8') as f:
+            json.dump(master_summary, f, indent=2)
+        print(f"\n✅ Created master summary: {master_file}")
+        return master_file
+    except Exception as e:
+        print(f"\n❌ Error creating master summary: {e}")
+        return None
+
+def find_test_directories(root_path):
+    """Directories holding a final analysis report, outside the entropy results"""
+    root_path = Path(root_path)
+    test_dirs = set()
+    
+    # Look for directories with finalAnalysisReport files
+    for report_file in glob_reports(root_path, REPORT_PATTERNS[0], recursive=True):
+        # Skip if in sp800-90b-results folder
+        if 'sp800-90b' not in str(report_file).lower():
+            test_dirs.add(report_file.parent)
+    
+    # Also look for other report patterns
+    for pattern in REPORT_PATTERNS[1:]:
+        for report_file in glob_reports(root_path, pattern, recursive=True):
+            if 'sp800-90b' not in str(report_file).lower() and 'entropy' not in str(report_file).lower():
+                test_dirs.add(report_file.parent)
+    
+    return test_dirs
+
+def watched_files(root_path):
+    """{path: (size, mtime)} of every report and entropy file, from one walk of the tree"""
+    report_patterns = [p + suffix for p in REPORT_PATTERNS for suffix in COMPRESSED_SUFFIXES]
+    entropy_patterns = [ENTROPY_PATTERN + suffix for suffix in COMPRESSED_SUFFIXES]
+    files = {}
+    for directory, _, filenames in os.walk(root_path):
+        for filename in filenames:
+            if not any(fnmatch.fnmatchcase(filename, p) for p in report_patterns + entropy_patterns):
+                continue
+            path = Path(directory) / filename
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            files[path] = (stat.st_size, stat.st_mtime_ns)
+    return files
+
+def affected_directories(root_path, changed_files, test_dirs):
+    """Test directories whose summary depends on any of the changed files"""
+    affected = set()
+    for path in changed_files:
+        if fnmatch.fnmatchcase(path.name, ENTROPY_PATTERN + '*'):
+            # A consolidated entropy file feeds every directory of its security level
+            level = get_configuration_from_path(path.name.upper())['security_level']
+            affected.update(d for d in test_dirs
+                            if level == 'UNKNOWN' or get_configuration_from_path(d)['security_level'] == level)
+        elif path.parent in test_dirs:
+            affected.add(path.parent)
+    return affected
+
+def update_summaries(root_path, changed_files, all_summaries):
+    """Regenerate the summaries affected by changed_files, then the master summary"""
+    root_path = Path(root_path)
+    test_dirs = find_test_directories(root_path)
+    
+    # Directories whose report disappeared drop out of the master summary
+    for rel_path in list(all_summaries):
+        if root_path / rel_path not in test_dirs:
+            del all_summaries[rel_path]
+    
+    for test_dir in sorted(affected_directories(root_path, changed_files, test_dirs)):
+        rel_path = str(test_dir.relative_to(root_path))
+        summary = generate_summary(test_dir, root_path)
+        if summary:
+            all_summaries[rel_path] = master_summary_entry(summary)
+        else:
+            all_summaries.pop(rel_path, None)
+    
+    ordered = {rel_path: all_summaries[rel_path] for rel_path in sorted(all_summaries, key=Path)}
+    if ordered:
+        write_master_summary(root_path, ordered)
+    return ordered
+
+def watch_directories(root_path, interval=DEFAULT_POLL_SECONDS, debounce=DEFAULT_DEBOUNCE_SECONDS):
+    """Process everything once, then keep summaries current as reports land
+    
+    The tree is walked once per interval (file names and stats only). Changes
+    are collected until no file has changed for debounce seconds, so a test
+    run that is still writing its reports triggers one update when it ends.
+    """
+    root_path = Path(root_path)
+    all_summaries = process_all_directories(root_path)
+    known = watched_files(root_path)
+    pending = set()
+    last_change = 0.0
+    
+    print(f"\n👀 Watching {root_path} every {interval:g}s, debounce {debounce:g}s (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(interval)
+            current = watched_files(root_path)
+            changed = {p for p in known.keys() | current.keys() if known.get(p) != current.get(p)}
+            known = current
+            if changed:
+                pending |= changed
+                last_change = time.monotonic()
+                continue
+            if pending and time.monotonic() - last_change >= debounce:
+                print(f"\n🔄 {len(pending)} changed files: "
+                      f"{', '.join(sorted(str(p.relative_to(root_path)) for p in pending))}")
+                start = time.perf_counter()
+                update_summaries(root_path, pending, all_summaries)
+                print(f"✅ Updated in {time.perf_counter() - start:.2f}s")
+                pending = set()
+    except KeyboardInterrupt:
+        print("\nStopped watching")
+
+def partial_summary_path(directory, shard):
+    """MASTER_SUMMARY.shard-i-of-N.json in directory"""
+    return Path(directory) / f"MASTER_SUMMARY.shard-{shard[0]}-of-{shard[1]}.json"
+
+def write_partial_summary(directory, shard, all_summaries):
+    """Write one shard's master summary entries for a later merge"""
+    partial_file = partial_summary_path(directory, shard)
+    try:
+        with open(partial_file, 'w', encoding='utf-8') as f:
+            json.dump({'shard': list(shard), 'test_configurations': all_summaries}, f, indent=2)
+        print(f"\n✅ Created partial master summary: {partial_file}")
+        return partial_file
+    except Exception as e:
+        print(f"\n❌ Error creating partial master summary: {e}")
+        return None
+
+def merge_partial_summaries(root_path, partial_dir=None):
+    """Combine every shard's partial summary into MASTER_SUMMARY.json
+    
+    Entries are ordered as a single-node run orders its directories, so with
+    the same SOURCE_DATE_EPOCH the result is byte-identical to one.
+    """
+    partial_files = sorted(Path(partial_dir or root_path).glob(PARTIAL_PATTERN))
+    if not partial_files:
+        print(f"❌ No partial summaries ({PARTIAL_PATTERN}) found")
+        return None
+    
+    merged = {}
+    shards = set()
+    counts = set()
+    for partial_file in partial_files:
+        with open(partial_file, 'r', encoding='utf-8') as f:
+            partial = json.load(f)
+        index, count = partial['shard']
+        shards.add(index)
+        counts.add(count)
+        for rel_path, entry in partial['test_configurations'].items():
+            if rel_path in merged:
+                print(f"❌ {rel_path} appears in more than one shard")
+                return None
+            merged[rel_path] = entry
+        print(f"📄 {partial_file.name}: {len(partial['test_configurations'])} configurations")
+    
+    if len(counts) != 1:
+        print(f"❌ Partial summaries come from different shard counts: {sorted(counts)}")
+        return None
+    missing = sorted(set(range(1, counts.pop() + 1)) - shards)
+    if missing:
+        print(f"❌ Missing shards: {', '.join(str(i) for i in missing)}")
+        return None
+    
+    all_summaries = {rel_path: merged[rel_path] for rel_path in sorted(merged, key=Path)}
+    return write_master_summary(root_path, all_summaries)
+
+def process_all_directories(root_path, shard=None, partial_dir=None):
+    """Process all test directories recursively
+    
+    With shard=(i, N) only that shard's directories are processed, and their
+    entries go to a partial summary in partial_dir (default: root_path)
+    instead of MASTER_SUMMARY.json.
+    """
     root_path = Path(root_path)
     summaries_created = 0
     all_summaries = {}
@@ -492,13 +642,13 @@ def process_all_directories(root_path):
     
     # Check for sp800-90b-results folder
     sp800_90b_found = False
-    for possible_name in ['sp800-90b-results', 'SP800-90B-results', 'entropy-assessment']:
+    for possible_name in ENTROPY_DIRECTORIES:
         if (root_path / possible_name).exists():
             sp800_90b_found = True
             print(f"✅ Found entropy results folder: {possible_name}")
             
             # List the entropy files
-            entropy_files = list((root_path / possible_name).glob("*.txt"))
+            entropy_files = glob_reports(root_path / possible_name, "*.txt")
             if entropy_files:
                 print(f"   Available entropy files:")
                 for ef in entropy_files:
@@ -510,26 +660,18 @@ def process_all_directories(root_path):
         print("   Entropy assessment data will not be included\n")
     
     # Find all directories containing test results
-    test_dirs = set()
-    
-    # Look for directories with finalAnalysisReport files
-    for report_file in root_path.rglob('*finalAnalysisReport*.txt'):
-        # Skip if in sp800-90b-results folder
-        if 'sp800-90b' not in str(report_file).lower():
-            test_dirs.add(report_file.parent)
-    
-    # Also look for other report patterns
-    for pattern in ['*final*.txt', '*Analysis*.txt']:
-        for report_file in root_path.rglob(pattern):
-            if 'sp800-90b' not in str(report_file).lower() and 'entropy' not in str(report_file).lower():
-                test_dirs.add(report_file.parent)
+    test_dirs = find_test_directories(root_path)
     
     if not test_dirs:
         print("❌ No test directories found!")
-        return
+        return all_summaries
     
     print(f"✅ Found {len(test_dirs)} test directories\n")
     
+    if shard:
+        test_dirs = {d for d in test_dirs if in_shard(d.relative_to(root_path), shard)}
+        print(f"📊 Shard {shard[0]}/{shard[1]}: {len(test_dirs)} test directories\n")
+    
     # Process each directory
     for test_dir in sorted(test_dirs):
         summary = generate_summary(test_dir, root_path)
@@ -537,44 +679,82 @@ def process_all_directories(root_path):
             summaries_created += 1
             # Store for master summary
             rel_path = test_dir.relative_to(root_path)
-            all_summaries[str(rel_path)] = {
-                **summary['overall_results'],
-                'configuration': summary['configuration'],
-                'entropy_min': summary['entropy_assessment'].get('min_entropy') if summary['entropy_assessment'] else None
-            }
-    
-    # Create master summary file at root
-    if all_summaries:
-        master_summary = {
-            'metadata': {
-                'generated': datetime.now().isoformat(),
-                'total_test_configurations': len(all_summaries),
-                'all_configurations_pass': all(
-                    s['meets_nist_requirement'] for s in all_summaries.values()
-                )
-            },
-            'test_configurations': all_summaries
-        }
-        
-        master_file = root_path / 'MASTER_SUMMARY.json'
-        try:
-            with open(master_file, 'w', encoding='utf-8') as f:
-                json.dump(master_summary, f, indent=2)
-            print(f"\n✅ Created master summary: {master_file}")
-        except Exception as e:
-            print(f"\n❌ Error creating master summary: {e}")
+            all_summaries[str(rel_path)] = master_summary_entry(summary)
+    
+    # Create master summary file at root, or this shard's part of it
+    if shard:
+        write_partial_summary(partial_dir or root_path, shard, all_summaries)
+    elif all_summaries:
+        write_master_summary(root_path, all_summaries)
     
     print("\n" + "=" * 60)
     print(f"Summary generation complete!")
     print(f"Created {summaries_created} summary files")
     print("=" * 60)
+    return all_summaries
+
+def profile_generation(profiler):
+    """Instrument discovery, parsing, entropy lookup and summary writing"""
+    import sqef_result_table
+    
+    module = sys.modules[__name__]
+    profiler.count_reads(module, sqef_result_table)
+    profiler.instrument(module, 'glob_reports', 'discover')
+    profiler.instrument(module, 'load_result_table', 'parse', count_rows())
+    profiler.instrument(module, 'get_entropy_data', 'entropy')
+    profiler.instrument(module, 'generate_summary', 'summary', capture=True)
+    profiler.instrument(module, 'write_master_summary', 'master_summary')
+    profiler.instrument(json, 'dump', 'serialize')
 
 def main():
     """Main function"""
-    import sys
-    
-    if len(sys.argv) > 1:
-        root_path = sys.argv[1]
+    parser = argparse.ArgumentParser(
+        description='Create summary.json files for each SQEF test configuration',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  %(prog)s C:\\GitHub\\Luminareware-SQEF-NIST-Evaluation
+  %(prog)s .. --profile profile.json
+  %(prog)s .. --shard 2/4 --partial-dir /shared/partials
+  %(prog)s .. --merge --partial-dir /shared/partials
+  %(prog)s .. --profile /var/lib/node_exporter/sqef.prom --profile-capture cprofile
+  %(prog)s .. --watch --interval 2 --debounce 5
+
+Set SOURCE_DATE_EPOCH to make the 'generated' timestamps reproducible.
+        """
+    )
+    parser.add_argument('root', nargs='?', help='Root directory (prompted for when omitted)')
+    parser.add_argument('--shard', metavar='i/N',
+                        help='Process only shard i of N and write a partial master summary')
+    parser.add_argument('--merge', action='store_true',
+                        help='Merge the partial master summaries into MASTER_SUMMARY.json')
+    parser.add_argument('--partial-dir', help='Directory of partial master summaries (default: root)')
+    parser.add_argument('--watch', action='store_true',
+                        help='Keep running and update summaries as reports are added or changed')
+    parser.add_argument('--interval', type=float, default=DEFAULT_POLL_SECONDS,
+                        help=f'Seconds between checks in watch mode (default: {DEFAULT_POLL_SECONDS:g})')
+    parser.add_argument('--debounce', type=float, default=DEFAULT_DEBOUNCE_SECONDS,
+                        help=f'Quiet seconds before updating in watch mode (default: {DEFAULT_DEBOUNCE_SECONDS:g})')
+    add_profile_arguments(parser)
+    
+    args = parser.parse_args()
+    
+    shard = None
+    if args.shard:
+        try:
+            shard = parse_shard(args.shard)
+        except ValueError as e:
+            parser.error(str(e))
+    if args.watch and (shard or args.merge):
+        parser.error('--watch cannot be combined with --shard or --merge')
+    
+    # Only pause and prompt when someone is at the console
+    interactive = sys.stdin.isatty() and not args.watch
+    
+    if args.root:
+        root_path = args.root
+    elif not interactive:
+        parser.error('a root directory is required when not running interactively')
     else:
         print("SQEF Test Summary Generator v2.1")
         print("-" * 30)
@@ -589,8 +769,22 @@ def main():
         print(f"❌ Error: Directory does not exist: {root_path}")
         sys.exit(1)
     
-    process_all_directories(root_path)
-    input("\nPress Enter to exit...")
+    profiler = profiler_from_args(args, 'sqef_test_summary_generator')
+    if profiler:
+        profile_generation(profiler)
+    
+    if args.merge:
+        if not merge_partial_summaries(root_path, args.partial_dir):
+            sys.exit(1)
+    elif args.watch:
+        watch_directories(root_path, args.interval, args.debounce)
+    else:
+        process_all_directories(root_path, shard, args.partial_dir)
+    
+    if profiler:
+        profiler.finish(args.profile, args.profile_format)
+    if interactive:
+        input("\nPress Enter to exit...")
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
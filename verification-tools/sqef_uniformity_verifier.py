@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+SQEF Uniformity Verifier
+Recomputes the SP 800-22 uniformity P-VALUE of every report row from its C1-C10
+histogram and checks the proportion of passing sequences against the
+sample-size-dependent bound, for all reports at once
+"""
+
+import sys
+import json
+import math
+import argparse
+from pathlib import Path
+
+import numpy as np
+
+from sqef_report_io import glob_reports
+from sqef_result_table import load_result_tables
+
+# SP 800-22 significance level and uniformity cut-off
+ALPHA = 0.01
+UNIFORMITY_ALPHA = 0.0001
+
+# Reported P-VALUEs are printed with six decimals
+P_VALUE_TOLERANCE = 1.5e-6
+
+_IGAM_ITERATIONS = 300
+_IGAM_EPSILON = 1e-15
+_TINY = 1e-300
+
+def igamc(a, x):
+    """Vectorized regularized upper incomplete gamma function Q(a, x)
+
+    Series expansion for x < a + 1, Lentz continued fraction otherwise
+    (the same split as cephes igamc, which the NIST suite uses).
+    """
+    a, x = np.broadcast_arrays(np.asarray(a, dtype=np.float64),
+                               np.asarray(x, dtype=np.float64))
+    result = np.ones(a.shape)
+    positive = x > 0
+    use_series = positive & (x < a + 1)
+    use_fraction = positive & ~use_series
+    
+    lgamma = np.frompyfunc(math.lgamma, 1, 1)
+    # Both expansions need O(sqrt(a)) terms when x is close to a
+    iterations = _IGAM_ITERATIONS + int(10 * math.sqrt(a.max())) if a.size else 0
+    
+    if use_series.any():
+        sa, sx = a[use_series], x[use_series]
+        term = 1.0 / sa
+        total = term.copy()
+        ap = sa.copy()
+        for _ in range(iterations):
+            ap += 1
+            term *= sx / ap
+            total += term
+            if np.all(np.abs(term) < np.abs(total) * _IGAM_EPSILON):
+                break
+        log_prefix = sa * np.log(sx) - sx - lgamma(sa).astype(np.float64)
+        result[use_series] = 1.0 - total * np.exp(log_prefix)
+    
+    if use_fraction.any():
+        fa, fx = a[use_fraction], x[use_fraction]
+        b = fx + 1.0 - fa
+        c = np.full(fa.shape, 1.0 / _TINY)
+        d = 1.0 / b
+        h = d.copy()
+        for i in range(1, iterations + 1):
+            an = -i * (i - fa)
+            b += 2.0
+            d = an * d + b
+            d = np.where(np.abs(d) < _TINY, _TINY, d)
+            c = b + an / c
+            c = np.where(np.abs(c) < _TINY, _TINY, c)
+            d = 1.0 / d
+            delta = d * c
+            h *= delta
+            if np.all(np.abs(delta - 1.0) < _IGAM_EPSILON):
+                break
+        log_prefix = fa * np.log(fx) - fx - lgamma(fa).astype(np.float64)
+        result[use_fraction] = np.exp(log_prefix) * h
+    
+    return np.clip(result, 0.0, 1.0)
+
+def uniformity_p_values(counts):
+    """Chi-square uniformity P-VALUE for each row of an (n, 10) histogram array
+
+    Mirrors assess: the expected count per bin is sampleSize/10 in integer
+    arithmetic and P-VALUE = igamc(9/2, chi2/2).
+    """
+    counts = np.asarray(counts, dtype=np.float64)
+    sample_sizes = counts.sum(axis=1)
+    expected = np.floor(sample_sizes / 10)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        chi2 = ((counts - expected[:, None]) ** 2).sum(axis=1) / expected
+    p_values = igamc(4.5, chi2 / 2.0)
+    return np.where(expected > 0, p_values, np.nan)
+
+def proportion_bounds(totals, alpha=ALPHA):
+    """Proportion interval p_hat +/- 3 sqrt(p_hat (1 - p_hat) / n) for each sample size
+
+    Returns (threshold_min, threshold_max) as pass counts, truncated to
+    integers as assess does; a row is flagged when its pass count falls
+    outside [threshold_min, threshold_max], so threshold_min is the minimum
+    passing count for that sample size.
+    """
+    totals = np.asarray(totals, dtype=np.float64)
+    p_hat = 1.0 - alpha
+    spread = 3.0 * np.sqrt(p_hat * alpha / np.maximum(totals, 1))
+    threshold_min = np.trunc((p_hat - spread) * totals).astype(np.int64)
+    threshold_max = np.trunc((p_hat + spread) * totals).astype(np.int64)
+    return threshold_min, threshold_max
+
+def verify_table(table, alpha=ALPHA, tolerance=P_VALUE_TOLERANCE):
+    """Recompute P-VALUEs and proportion flags for every row of a ResultTable
+
+    Returns a dict of per-row arrays (all aligned with table.rows).
+    """
+    rows = table.rows
+    recomputed = uniformity_p_values(rows['counts'])
+    reported = rows['p_value']
+    threshold_min, threshold_max = proportion_bounds(rows['total'], alpha)
+    
+    has_reported = ~np.isnan(reported)
+    p_value_mismatch = has_reported & (np.abs(recomputed - reported) > tolerance)
+    expected_uniformity_flag = recomputed < UNIFORMITY_ALPHA
+    expected_proportion_flag = (rows['passed'] < threshold_min) | (rows['passed'] > threshold_max)
+    histogram_mismatch = rows['counts'].sum(axis=1) != rows['total']
+    
+    # Rows where the fixed 96% rule and the sample-size-dependent bound disagree
+    fixed_rule_pass = rows['passed'] / np.maximum(rows['total'], 1) >= 0.96
+    bound_disagreement = fixed_rule_pass == expected_proportion_flag
+    
+    return {
+        'recomputed_p_value': recomputed,
+        'minimum_passing': threshold_min,
+        'p_value_mismatch': p_value_mismatch,
+        'uniformity_flag_mismatch': expected_uniformity_flag != rows['uniformity_flag'],
+        'proportion_flag_mismatch': expected_proportion_flag != rows['proportion_flag'],
+        'histogram_mismatch': histogram_mismatch,
+        'fixed_threshold_disagreement': bound_disagreement
+    }
+
+def minimum_pass_table(totals, alpha=ALPHA):
+    """Minimum passing count for each distinct sample size"""
+    sizes = np.unique(np.asarray(totals))
+    minimum_passing, _ = proportion_bounds(sizes, alpha)
+    return {int(n): int(m) for n, m in zip(sizes, minimum_passing)}
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(
+        description='Recompute SP 800-22 uniformity P-VALUEs and proportion bounds',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  %(prog)s ..
+  %(prog)s ../sp800-22-results/test-results-ENHANCED-128
+  %(prog)s .. --output verification.json
+        """
+    )
+    parser.add_argument('root', help='Root directory to search for finalAnalysisReport.txt files')
+    parser.add_argument('--alpha', type=float, default=ALPHA, help='Significance level (default: 0.01)')
+    parser.add_argument('--tolerance', type=float, default=P_VALUE_TOLERANCE,
+                        help='Allowed |recomputed - reported| P-VALUE difference')
+    parser.add_argument('--output', '-o', help='Write mismatching rows as JSON')
+    
+    args = parser.parse_args()
+    
+    root_path = Path(args.root)
+    report_files = [p for p in glob_reports(root_path, '*finalAnalysisReport*.txt', recursive=True)
+                    if 'sp800-90b' not in str(p).lower()]
+    if not report_files:
+        print("❌ No finalAnalysisReport.txt files found!")
+        return 1
+    
+    table = load_result_tables(report_files)
+    checks = verify_table(table, args.alpha, args.tolerance)
+    
+    print(f"📊 Verified {len(table)} rows from {len(report_files)} reports")
+    print(f"\nMinimum passing sequences (alpha={args.alpha}):")
+    for total, minimum in minimum_pass_table(table.rows['total'], args.alpha).items():
+        print(f"  {minimum}/{total}")
+    
+    check_names = ['p_value_mismatch', 'uniformity_flag_mismatch',
+                   'proportion_flag_mismatch', 'histogram_mismatch',
+                   'fixed_threshold_disagreement']
+    print()
+    for name in check_names:
+        count = int(checks[name].sum())
+        status = '✅' if count == 0 else '⚠️ '
+        print(f"  {status} {name}: {count}")
+    
+    flagged = np.zeros(len(table), dtype=bool)
+    for name in check_names:
+        flagged |= checks[name]
+    
+    mismatches = []
+    for i in np.flatnonzero(flagged):
+        row = table.row_dict(i)
+        row['report'] = table.sources[table.source_index[i]]
+        row['recomputed_p_value'] = float(checks['recomputed_p_value'][i])
+        row['minimum_passing'] = int(checks['minimum_passing'][i])
+        row['checks'] = [name for name in check_names if checks[name][i]]
+        mismatches.append(row)
+    
+    for row in mismatches[:20]:
+        print(f"  - {row['report']}: {row['test_name']} #{row['ordinal']} "
+              f"{row['passed']}/{row['total']} (min {row['minimum_passing']}), "
+              f"P-VALUE {row['p_value']} vs {row['recomputed_p_value']:.6f}: "
+              f"{', '.join(row['checks'])}")
+    if len(mismatches) > 20:
+        print(f"  ... {len(mismatches) - 20} more")
+    
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(mismatches, f, indent=2)
+        print(f"\n✅ Results saved to: {args.output}")
+    
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())